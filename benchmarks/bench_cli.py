@@ -0,0 +1,56 @@
+"""
+Benchmark CLI
+
+This module contains benchmarks for printing towers (and their
+breakdowns) of increasing size. Run them with:
+
+    $ moet bench benchmarks/bench_cli.py
+
+"""
+
+import contextlib
+import io
+
+import moet
+from moet import bench, cli
+
+ROWS = [rows for rows in bench.ROWS if rows <= 1024]
+
+
+def create_tower(rows):
+    """
+    Create a filled tower (with its glasses)
+
+    Args:
+        rows (int): Number of rows.
+
+    Returns:
+        tuple: (tower, overflow)
+    """
+    tower = moet.create_tower(rows=rows)
+    overflow = tower.fill(tower.count * 200.0, flows=True)
+    tower.glasses
+    return tower, overflow
+
+
+@bench.benchmark(rows=ROWS)
+def pprint(rows):
+    """
+    Time printing a tower.
+    """
+    tower, overflow = create_tower(rows)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli.pprint(tower, "A", overflow, False, "champagne")
+
+    return run
+
+
+@bench.benchmark(rows=ROWS)
+def format_breakdown(rows):
+    """
+    Time formatting the breakdown of a tower.
+    """
+    tower, overflow = create_tower(rows)
+    return lambda: cli.format_breakdown(tower, "A", overflow)
@@ -0,0 +1,85 @@
+"""
+Benchmark Import Time
+
+This script measures the cold-start cost of the `moet` command by
+importing the CLI module in a fresh interpreter several times. It
+also reports which of the heavy third party modules were loaded as
+a side effect of the import.
+
+Usage:
+
+    $ python benchmarks/bench_import.py --repeat 20
+
+The `startup` benchmark is also run by `moet bench`.
+
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from moet import bench
+
+
+HEAVY_MODULES = ["networkx", "numpy", "pkg_resources", "importlib.metadata"]
+
+SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import moet.cli
+moet.utils.get_version()
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(repeat=10):
+    """
+    Measure the time it takes to import the moet CLI.
+
+    Args:
+        repeat (int): The number of fresh interpreters to time.
+
+    Returns:
+        dict: Timing summary (seconds) and the heavy modules loaded.
+    """
+    code = SNIPPET.format(heavy=HEAVY_MODULES)
+    samples = []
+    heavy = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", code])
+        result = json.loads(output)
+        samples.append(result["seconds"])
+        heavy = result["heavy"]
+
+    return {
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+        "heavy": heavy,
+    }
+
+
+@bench.benchmark(module=[None, "moet.cli"])
+def startup(module):
+    """
+    Time starting an interpreter and importing the given module.
+    """
+    # Without a module, this is the cost of starting the interpreter.
+    code = f"import {module}" if module else "pass"
+    return lambda: subprocess.check_call([sys.executable, "-c", code])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark Memory
+
+This module contains benchmarks for the memory used to build and fill
+towers of increasing size, in each of the ways a tower can be held:
+
+    arrays: A tower in memory, before its glasses are created.
+    glasses: A tower in memory, with its `Glass` objects.
+    graph: A tower in memory, with its glasses and networkx graph.
+    mmap: A tower in memory-mapped files (see `moet.storage`).
+
+The peak memory of each case (measured with tracemalloc) is the
+number to compare. Run them with:
+
+    $ moet bench benchmarks/bench_memory.py
+
+"""
+
+import atexit
+import shutil
+import tempfile
+
+import moet
+from moet import bench
+
+# Largest towers to create glasses for.
+GLASS_ROWS = 1024
+
+
+REPRESENTATIONS = ["arrays", "glasses", "graph", "mmap"]
+
+
+@bench.benchmark(rows=bench.ROWS, representation=REPRESENTATIONS)
+def create_tower(rows, representation):
+    """
+    Measure building and filling a tower.
+    """
+    liquid = moet.utils.get_triangular_value(rows) * 125.0
+    if representation == "mmap":
+        path = tempfile.mkdtemp(prefix="moet-bench-")
+        atexit.register(shutil.rmtree, path, ignore_errors=True)
+
+        def run():
+            tower = moet.create_tower(rows=rows, storage="mmap", path=path)
+            tower.fill(liquid)
+
+        return run
+
+    if representation != "arrays" and rows > GLASS_ROWS:
+        return None
+
+    def run():
+        tower = moet.create_tower(rows=rows)
+        tower.fill(liquid)
+        if representation == "glasses":
+            tower.glasses
+        elif representation == "graph":
+            tower.graph
+
+    return run
@@ -0,0 +1,120 @@
+"""
+Benchmark Tower
+
+This module contains benchmarks for building, filling and looking up
+glasses in towers of increasing size. Run them with:
+
+    $ moet bench benchmarks/bench_tower.py
+
+"""
+
+import moet
+from moet import bench
+from moet.engines import ENGINES
+
+# Largest towers to create glasses for (glasses are created lazily, so
+# only the benchmarks that need them pay for them)
+GLASS_ROWS = [rows for rows in bench.ROWS if rows <= 1024]
+
+
+# Largest towers to fill with the pure python (reference) engine.
+PYTHON_ROWS = 256
+
+
+# Number of glasses looked up by each lookup benchmark.
+LOOKUPS = 1000
+
+
+def get_sample(tower):
+    """
+    Get glasses spread evenly over the tower.
+
+    Args:
+        tower (Tower): The tower.
+
+    Returns:
+        list of Glass: Up to `LOOKUPS` glasses.
+    """
+    glasses = tower.glasses
+    step = max(1, len(glasses) // LOOKUPS)
+    return glasses[::step]
+
+
+@bench.benchmark(rows=bench.ROWS)
+def create_tower(rows):
+    """
+    Time creating a tower (without its glasses)
+    """
+    return lambda: moet.create_tower(rows=rows)
+
+
+@bench.benchmark(rows=bench.ROWS, engine=list(ENGINES))
+def fill(rows, engine):
+    """
+    Time filling a tower with each engine.
+    """
+    if not ENGINES[engine].available:
+        return None
+
+    if engine == "python" and rows > PYTHON_ROWS:
+        return None
+
+    tower = moet.create_tower(rows=rows)
+    tower.engine = engine
+    liquid = tower.count * 250.0
+    return lambda: tower.fill(liquid)
+
+
+@bench.benchmark(rows=GLASS_ROWS)
+def get_rows(rows):
+    """
+    Time getting the rows of a new tower.
+    """
+    # Each run uses a new tower, so this includes creating the glasses.
+    return lambda: list(moet.create_tower(rows=rows).get_rows())
+
+
+@bench.benchmark(rows=GLASS_ROWS)
+def get_glass(rows):
+    """
+    Time looking up glasses by ID.
+    """
+    tower = moet.create_tower(rows=rows)
+    uids = [glass.uid for glass in get_sample(tower)]
+    return lambda: [tower.get_glass(uid) for uid in uids]
+
+
+@bench.benchmark(rows=GLASS_ROWS)
+def get_parents(rows):
+    """
+    Time looking up the parents of glasses.
+    """
+    tower = moet.create_tower(rows=rows)
+    glasses = get_sample(tower)
+    return lambda: [tower.get_parents(glass) for glass in glasses]
+
+
+@bench.benchmark(rows=GLASS_ROWS)
+def get_children(rows):
+    """
+    Time looking up the children of glasses.
+    """
+    tower = moet.create_tower(rows=rows)
+    glasses = get_sample(tower)
+    return lambda: [tower.get_children(glass) for glass in glasses]
+
+
+@bench.benchmark(rows=bench.ROWS, structure=["rows", "scan"])
+def count_full(rows, structure):
+    """
+    Time counting the glasses that are at least 80% full, searching
+    each row (after a pour into the top most glass) or checking every
+    glass (e.g. when capacities differ)
+    """
+    tower = moet.create_tower(rows=rows)
+    if structure == "scan":
+        tower.fill({"A": rows * 10000.0, "B": 0.0, "C": 1.0})
+    else:
+        tower.fill(rows * 10000.0)
+
+    return lambda: tower.count_full(0.8)
@@ -1,5 +1,49 @@
 """Moet"""
 
-from .glass import create_glass, Glass
+import importlib
+
+from .glass import create_glass, create_glasses, Glass
 from .tower import create_tower, Tower
 from . import utils
+from ._version import __version__
+
+# Names that are imported from their modules on first access. These
+# modules depend on heavier third party packages (e.g. numpy) which
+# we don't want to pay for on every `import moet`.
+_LAZY_IMPORTS = {
+    "record": "recorder",
+    "load_recording": "recorder",
+    "Recording": "recorder",
+    "create_topology": "topology",
+    "create_triangular_topology": "topology",
+    "create_pyramid_topology": "topology",
+    "Topology": "topology",
+    "Ensemble": "ensemble",
+    "open_tower": "storage",
+    "MappedTower": "storage",
+    "RowStats": "stats",
+    "iter_row_stats": "stats",
+    "Control": "control",
+    "Profile": "profiling",
+    "Verifier": "verify",
+    "VerificationError": "verify",
+}
+
+
+def __getattr__(name):
+    """
+    Import lazily loaded names on first access.
+
+    Args:
+        name (str): Attribute name.
+
+    Returns:
+        object: The attribute.
+    """
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,9 @@
+"""
+Version
+
+This module holds the version of moet. It is read by `setup.py` so
+that the package metadata and the runtime agree without having to
+query the installed distribution.
+"""
+
+__version__ = "0.1.0"
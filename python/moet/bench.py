@@ -0,0 +1,239 @@
+"""
+Bench
+
+This module contains the runner for the benchmark suite (see the
+`benchmarks` directory and `moet bench`). A benchmark is a function
+decorated with `benchmark`, which takes the parameters of a case
+(e.g. the number of rows) and returns the function to time:
+
+    @bench.benchmark(rows=bench.ROWS, engine=["numpy", "numba"])
+    def fill(rows, engine):
+        tower = moet.create_tower(rows=rows)
+        tower.engine = engine
+        return lambda: tower.fill(rows * 1000.0)
+
+The runner calls the benchmark once for each combination of its
+parameters, so any setup (e.g. building the tower) isn't timed. A
+benchmark can return None to skip a case (e.g. an engine that isn't
+available). Each case is run once to warm up (e.g. to compile the
+numba kernels), once while tracing memory allocations to get the peak
+memory, then `repeat` more times to get the timings.
+"""
+
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+from . import utils
+
+
+# Number of rows in the towers used by the benchmarks.
+ROWS = (4, 16, 64, 256, 1024, 4096)
+
+
+# Number of times each case is timed.
+REPEAT = 5
+
+
+def benchmark(**params):
+    """
+    Mark a function as a benchmark.
+
+    Args:
+        params: The values of each parameter of the benchmark (e.g.
+            rows=[4, 16]). The benchmark is run for each combination.
+
+    Returns:
+        callable: Decorator.
+    """
+
+    def decorator(function):
+        function.benchmark = {name: list(values) for name, values in params.items()}
+        return function
+
+    return decorator
+
+
+def load_benchmarks(paths):
+    """
+    Load the benchmarks in the given files (or directories of files
+    named `bench_*.py`)
+
+    Args:
+        paths (list of str): Files or directories.
+
+    Returns:
+        list of tuple: (name, function) of each benchmark, where the
+            name is prefixed with the name of its file (without the
+            "bench_" prefix)
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.listdir(path))
+            files += [
+                os.path.join(path, name)
+                for name in names
+                if name.startswith("bench_") and name.endswith(".py")
+            ]
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise ValueError(f"Invalid path. Got {path}, expected a file or directory")
+
+    benchmarks = []
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(f"benchmarks.{stem}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        prefix = stem[len("bench_") :] if stem.startswith("bench_") else stem
+        for name, value in vars(module).items():
+            if callable(value) and hasattr(value, "benchmark"):
+                benchmarks.append((f"{prefix}.{name}", value))
+
+    return benchmarks
+
+
+def iter_cases(function, max_rows=None):
+    """
+    Iterate over the cases of a benchmark.
+
+    Args:
+        function (callable): The benchmark.
+        max_rows (int, optional): Skip cases with more rows than this.
+
+    Yields:
+        dict: The parameters of each case.
+    """
+    names = list(function.benchmark)
+    for values in itertools.product(*function.benchmark.values()):
+        params = dict(zip(names, values))
+        if max_rows is not None and params.get("rows", 0) > max_rows:
+            continue
+
+        yield params
+
+
+def measure(function, params, repeat=REPEAT):
+    """
+    Measure a case of a benchmark.
+
+    Args:
+        function (callable): The benchmark.
+        params (dict): The parameters of the case.
+        repeat (int): The number of times to time the case.
+
+    Returns:
+        dict: The parameters, the min, median and max time (seconds)
+            and the peak memory allocated (bytes) by the case, or None
+            if the benchmark skipped the case.
+    """
+    run = function(**params)
+    if run is None:
+        return None
+
+    run()
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+
+    return {
+        "params": params,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+        "peak_memory": peak,
+    }
+
+
+def run(paths, match=None, max_rows=None, repeat=REPEAT, report=None):
+    """
+    Run the benchmarks in the given files (or directories)
+
+    Args:
+        paths (list of str): Files or directories (see
+            `load_benchmarks`)
+        match (str, optional): Only run benchmarks with this text in
+            their name.
+        max_rows (int, optional): Skip cases with more rows than this.
+        repeat (int): The number of times to time each case.
+        report (callable, optional): Function called with the name and
+            result of each case as it completes.
+
+    Returns:
+        dict: The results of each case, along with information about
+            the environment (e.g. versions) they were measured in.
+    """
+    if repeat < 1:
+        raise ValueError(f"Invalid repeat. Got {repeat}, expected 1 or more")
+
+    results = []
+    for name, function in load_benchmarks(paths):
+        if match is not None and match not in name:
+            continue
+
+        for params in iter_cases(function, max_rows=max_rows):
+            result = measure(function, params, repeat=repeat)
+            if result is None:
+                continue
+
+            result = {"name": name, **result}
+            results.append(result)
+            if report is not None:
+                report(name, result)
+
+    return {"environment": get_environment(), "results": results}
+
+
+def get_environment():
+    """
+    Get information about the environment the benchmarks are run in.
+
+    Returns:
+        dict: The versions of moet, python and numpy (and numba, if
+            it's installed), and the platform.
+    """
+    import numpy
+
+    environment = {
+        "moet": utils.get_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy.__version__,
+    }
+    if importlib.util.find_spec("numba") is not None:
+        import numba
+
+        environment["numba"] = numba.__version__
+
+    return environment
+
+
+def save(results, path):
+    """
+    Save the results of a run as JSON.
+
+    Args:
+        results (dict): The results (see `run`)
+        path (str): Path to the JSON file.
+    """
+    with open(path, "w") as json_file:
+        json.dump(results, json_file, indent=2)
+        json_file.write("\n")
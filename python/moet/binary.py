@@ -0,0 +1,212 @@
+"""
+Binary
+
+This module contains functions used to save and load towers in a
+compact binary format. A file starts with a fixed size prefix:
+
+    magic (4 bytes): b"MOET"
+    version (uint16): Version of the format (see `FORMAT_VERSION`)
+    header size (uint32): Length of the header (bytes)
+
+followed by a JSON header describing the geometry of the tower, and
+the raw (little-endian) arrays:
+
+    capacities (float64): Capacity of each glass
+    quantities (float64): Liquid in each glass
+
+Towers with a preset layout (e.g. triangular) are described by the
+preset and its size alone. For any other layout the arrays of the
+topology (edges, weights, levels, positions and order) follow.
+"""
+
+import json
+import struct
+
+import numpy
+
+from . import utils
+
+
+MAGIC = b"MOET"
+
+
+# Version of the format written by this module.
+FORMAT_VERSION = 1
+
+
+PREFIX = struct.Struct("<4sHI")
+
+
+def save(tower, path):
+    """
+    Save the given tower to a file.
+
+    Args:
+        tower (Tower): The tower.
+        path (str): File to save to.
+    """
+    with open(path, "wb") as binary_file:
+        binary_file.write(dumps(tower))
+
+
+def load(path):
+    """
+    Load a tower from a file.
+
+    Args:
+        path (str): File to load from.
+
+    Returns:
+        Tower: The tower.
+    """
+    with open(path, "rb") as binary_file:
+        return loads(binary_file.read())
+
+
+def dumps(tower):
+    """
+    Get the given tower in binary format.
+
+    Args:
+        tower (Tower): The tower.
+
+    Returns:
+        bytes: The tower in binary format.
+    """
+    topology = tower.topology
+
+    # IDs are only saved if they aren't the default ones (A, B, C ...)
+    uids = None
+    if tower._quantities is None or tower._uids is not None:
+        uids = tower._get_uids()
+        if uids == utils.get_ids(tower.count):
+            uids = None
+
+    header = {
+        "count": tower.count,
+        "overflow": tower.overflow,
+        "engine": tower.engine,
+        "uids": uids,
+        "preset": topology.preset,
+    }
+    arrays = [
+        numpy.asarray(tower._get_capacities(), dtype="<f8"),
+        numpy.asarray(tower._get_quantities(), dtype="<f8"),
+    ]
+    if topology.preset is None:
+        edges = topology.edges
+        positions = numpy.asarray(topology.positions, dtype="<i8")
+        header["edges"] = len(edges)
+        header["dimensions"] = positions.shape[1] if positions.ndim == 2 else 0
+        arrays += [
+            edges[:, 0].astype("<i8"),
+            edges[:, 1].astype("<i8"),
+            topology.child_weight.astype("<f8"),
+            topology.levels.astype("<i8"),
+            positions.reshape(-1),
+            numpy.asarray(topology.order, dtype="<i8"),
+        ]
+
+    header = json.dumps(header).encode("utf-8")
+    prefix = PREFIX.pack(MAGIC, FORMAT_VERSION, len(header))
+    return b"".join([prefix, header] + [array.tobytes() for array in arrays])
+
+
+def loads(data):
+    """
+    Get a tower from binary format.
+
+    Args:
+        data (bytes): The tower in binary format.
+
+    Returns:
+        Tower: The tower.
+    """
+    from . import topology as layouts
+    from .tower import Tower, get_layout
+
+    if len(data) < PREFIX.size:
+        raise ValueError("Invalid tower. The data is too short")
+
+    magic, version, size = PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Invalid tower. The data is not in moet's binary format")
+
+    if version > FORMAT_VERSION:
+        msg = f"Unsupported tower format. Got {version}, expected {FORMAT_VERSION}"
+        raise ValueError(msg)
+
+    header = json.loads(data[PREFIX.size : PREFIX.size + size].decode("utf-8"))
+    reader = _Reader(data, PREFIX.size + size)
+    count = header["count"]
+    capacities = reader.read("<f8", count)
+    quantities = reader.read("<f8", count)
+
+    if header["preset"] is not None:
+        topology = get_layout(*header["preset"])
+    else:
+        edges = header["edges"]
+        dimensions = header["dimensions"]
+        parents = reader.read("<i8", edges)
+        children = reader.read("<i8", edges)
+        weights = reader.read("<f8", edges)
+        levels = reader.read("<i8", count)
+        positions = reader.read("<i8", count * dimensions).reshape(count, dimensions)
+        order = reader.read("<i8", count)
+        topology = layouts.Topology(
+            parents=parents,
+            children=children,
+            weights=weights,
+            levels=levels,
+            positions=[tuple(position) for position in positions.tolist()],
+            order=order,
+        )
+
+    tower = Tower.from_topology(topology, capacities, quantities)
+    tower._uids = header["uids"]
+    tower.overflow = header["overflow"]
+    try:
+        tower.engine = header["engine"]
+    except ValueError:
+        # The engine isn't available here (e.g. numba isn't installed)
+        pass
+
+    return tower
+
+
+class _Reader:
+    """
+    Reads arrays from binary data, one after another.
+    """
+
+    def __init__(self, data, offset):
+        """
+        Initialize reader.
+
+        Args:
+            data (bytes): Binary data.
+            offset (int): Position of the first array (bytes)
+        """
+        self.data = data
+        self.offset = offset
+
+    def read(self, dtype, count):
+        """
+        Read the next array.
+
+        Args:
+            dtype (str): Data type of the array.
+            count (int): Number of values in the array.
+
+        Returns:
+            numpy.ndarray: The array (in native byte order)
+        """
+        dtype = numpy.dtype(dtype)
+        if self.offset + dtype.itemsize * count > len(self.data):
+            raise ValueError("Invalid tower. The data is too short")
+
+        array = numpy.frombuffer(
+            self.data, dtype=dtype, count=count, offset=self.offset
+        )
+        self.offset += dtype.itemsize * count
+        return array.astype(dtype.newbyteorder("="))
@@ -3,6 +3,7 @@
 
 import click
 
+from .profiling import Profile, measure
 from .tower import create_tower
 from . import utils
 
@@ -10,9 +11,17 @@ from . import utils
 LIQUIDS = ["champagne", "beer", "wine", "sake", "water", "tea", "coffee"]
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option(
-    "-r", "--rows", type=int, default=4, help="The number of rows in the tower (max=6)"
+    "-r",
+    "--rows",
+    type=int,
+    multiple=True,
+    default=[4],
+    help=(
+        "The number of rows in the tower (max=6). Repeat to pour the same "
+        "liquid over towers with each number of rows"
+    ),
 )
 @click.option(
     "-f",
@@ -43,18 +52,34 @@ LIQUIDS = ["champagne", "beer", "wine", "sake", "water", "tea", "coffee"]
     default=False,
     help="Show breakdown of each glass in the tower.",
 )
-def moet(rows, fill, uid, position, liquid, breakdown):
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Show how long it took to build, fill and print the tower.",
+)
+@click.pass_context
+def moet(ctx, rows, fill, uid, position, liquid, breakdown, profile):
     """
     Build a tower of glasses. Fill them with champagne!
 
     """
+    if ctx.invoked_subcommand is not None:
+        return
+
     version = utils.get_version()
     click.echo(f"moet (version: {version})\n")
 
-    tower = create_tower(rows=rows)
+    tower = create_tower(rows=max(rows), profile=Profile() if profile else None)
     click.echo(f"Pouring {fill} litres of {liquid} over the tower:\n")
     millilitres = fill * 1000
-    overflow = tower.fill(millilitres)
+    if len(set(rows)) == 1:
+        tower.fill(millilitres, flows=breakdown)
+        towers = {rows[0]: tower}
+    else:
+        # The smaller towers are the top rows of the tallest one, so it
+        # is only filled once (see `Tower.fill_prefixes`)
+        towers = tower.fill_prefixes(millilitres, rows)
 
     if uid and position:
         msg = (
@@ -63,13 +88,144 @@ def moet(rows, fill, uid, position, liquid, breakdown):
         click.echo(click.style(msg, fg="bright_red"))
         raise click.Abort(msg)
 
-    if position:
-        for glass in tower.glasses:
-            if position == glass.position:
-                uid = glass.uid
-                break
+    for count in dict.fromkeys(rows):
+        if len(towers) > 1:
+            click.echo(f"Tower with {count} rows:\n")
+
+        selected = towers[count]
+        if position:
+            for glass in selected.glasses:
+                if position == glass.position:
+                    uid = glass.uid
+                    break
+
+        pprint(selected, uid, selected.overflow, breakdown, liquid)
+
+    if profile:
+        click.echo("Profile:\n\n" + tower.profile.format() + "\n")
+
+
+@moet.command()
+@click.option(
+    "-r", "--rows", type=int, default=4, help="The number of rows in the tower"
+)
+@click.option(
+    "--rate",
+    type=float,
+    default=250.0,
+    help="The rate to pour liquid over the tower (millilitres per second)",
+)
+@click.option(
+    "-d",
+    "--duration",
+    type=float,
+    help="How long to pour for (seconds). Defaults to until the tower is full",
+)
+@click.option(
+    "--fps", type=float, default=20.0, help="The maximum number of frames per second"
+)
+@click.option(
+    "--speed", type=float, default=1.0, help="How much faster than real time to pour"
+)
+@click.option(
+    "-l",
+    "--liquid",
+    type=click.Choice(LIQUIDS),
+    default="champagne",
+    help="The type of liquid",
+)
+def watch(rows, rate, duration, fps, speed, liquid):
+    """
+    Watch a tower of glasses fill up as liquid is poured over it.
 
-    pprint(tower, uid, overflow, breakdown, liquid)
+    """
+    from . import watch as animation
+
+    version = utils.get_version()
+    click.echo(f"moet (version: {version})\n")
+
+    tower = create_tower(rows=rows)
+    click.echo(f"Pouring {liquid} over the tower at {rate} ml/s:\n")
+    try:
+        animation.watch(tower, rate, duration=duration, fps=fps, speed=speed)
+    except ValueError as error:
+        raise click.BadParameter(str(error))
+
+
+@moet.command()
+@click.option(
+    "-p", "--port", type=int, default=8000, help="The port to listen on (localhost)"
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    help="The number of worker processes for large towers. Defaults to one per CPU",
+)
+def serve(port, workers):
+    """
+    Serve tower fills as JSON over HTTP (on localhost).
+
+    """
+    from . import server
+
+    version = utils.get_version()
+    click.echo(f"moet (version: {version})\n")
+    click.echo(f"Serving on http://{server.HOST}:{port} (press CTRL+C to quit)")
+    try:
+        server.serve(port=port, workers=workers)
+    except KeyboardInterrupt:
+        pass
+
+
+@moet.command()
+@click.argument("paths", nargs=-1, type=click.Path(exists=True))
+@click.option(
+    "-k", "--match", type=str, help="Only run benchmarks with this text in their name"
+)
+@click.option(
+    "-r", "--max-rows", type=int, help="Skip benchmarks of towers with more rows"
+)
+@click.option(
+    "--repeat", type=int, default=5, help="The number of times to time each benchmark"
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(),
+    default="bench.json",
+    help="The file to write the results to (JSON)",
+)
+def bench(paths, match, max_rows, repeat, output):
+    """
+    Run the benchmarks in the given files or directories (defaults to
+    the "benchmarks" directory)
+
+    """
+    from . import bench as runner
+
+    version = utils.get_version()
+    click.echo(f"moet (version: {version})\n")
+
+    def report(name, result):
+        params = " ".join(f"{key}={value}" for key, value in result["params"].items())
+        median = result["median"] * 1000
+        peak = result["peak_memory"] / 1024
+        click.echo(f"{name} {params}: {median:.3f} ms (peak memory: {peak:.1f} KiB)")
+
+    try:
+        results = runner.run(
+            paths or ["benchmarks"],
+            match=match,
+            max_rows=max_rows,
+            repeat=repeat,
+            report=report,
+        )
+    except ValueError as error:
+        raise click.BadParameter(str(error))
+
+    runner.save(results, output)
+    click.echo(f"\nResults saved to {output}")
 
 
 def pprint(tower, uid, overflow, breakdown, liquid):
@@ -85,24 +241,24 @@ def pprint(tower, uid, overflow, breakdown, liquid):
     """
     lines = []
 
-    indent = " "
-    rows = list(tower.get_rows())
-    rows = reversed(rows[:])
-    for index, row in enumerate(rows):
-        text = format_row(row, uid, indent, liquid)
-        if index != 0:
-            edges = indent + "/ \\ " * len(row)
-            lines.insert(0, edges)
+    with measure(tower.profile, "pprint"):
+        indent = " "
+        rows = list(tower.get_rows())
+        rows = reversed(rows[:])
+        for index, row in enumerate(rows):
+            text = format_row(row, uid, indent, liquid)
+            if index != 0:
+                edges = indent + "/ \\ " * len(row)
+                lines.insert(0, edges)
 
-        lines.insert(0, text)
-        indent += "  "
+            lines.insert(0, text)
+            indent += "  "
 
-    lines.append("\n")
-    click.echo("\n".join(lines))
+        lines.append("\n")
+        click.echo("\n".join(lines))
 
-    breakdown_text = format_breakdown(tower, uid, overflow)
     if breakdown:
-        click.echo(breakdown_text)
+        click.echo(format_breakdown(tower, uid, overflow))
 
 
 def format_row(row, uid, indent, liquid):
@@ -142,6 +298,9 @@ def format_breakdown(tower, uid, overflow):
     """
     Format a breakdown of the quantities in each glass.
 
+    The liquid that flowed into and out of each glass is included if
+    it was recorded when the tower was filled.
+
     Args:
         tower (Tower): The tower.
         uid (str, optional): The glass ID selected by the user.
@@ -150,12 +309,23 @@ def format_breakdown(tower, uid, overflow):
     Returns:
         str: Formatted breakdown of each glass in the tower.
     """
+    try:
+        flows = tower.get_flows()
+    except ValueError:
+        flows = {}
+
     lines = []
-    for glass in tower.glasses:
-        quantity = utils.to_integer(glass.quantity)
-        line = f"id=({glass.uid}) position={glass.position} quantity={quantity}"
-        line = highlight(line, glass, uid)
-        lines.append(line)
+    with measure(tower.profile, "format_breakdown"):
+        for glass in tower.glasses:
+            quantity = utils.to_integer(glass.quantity)
+            line = f"id=({glass.uid}) position={glass.position} quantity={quantity}"
+            if glass.uid in flows:
+                flow = flows[glass.uid]
+                inflow, outflow = (utils.to_integer(value) for value in flow)
+                line += f" inflow={inflow} outflow={outflow}"
+
+            line = highlight(line, glass, uid)
+            lines.append(line)
 
     text = "Breakdown:\n\n"
     text += "\n".join(lines)
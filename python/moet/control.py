@@ -0,0 +1,165 @@
+"""
+Control
+
+This module contains the `Control` class, used to cancel long running
+computations (e.g. filling a tower with millions of rows), to give
+them a deadline and to report their progress. For example:
+
+    control = moet.Control(timeout=0.5, progress=print, every=1000)
+    tower.fill(1e9, control=control)
+    if not control.complete:
+        print(f"Only {control.rows} of {control.total} rows were filled")
+
+Computations are split into chunks of rows (see `iter_chunks`). The
+control is only checked between chunks, so the cost of checking is
+spread over many rows and there is no cost at all without a control.
+When a computation is cancelled, it stops at the end of the current
+chunk and returns a partial result, which is final for the rows that
+were completed (see `Control.rows`).
+"""
+
+import time
+
+
+# Default number of rows between checks.
+EVERY = 1000
+
+
+class Control:
+    """
+    Control
+
+    This class represents a cancellation token with an optional
+    deadline and progress callback. A control is reset at the start of
+    each computation it is given to.
+
+    Attributes:
+        rows (int): Number of rows completed by the last computation.
+        total (int): Number of rows in the last computation.
+    """
+
+    def __init__(self, timeout=None, deadline=None, progress=None, every=EVERY):
+        """
+        Initialize control.
+
+        Args:
+            timeout (float, optional): Time limit (seconds from now)
+            deadline (float, optional): Time limit (a `time.monotonic`
+                timestamp). The earlier of the timeout and deadline is
+                used.
+            progress (callable, optional): Function called with the
+                number of rows completed and the total number of rows,
+                every `every` rows (and once all the rows are completed)
+            every (int): Number of rows between checks.
+        """
+        if every < 1:
+            raise ValueError(f"Invalid number of rows. Got {every}, expected 1 or more")
+
+        if timeout is not None:
+            expiry = time.monotonic() + timeout
+            deadline = expiry if deadline is None else min(deadline, expiry)
+
+        self.deadline = deadline
+        self.progress = progress
+        self.every = every
+        self.rows = 0
+        self.total = None
+        self._cancelled = False
+        self._next = every
+
+    def __repr__(self):
+        """
+        Get the string representation of the control.
+
+        Returns:
+            str: String representation.
+        """
+        return f"Control(rows={self.rows}, total={self.total})"
+
+    @property
+    def cancelled(self):
+        """
+        Check if the computation should stop.
+
+        bool: True if the control was cancelled or its deadline passed.
+        """
+        if self._cancelled:
+            return True
+
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def complete(self):
+        """
+        Check if the last computation completed every row.
+
+        bool: True if every row was completed.
+        """
+        return self.total is not None and self.rows >= self.total
+
+    def cancel(self):
+        """
+        Cancel the computation (e.g. from a progress callback or
+        another thread).
+        """
+        self._cancelled = True
+
+    def start(self, total):
+        """
+        Start a new computation.
+
+        Args:
+            total (int): Number of rows in the computation.
+        """
+        self.rows = 0
+        self.total = total
+        self._next = self.every
+
+    def update(self, rows):
+        """
+        Record the number of rows completed so far.
+
+        The progress callback is called if another `every` rows were
+        completed since it was last called (or if every row is complete)
+
+        Args:
+            rows (int): Number of rows completed.
+
+        Returns:
+            bool: True if the computation should continue.
+        """
+        self.rows = rows
+        if self.progress is not None and (rows >= self._next or rows == self.total):
+            self.progress(rows, self.total)
+            self._next = (rows // self.every + 1) * self.every
+
+        return rows >= self.total or not self.cancelled
+
+
+def iter_chunks(total, control=None):
+    """
+    Split a computation into chunks of rows.
+
+    The control is updated (and checked) between chunks, and no more
+    chunks are yielded once it is cancelled. Without a control, all
+    the rows are yielded in a single chunk.
+
+    Args:
+        total (int): Number of rows.
+        control (Control, optional): The control.
+
+    Yields:
+        tuple: (start, end) rows of each chunk.
+    """
+    if control is None:
+        yield 0, total
+        return
+
+    control.start(total)
+    for start in range(0, total, control.every):
+        if not control.update(start):
+            return
+
+        yield start, min(start + control.every, total)
+
+    control.update(total)
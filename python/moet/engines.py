@@ -0,0 +1,527 @@
+"""
+Engines
+
+This module contains the engines used to fill a tower of glasses. An
+engine works on the arrays of a compiled `Topology` and provides the
+core computations:
+
+    fill: Pour liquid over the tower (optionally over a batch of
+        towers with different weights at once, and optionally recording
+        the liquid that flowed through each glass).
+    get_breakpoints: Find when each glass becomes wet and full during
+        a continuous pour.
+
+The following engines are registered by default:
+
+    numpy: Fills one level at a time with vectorised numpy operations.
+    python: Fills one glass at a time with plain Python loops.
+    numba: The same loops as "python", compiled with numba (only
+        available if numba is installed, e.g. `pip install moet[numba]`)
+
+Every engine gives bit-identical results. By default ("auto") numba is
+used for large pours if it is installed, and numpy otherwise.
+"""
+
+import heapq
+import importlib.util
+
+import numpy
+
+from .control import iter_chunks
+
+
+ENGINES = {}
+
+
+# Below this many glasses (per fill), compiling (or loading) the numba
+# kernels costs more than it saves.
+JIT_THRESHOLD = 50000
+
+
+def register_engine(engine):
+    """
+    Register an engine, so it can be selected by name.
+
+    Args:
+        engine (Engine): The engine.
+    """
+    ENGINES[engine.name] = engine
+
+
+def get_engine(name="auto", size=None):
+    """
+    Get the engine with the given name.
+
+    Args:
+        name (str): Name of the engine, or "auto" to pick the fastest
+            engine that is available.
+        size (int, optional): Number of glasses filled at once (used
+            to pick an engine automatically)
+
+    Returns:
+        Engine: The engine.
+    """
+    if name == "auto":
+        jit = ENGINES.get("numba")
+        if jit is not None and jit.available and (size or 0) >= JIT_THRESHOLD:
+            return jit
+
+        return ENGINES["numpy"]
+
+    try:
+        engine = ENGINES[name]
+    except KeyError:
+        msg = f"Invalid engine. Got {name}, expected one of {['auto', *ENGINES]}"
+        raise ValueError(msg)
+
+    if not engine.available:
+        raise ValueError(f"The {name} engine is not available.")
+
+    return engine
+
+
+def iter_events(topology, capacities, rates, fill=None):
+    """
+    Iterate over the events of a continuous pour.
+
+    Each item describes the interval between two events, where an
+    event is a glass becoming full (and therefore changing where the
+    liquid flows). The state of the pour is tracked in arrays (in the
+    same order as the glasses).
+
+    The flow rates are found with a single fill. After each event,
+    only the glasses below the glasses that became full are updated
+    (see `_update_flows`), so each event costs one vectorised pass
+    over the glasses (to find the next event) plus the glasses whose
+    flow rate changed.
+
+    Args:
+        topology (Topology): Layout of the tower.
+        capacities (numpy.ndarray): Capacity of each glass (millilitres)
+        rates (numpy.ndarray): Rate that liquid is poured into each
+            glass (millilitres per second)
+        fill (callable, optional): Function used to fill the tower
+            (defaults to `topology.fill`)
+
+    Yields:
+        tuple: (start, end, quantities, inflows, overflow,
+            overflow_rate, filled) where `quantities` and `overflow` are
+            the state at the start of the interval, `inflows` is the
+            rate each glass is filling up, `overflow_rate` is the rate
+            at which liquid leaves the tower and `filled` holds the
+            glasses that become full at `end` (inf once every glass is
+            full).
+    """
+    fill = fill or topology.fill
+    count = len(topology)
+    quantities = numpy.zeros(count)
+    full = numpy.zeros(count, dtype=bool)
+    overflow = 0.0
+    time = 0.0
+
+    # Full glasses pass everything on, the others keep it all. None of
+    # the glasses are full to begin with.
+    limits = numpy.full(count, numpy.inf)
+    inflows, _, totals, outflows = fill(limits, rates, flows=True)
+    while True:
+        overflow_rate = topology.get_overflow(outflows)
+        filling = inflows > 0
+        remaining = numpy.full(count, numpy.inf)
+        remaining[filling] = (capacities - quantities)[filling] / inflows[filling]
+        step = remaining.min() if count else numpy.inf
+        filled = numpy.flatnonzero(
+            filling & numpy.isclose(remaining, step, rtol=1e-9, atol=1e-12)
+        )
+
+        end = time + step
+        yield time, end, quantities, inflows.copy(), overflow, overflow_rate, filled
+        if not filling.any():
+            return
+
+        quantities = quantities + inflows * step
+        quantities[filled] = capacities[filled]
+        overflow += overflow_rate * step
+        full[filled] = True
+        time = end
+        _update_flows(topology, rates, full, inflows, totals, outflows, filled)
+
+
+def _update_flows(topology, rates, full, inflows, totals, outflows, filled):
+    """
+    Update the flow rates after some glasses become full.
+
+    A glass that becomes full starts passing on everything that flows
+    into it, which only changes the glasses below it. Each glass is
+    updated from the (recorded) overflow of its parents, in schedule
+    order, and its children are only updated if its own overflow
+    changed. A glass that isn't full keeps everything, so the update
+    stops at the first glasses below that aren't full. The arithmetic
+    (and order) is the same as the fill kernels, so the result matches
+    a fill of the whole tower.
+
+    Args:
+        topology (Topology): Layout of the tower.
+        rates (numpy.ndarray): Rate that liquid is poured into each
+            glass (millilitres per second)
+        full (numpy.ndarray): Whether each glass is full.
+        inflows (numpy.ndarray): Rate each glass is filling up
+            (updated in place)
+        totals (numpy.ndarray): Rate liquid flows into each glass
+            (updated in place)
+        outflows (numpy.ndarray): Rate liquid flows out of each glass
+            (updated in place)
+        filled (numpy.ndarray): Glasses that just became full.
+    """
+    parent_ptr = topology.parent_ptr
+    parent_index = topology.parent_index
+    parent_weight = topology.parent_weight
+    child_ptr = topology.child_ptr
+    child_index = topology.child_index
+    pending = filled.tolist()
+    queued = set(pending)
+    heapq.heapify(pending)
+    while pending:
+        index = heapq.heappop(pending)
+        start, end = parent_ptr[index], parent_ptr[index + 1]
+        if end > start:
+            total = outflows[parent_index[start]] * parent_weight[start]
+            for edge in range(start + 1, end):
+                total += outflows[parent_index[edge]] * parent_weight[edge]
+
+            inflow = total + rates[index]
+        else:
+            inflow = rates[index]
+
+        quantity = min(inflow, 0.0 if full[index] else numpy.inf)
+        inflows[index] = quantity
+        totals[index] = inflow
+        outflow = inflow - quantity
+        if outflow == outflows[index]:
+            continue
+
+        outflows[index] = outflow
+        children = child_index[child_ptr[index] : child_ptr[index + 1]]
+        for child in children.tolist():
+            if child not in queued:
+                queued.add(child)
+                heapq.heappush(pending, child)
+
+
+class NumpyEngine:
+    """
+    Numpy Engine
+
+    This class represents an engine that fills a tower one level at a
+    time, with vectorised numpy operations (see `Topology.fill`).
+    """
+
+    name = "numpy"
+    available = True
+
+    def fill(
+        self, topology, capacities, pours, weights=None, flows=False, control=None
+    ):
+        """
+        Pour liquid over the glasses.
+
+        Args:
+            topology (Topology): Layout of the tower.
+            capacities (numpy.ndarray): Capacity of each glass
+                (millilitres)
+            pours (numpy.ndarray): Liquid poured directly into each
+                glass (millilitres)
+            weights (numpy.ndarray, optional): Fraction of the parent's
+                overflow passed along each edge (in the order of
+                `topology.edges`). Defaults to the weights of the
+                topology.
+            flows (bool): If true, also return the liquid that flowed
+                into and out of each glass (recorded in the same pass)
+            control (Control, optional): Used to cancel the fill and
+                report its progress (one row per level). If cancelled,
+                the glasses below the completed levels are left empty.
+
+        Returns:
+            tuple: (quantities, overflow) where `quantities` is the
+                liquid in each glass and `overflow` is the liquid that
+                spilled out of the tower (millilitres). If `flows` is
+                true, the liquid that flowed into and out of each glass
+                (millilitres) follow.
+        """
+        return topology.fill(
+            capacities, pours, weights=weights, flows=flows, control=control
+        )
+
+    def get_breakpoints(self, topology, capacities, rates, control=None):
+        """
+        Find when each glass becomes wet and full during a continuous pour.
+
+        Args:
+            topology (Topology): Layout of the tower.
+            capacities (numpy.ndarray): Capacity of each glass
+                (millilitres)
+            rates (numpy.ndarray): Rate that liquid is poured into each
+                glass (millilitres per second)
+            control (Control, optional): Used to cancel the search and
+                report its progress (the number of levels that are
+                completely full). If cancelled, only the times of the
+                completed levels are final.
+
+        Returns:
+            tuple: (wet, full) where `wet` and `full` are the times
+                (seconds) at which each glass becomes wet and full
+                (inf if never).
+        """
+        capacities = numpy.asarray(capacities, dtype=float)
+        rates = numpy.asarray(rates, dtype=float)
+        wet = numpy.full(len(topology), numpy.inf)
+        full = numpy.full(len(topology), numpy.inf)
+        if control is not None:
+            control.start(topology.level_count)
+
+        for start, end, _, inflows, _, _, filled in iter_events(
+            topology,
+            capacities,
+            rates,
+            fill=lambda *args, **kwargs: self.fill(topology, *args, **kwargs),
+        ):
+            wet[inflows > 0] = numpy.minimum(wet[inflows > 0], start)
+            full[filled] = end
+            if control is not None:
+                rows = _count_full_levels(topology, full < numpy.inf)
+                if not control.update(rows):
+                    return wet, full
+
+        if control is not None:
+            control.update(topology.level_count)
+
+        return wet, full
+
+
+class KernelEngine:
+    """
+    Kernel Engine
+
+    This class represents an engine that fills a tower one glass at a
+    time, with the loop kernels in `moet.kernels`. The kernels can be
+    compiled (e.g. by numba) when the engine is first used.
+    """
+
+    def __init__(self, name, compile=None, requires=None):
+        """
+        Initialize kernel engine.
+
+        Args:
+            name (str): Name of the engine.
+            compile (callable, optional): Function used to compile each
+                kernel (by default the kernels are interpreted)
+            requires (str, optional): Module required by the engine.
+        """
+        self.name = name
+        self.requires = requires
+        self._compile = compile
+        self._kernels = None
+
+    @property
+    def available(self):
+        """
+        Check if the engine can be used.
+
+        bool: True if the required module is installed.
+        """
+        return self.requires is None or bool(importlib.util.find_spec(self.requires))
+
+    @property
+    def kernels(self):
+        """
+        Get the (compiled) kernels.
+
+        tuple: (fill_kernel, breakpoints_kernel)
+        """
+        if self._kernels is None:
+            from . import kernels
+
+            functions = (kernels.fill_kernel, kernels.breakpoints_kernel)
+            if self._compile is not None:
+                functions = tuple(self._compile(function) for function in functions)
+
+            self._kernels = functions
+
+        return self._kernels
+
+    def fill(
+        self, topology, capacities, pours, weights=None, flows=False, control=None
+    ):
+        """
+        Pour liquid over the glasses.
+
+        Args:
+            topology (Topology): Layout of the tower.
+            capacities (numpy.ndarray): Capacity of each glass
+                (millilitres)
+            pours (numpy.ndarray): Liquid poured directly into each
+                glass (millilitres)
+            weights (numpy.ndarray, optional): Fraction of the parent's
+                overflow passed along each edge (in the order of
+                `topology.edges`). Defaults to the weights of the
+                topology.
+            flows (bool): If true, also return the liquid that flowed
+                into and out of each glass (recorded in the same pass)
+            control (Control, optional): Used to cancel the fill and
+                report its progress (one row per level). If cancelled,
+                the glasses below the completed levels are left empty.
+
+        Returns:
+            tuple: (quantities, overflow) where `quantities` is the
+                liquid in each glass and `overflow` is the liquid that
+                spilled out of the tower (millilitres). If `flows` is
+                true, the liquid that flowed into and out of each glass
+                (millilitres) follow.
+        """
+        capacities = numpy.asarray(capacities, dtype=float)
+        pours = numpy.asarray(pours, dtype=float)
+        weights, spill = topology.get_parent_weights(weights)
+        shape = numpy.broadcast(capacities, pours, spill).shape
+
+        # The kernels always work on a batch (one row per tower).
+        rows = int(numpy.prod(shape[:-1]))
+        edges = shape[:-1] + (topology.edge_count,)
+        weights = _as_rows(weights, edges, rows)
+        capacities = _as_rows(capacities, shape, rows)
+        pours = _as_rows(pours, shape, rows)
+        quantities = numpy.zeros((rows, len(topology)))
+        inflow = numpy.zeros((rows, len(topology)))
+        outflow = numpy.zeros((rows, len(topology)))
+        fill_kernel, _ = self.kernels
+        for first, last in iter_chunks(topology.level_count, control):
+            fill_kernel(
+                topology.parent_ptr,
+                topology.parent_index,
+                weights,
+                capacities,
+                pours,
+                quantities,
+                inflow,
+                outflow,
+                topology.level_ptr[first],
+                topology.level_ptr[last],
+            )
+
+        quantities = quantities.reshape(shape)
+        outflow = outflow.reshape(shape)
+        overflow = topology.get_overflow(outflow, spill)
+        if flows:
+            return quantities, overflow, inflow.reshape(shape), outflow
+
+        return quantities, overflow
+
+    def get_breakpoints(self, topology, capacities, rates, control=None):
+        """
+        Find when each glass becomes wet and full during a continuous pour.
+
+        Args:
+            topology (Topology): Layout of the tower.
+            capacities (numpy.ndarray): Capacity of each glass
+                (millilitres)
+            rates (numpy.ndarray): Rate that liquid is poured into each
+                glass (millilitres per second)
+            control (Control, optional): Used to cancel the search and
+                report its progress (the number of levels that are
+                completely full). If cancelled, only the times of the
+                completed levels are final.
+
+        Returns:
+            tuple: (wet, full) where `wet` and `full` are the times
+                (seconds) at which each glass becomes wet and full
+                (inf if never).
+        """
+        count = len(topology)
+        wet = numpy.full(count, numpy.inf)
+        full = numpy.full(count, numpy.inf)
+        quantities = numpy.zeros(count)
+        is_full = numpy.zeros(count, dtype=bool)
+        if control is not None:
+            control.start(topology.level_count)
+
+        # Without a control every event is processed in one go,
+        # otherwise the control is checked every `control.every` events.
+        events = -1 if control is None else control.every
+        capacities = numpy.asarray(capacities, dtype=float)
+        rates = numpy.asarray(rates, dtype=float)
+        _, breakpoints_kernel = self.kernels
+        time = 0.0
+        while time >= 0:
+            time = breakpoints_kernel(
+                topology.parent_ptr,
+                topology.parent_index,
+                topology.parent_weight,
+                capacities,
+                rates,
+                wet,
+                full,
+                quantities,
+                is_full,
+                time,
+                events,
+            )
+            if control is not None and time >= 0:
+                if not control.update(_count_full_levels(topology, is_full)):
+                    return wet, full
+
+        if control is not None:
+            control.update(topology.level_count)
+
+        return wet, full
+
+
+def _count_full_levels(topology, is_full):
+    """
+    Count the levels at the top of a tower whose glasses are all full.
+
+    Args:
+        topology (Topology): Layout of the tower.
+        is_full (numpy.ndarray): Whether each glass is full.
+
+    Returns:
+        int: Number of levels.
+    """
+    if not len(is_full):
+        return 0
+
+    full = numpy.logical_and.reduceat(is_full, topology.level_ptr[:-1])
+    return len(full) if full.all() else int(numpy.argmin(full))
+
+
+def _as_rows(array, shape, rows):
+    """
+    Broadcast the given array to a batch of rows.
+
+    Args:
+        array (numpy.ndarray): The array.
+        shape (tuple): Shape to broadcast to.
+        rows (int): Number of rows in the batch.
+
+    Returns:
+        numpy.ndarray: Contiguous array (rows x values)
+    """
+    array = numpy.broadcast_to(array, shape).reshape(rows, shape[-1])
+    return numpy.ascontiguousarray(array)
+
+
+def _jit(function):
+    """
+    Compile the given kernel with numba.
+
+    Args:
+        function (callable): The kernel.
+
+    Returns:
+        callable: The compiled kernel.
+    """
+    import numba
+
+    return numba.njit(cache=True)(function)
+
+
+register_engine(NumpyEngine())
+register_engine(KernelEngine("python"))
+register_engine(KernelEngine("numba", compile=_jit, requires="numba"))
@@ -0,0 +1,160 @@
+"""
+Ensemble
+
+This module contains functions and classes used to pour liquid over
+many randomised copies of a tower at once. Real pours don't split
+overflow exactly as planned, so each trial jitters the split ratios
+of every glass. All the trials are filled in a single vectorised
+pass (with one row per trial) and summarised per glass.
+"""
+
+import numpy
+
+
+def create_ensemble(
+    topology,
+    capacities,
+    pours,
+    trials=1000,
+    spread=0.1,
+    seed=None,
+    engine=None,
+    control=None,
+):
+    """
+    Fill randomised copies of a tower and summarise the results.
+
+    For each trial, the weight of every edge is scaled by a random
+    factor between `1 - spread` and `1 + spread`, then the weights of
+    each glass are rescaled so they add up to the same total as
+    before (i.e. the same fraction of the overflow is passed on).
+
+    Args:
+        topology (Topology): Layout of the tower.
+        capacities (numpy.ndarray): Capacity of each glass (millilitres)
+        pours (numpy.ndarray): Liquid poured directly into each glass
+            (millilitres)
+        trials (int): Number of trials.
+        spread (float): How much the split ratios vary (between 0 and 1)
+        seed (int, optional): Seed for the random number generator.
+        engine (Engine, optional): Engine used to fill the trials
+            (defaults to numpy)
+        control (Control, optional): Used to cancel the trials and
+            report their progress (see `moet.Control`)
+
+    Returns:
+        Ensemble: The results of the trials.
+    """
+    if trials < 1:
+        raise ValueError(f"Invalid number of trials. Got {trials}, expected 1 or more")
+
+    if not 0 <= spread <= 1:
+        raise ValueError(f"Invalid spread. Got {spread}, expected value from 0 to 1")
+
+    random = numpy.random.RandomState(seed)
+    weights = get_random_weights(topology, trials, spread, random)
+    if engine is None:
+        quantities, overflow = topology.fill(
+            capacities, pours, weights=weights, control=control
+        )
+    else:
+        quantities, overflow = engine.fill(
+            topology, capacities, pours, weights=weights, control=control
+        )
+
+    return Ensemble(quantities, overflow)
+
+
+def get_random_weights(topology, trials, spread, random):
+    """
+    Get randomised edge weights for each trial.
+
+    Args:
+        topology (Topology): Layout of the tower.
+        trials (int): Number of trials.
+        spread (float): How much the split ratios vary (between 0 and 1)
+        random (numpy.random.RandomState): Random number generator.
+
+    Returns:
+        numpy.ndarray: Weights (trials x edges, in the order of
+            `topology.edges`)
+    """
+    weights = topology.child_weight
+    noise = random.uniform(1.0 - spread, 1.0 + spread, (trials, len(weights)))
+    jittered = weights * noise
+
+    # Edges are grouped by parent, so each parent's total is a sum
+    # over a contiguous slice.
+    starts = topology.child_ptr[:-1][numpy.diff(topology.child_ptr) > 0]
+    if not len(starts):
+        return jittered
+
+    counts = numpy.diff(numpy.append(starts, len(weights)))
+    totals = numpy.add.reduceat(weights, starts)
+    jittered_totals = numpy.add.reduceat(jittered, starts, axis=1)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        scale = numpy.where(jittered_totals > 0, totals / jittered_totals, 0.0)
+
+    return jittered * numpy.repeat(scale, counts, axis=1)
+
+
+class Ensemble:
+    """
+    Ensemble
+
+    This class represents the results of pouring liquid over many
+    randomised copies of a tower. Per glass results are in the same
+    order as the glasses in the tower.
+    """
+
+    def __init__(self, quantities, overflow):
+        """
+        Initialize ensemble.
+
+        Args:
+            quantities (numpy.ndarray): Liquid in each glass for each
+                trial (trials x glasses, millilitres)
+            overflow (numpy.ndarray): Overflow for each trial
+                (millilitres)
+        """
+        self.quantities = quantities
+        self.overflow = overflow
+
+    def __len__(self):
+        """
+        Get the number of trials.
+
+        Returns:
+            int: Number of trials.
+        """
+        return len(self.quantities)
+
+    @property
+    def mean(self):
+        """
+        Get the mean quantity of liquid in each glass.
+
+        numpy.ndarray: Mean quantity per glass (millilitres)
+        """
+        return self.quantities.mean(axis=0)
+
+    @property
+    def variance(self):
+        """
+        Get the variance of the quantity of liquid in each glass.
+
+        numpy.ndarray: Variance per glass (square millilitres)
+        """
+        return self.quantities.var(axis=0)
+
+    def get_quantiles(self, quantiles=(0.05, 0.5, 0.95)):
+        """
+        Get quantiles of the quantity of liquid in each glass.
+
+        Args:
+            quantiles (list of float): Quantiles (between 0 and 1)
+
+        Returns:
+            numpy.ndarray: Quantiles per glass (quantiles x glasses)
+        """
+        return numpy.quantile(self.quantities, quantiles, axis=0)
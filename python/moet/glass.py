@@ -5,7 +5,11 @@ This module contains functions and classes related to the glasses
 that form a tower of glasses.
 """
 
-import inspect
+from . import utils
+
+
+# Capacity of a new glass (millilitres)
+CAPACITY = 250.0
 
 
 def create_glass(uid):
@@ -22,13 +26,83 @@ def create_glass(uid):
     return glass
 
 
+def create_glasses(count, uids=None):
+    """
+    Create many glasses at once.
+
+    This is much faster than calling `create_glass` for each glass
+    (e.g. when creating the glasses of a large tower).
+
+    Args:
+        count (int): Number of glasses.
+        uids (list of str, optional): A unique identifier for each
+            glass. Defaults to the IDs of the first `count` glasses in
+            a tower (see `moet.utils.get_ids`)
+
+    Returns:
+        list of Glass: New glasses.
+    """
+    if uids is None:
+        uids = utils.get_ids(count)
+    elif len(uids) != count:
+        raise ValueError(f"Invalid IDs. Expected one ID per glass ({count})")
+
+    new = Glass.__new__
+    glasses = [new(Glass) for _ in range(count)]
+    for glass, uid in zip(glasses, uids):
+        glass.uid = uid
+        glass.position = None
+        glass._capacity = CAPACITY
+        glass._quantity = 0.0
+        glass._tower = None
+
+    return glasses
+
+
+def set_state(glasses, positions=None, capacities=None, quantities=None):
+    """
+    Set the position, capacity and/or quantity of many glasses at once.
+
+    Unlike the `capacity` and `quantity` setters, this doesn't validate
+    the values. It is used to write back state that was already
+    checked (e.g. by a fill engine, or when the tower was created), and
+    must not be given values from anywhere else.
+
+    Args:
+        glasses (list of Glass): The glasses.
+        positions (list of tuple, optional): Position of each glass.
+        capacities (list of float, optional): Capacity of each glass
+            (millilitres)
+        quantities (list of float, optional): Liquid in each glass
+            (millilitres)
+    """
+    if positions is not None:
+        for glass, position in zip(glasses, positions):
+            glass.position = position
+
+    if capacities is not None:
+        for glass, capacity in zip(glasses, capacities):
+            glass._capacity = capacity
+
+    if quantities is not None:
+        for glass, quantity in zip(glasses, quantities):
+            glass._quantity = quantity
+
+
 class Glass:
     """
     Glass.
 
-    The `glass` object represents a glass.
+    The `glass` object represents a glass. Glasses have no `__dict__`
+    (see `__slots__`), as large towers hold millions of them.
+
+    Glasses in a tower refer back to it, so that changing the capacity
+    of a glass after the tower was filled refills the glasses below it
+    (see `Tower.fill`)
     """
 
+    __slots__ = ("uid", "position", "_capacity", "_quantity", "_tower")
+
     def __init__(self, uid):
         """
         Initialize glass with the given code.
@@ -38,8 +112,9 @@ class Glass:
         """
         self.uid = uid
         self.position = None
-        self._capacity = 250.0
+        self._capacity = CAPACITY
         self._quantity = 0.0
+        self._tower = None
 
     def __repr__(self):
         """
@@ -48,8 +123,8 @@ class Glass:
         Returns:
              str: Object representation.
         """
-        mod = inspect.getmodule(self).__name__
-        cls = self.__class__.__name__
+        mod = type(self).__module__
+        cls = type(self).__name__
         address = hex(id(self))
         return f"<{mod}.{cls}(uid={self.uid}, pos={self.position}) at {address}>"
 
@@ -78,6 +153,8 @@ class Glass:
             raise ValueError(msg)
 
         self._capacity = value
+        if self._tower is not None:
+            self._tower._mark_dirty(self)
 
     @property
     def quantity(self):
@@ -86,6 +163,9 @@ class Glass:
 
         int or float: The amount of liquid in the glass (millilitres)
         """
+        if self._tower is not None and self._tower._dirty:
+            self._tower._recompute()
+
         return self._quantity
 
     @quantity.setter
@@ -111,10 +191,14 @@ class Glass:
         """
         overflow = 0.0
 
-        value = self.quantity + liquid_in_millilitres
-        if value > self.capacity:
-            self.quantity = self.capacity
-            overflow = float(value - self.capacity)
+        # The quantity is only validated (by its setter) if it could be
+        # invalid, i.e. if liquid was taken out of the glass.
+        value = self._quantity + liquid_in_millilitres
+        if value > self._capacity:
+            self._quantity = self._capacity
+            overflow = float(value - self._capacity)
+        elif liquid_in_millilitres >= 0:
+            self._quantity = value
         else:
             self.quantity = value
 
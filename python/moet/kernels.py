@@ -0,0 +1,162 @@
+"""
+Kernels
+
+This module contains the loop kernels used by the "python" and
+"numba" fill engines. They are plain Python functions written in the
+subset of Python that numba can compile, and operate on the arrays of
+a compiled `Topology` (glasses in schedule order, parents in CSR form).
+Running them interpreted or compiled gives bit-identical results.
+"""
+
+import math
+
+
+def fill_kernel(
+    parent_ptr,
+    parent_index,
+    parent_weight,
+    capacities,
+    pours,
+    quantities,
+    inflows,
+    outflow,
+    first,
+    last,
+):
+    """
+    Pour liquid over a batch of towers, one glass at a time.
+
+    Every glass comes after its parents, so the liquid flowing into a
+    glass is known by the time it is reached. Only the glasses from
+    `first` to `last` are filled, so a fill can be split into chunks
+    (each chunk after the chunks holding its parents).
+
+    Args:
+        parent_ptr (numpy.ndarray): Start of each glass's parents.
+        parent_index (numpy.ndarray): Parent glass numbers.
+        parent_weight (numpy.ndarray): Weight of each parent edge
+            (batch x edges)
+        capacities (numpy.ndarray): Capacity of each glass
+            (batch x glasses)
+        pours (numpy.ndarray): Liquid poured directly into each glass
+            (batch x glasses)
+        quantities (numpy.ndarray): Output liquid in each glass
+            (batch x glasses)
+        inflows (numpy.ndarray): Output liquid that flowed into each
+            glass (batch x glasses)
+        outflow (numpy.ndarray): Output overflow from each glass
+            (batch x glasses)
+        first (int): First glass to fill.
+        last (int): Glass after the last glass to fill.
+    """
+    batch = capacities.shape[0]
+    for row in range(batch):
+        for index in range(first, last):
+            start = parent_ptr[index]
+            end = parent_ptr[index + 1]
+            if end > start:
+                total = outflow[row, parent_index[start]] * parent_weight[row, start]
+                for edge in range(start + 1, end):
+                    total += outflow[row, parent_index[edge]] * parent_weight[row, edge]
+
+                inflow = total + pours[row, index]
+            else:
+                inflow = pours[row, index]
+
+            quantity = min(inflow, capacities[row, index])
+            quantities[row, index] = quantity
+            inflows[row, index] = inflow
+            outflow[row, index] = inflow - quantity
+
+
+def breakpoints_kernel(
+    parent_ptr,
+    parent_index,
+    parent_weight,
+    capacities,
+    rates,
+    wet,
+    full,
+    quantities,
+    is_full,
+    time,
+    events,
+):
+    """
+    Find when each glass becomes wet and full during a continuous pour.
+
+    The pour jumps from one event (a glass becoming full) to the next.
+    Between events, full glasses pass on everything that flows into
+    them and the others keep it all. The state of the pour is kept in
+    the given arrays, so the pour can be stopped after a number of
+    events and resumed later.
+
+    Args:
+        parent_ptr (numpy.ndarray): Start of each glass's parents.
+        parent_index (numpy.ndarray): Parent glass numbers.
+        parent_weight (numpy.ndarray): Weight of each parent edge.
+        capacities (numpy.ndarray): Capacity of each glass (millilitres)
+        rates (numpy.ndarray): Rate liquid is poured into each glass
+            (millilitres per second)
+        wet (numpy.ndarray): Time each glass becomes wet (inf if
+            never, or not yet known)
+        full (numpy.ndarray): Time each glass becomes full (inf if
+            never, or not yet known)
+        quantities (numpy.ndarray): Liquid in each glass.
+        is_full (numpy.ndarray): Whether each glass is full.
+        time (float): Time of the pour (seconds)
+        events (int): Maximum number of events to process (or -1 to
+            process every event)
+
+    Returns:
+        float: Time the pour reached, or -1 once every event has been
+            processed.
+    """
+    count = len(capacities)
+    absorbed = capacities * 0.0
+    passed = capacities * 0.0
+    while events != 0:
+        events -= 1
+        for index in range(count):
+            start = parent_ptr[index]
+            end = parent_ptr[index + 1]
+            if end > start:
+                total = passed[parent_index[start]] * parent_weight[start]
+                for edge in range(start + 1, end):
+                    total += passed[parent_index[edge]] * parent_weight[edge]
+
+                inflow = total + rates[index]
+            else:
+                inflow = rates[index]
+
+            if is_full[index]:
+                absorbed[index] = 0.0
+                passed[index] = inflow
+            else:
+                absorbed[index] = inflow
+                passed[index] = 0.0
+
+        step = math.inf
+        for index in range(count):
+            if absorbed[index] > 0:
+                remaining = (capacities[index] - quantities[index]) / absorbed[index]
+                step = min(step, remaining)
+
+        if step == math.inf:
+            return -1.0
+
+        end_time = time + step
+        for index in range(count):
+            if absorbed[index] > 0:
+                wet[index] = min(wet[index], time)
+                remaining = (capacities[index] - quantities[index]) / absorbed[index]
+                if abs(remaining - step) <= 1e-12 + 1e-9 * abs(step):
+                    quantities[index] = capacities[index]
+                    is_full[index] = True
+                    full[index] = end_time
+                else:
+                    quantities[index] = quantities[index] + absorbed[index] * step
+
+        time = end_time
+
+    return time
@@ -0,0 +1,205 @@
+"""
+Profiling
+
+This module contains the `Profile` class, used to find out where the
+time goes when working with a tower: how long it took to build, fill
+and look up glasses in it, how many times each of those was done and
+how many glasses were filled or created along the way. For example:
+
+    profile = moet.Profile()
+    tower = moet.create_tower(rows=100, profile=profile)
+    tower.fill(10000)
+    print(profile.format())
+
+Profiling is off by default. A tower is only instrumented while it has
+a profile (see `Tower.profile`): its instrumented methods are wrapped
+on the instance itself, so towers without a profile call the methods
+directly and pay nothing for it.
+"""
+
+import collections
+import contextlib
+import functools
+import inspect
+import time
+
+
+class Profile:
+    """
+    Profile
+
+    This class holds the counters and timings recorded while profiling.
+    Timings are inclusive (e.g. the time to fill a tower includes the
+    time to create its glasses, if that happened during the fill)
+
+    Attributes:
+        calls (collections.Counter): Number of calls, by name.
+        timings (dict): Total time (seconds), by name.
+        counters (collections.Counter): Other counts (e.g. the number
+            of glasses filled), by name.
+    """
+
+    def __init__(self):
+        """Initialize profile"""
+        self.calls = collections.Counter()
+        self.timings = collections.defaultdict(float)
+        self.counters = collections.Counter()
+
+    def __repr__(self):
+        """
+        Get the string representation of the profile.
+
+        Returns:
+            str: String representation.
+        """
+        total = sum(self.calls.values())
+        return f"Profile(calls={total}, seconds={sum(self.timings.values()):.6f})"
+
+    def record(self, name, seconds):
+        """
+        Record a call and the time it took.
+
+        Args:
+            name (str): Name of what was called.
+            seconds (float): Time taken (seconds)
+        """
+        self.calls[name] += 1
+        self.timings[name] += seconds
+
+    def count(self, name, value=1):
+        """
+        Add to a counter.
+
+        Args:
+            name (str): Name of the counter.
+            value (int): Amount to add.
+        """
+        self.counters[name] += value
+
+    @contextlib.contextmanager
+    def time(self, name):
+        """
+        Time the code run in this context, and record it as a call.
+
+        Args:
+            name (str): Name of the call.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def reset(self):
+        """
+        Clear all the counters and timings.
+        """
+        self.calls.clear()
+        self.timings.clear()
+        self.counters.clear()
+
+    def as_dict(self):
+        """
+        Get the counters and timings.
+
+        Returns:
+            dict: The number of calls, the total time of the calls
+                (seconds) and the other counters, by name.
+        """
+        return {
+            "calls": dict(self.calls),
+            "timings": dict(self.timings),
+            "counters": dict(self.counters),
+        }
+
+    def format(self):
+        """
+        Format the counters and timings as a table.
+
+        Calls are listed from the slowest to the fastest (in total).
+
+        Returns:
+            str: Formatted profile.
+        """
+        names = sorted(self.calls, key=lambda name: -self.timings[name])
+        width = max([len(name) for name in [*names, *self.counters]] + [4])
+        lines = [f"{'name':<{width}} {'calls':>8} {'total (ms)':>12} {'mean (ms)':>12}"]
+        for name in names:
+            calls = self.calls[name]
+            total = self.timings[name] * 1000
+            lines.append(
+                f"{name:<{width}} {calls:>8} {total:>12.3f} {total / calls:>12.3f}"
+            )
+
+        if self.counters:
+            lines.append("")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<{width}} {value:>8}")
+
+        return "\n".join(lines)
+
+
+def measure(profile, name):
+    """
+    Time the code run in a context, if there is a profile.
+
+    Args:
+        profile (Profile, optional): The profile.
+        name (str): Name of the call.
+
+    Returns:
+        contextmanager: Context that times the code (see
+            `Profile.time`), or does nothing without a profile.
+    """
+    if profile is None:
+        return contextlib.nullcontext()
+
+    return profile.time(name)
+
+
+def instrument(profile, name, method):
+    """
+    Wrap a method so each call to it is recorded in the profile.
+
+    Generators are timed while they produce each item (not while the
+    caller uses the item) and recorded as a single call.
+
+    Args:
+        profile (Profile): The profile.
+        name (str): Name of the call.
+        method (callable): The method.
+
+    Returns:
+        callable: The wrapped method.
+    """
+    if inspect.isgeneratorfunction(method):
+
+        @functools.wraps(method)
+        def generator(*args, **kwargs):
+            elapsed = 0.0
+            iterator = method(*args, **kwargs)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - start
+
+                    yield item
+            finally:
+                profile.record(name, elapsed)
+
+        return generator
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profile.record(name, time.perf_counter() - start)
+
+    return wrapper
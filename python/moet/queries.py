@@ -0,0 +1,194 @@
+"""
+Queries
+
+This module contains the functions used to find glasses by how full
+they are (see `Tower.get_full` and `Tower.get_fullest`), given the
+liquid in each glass.
+
+When liquid is poured into the top most glass of a triangular tower
+whose glasses are all the same size (and split their overflow evenly),
+the liquid in each row is symmetric and unimodal: it never decreases
+from either end of the row to its centre. So, the glasses in a row
+that hold at least a given amount of liquid are a contiguous run
+around the centre, which can be found with a binary search of the
+left half of the row (all the rows are searched at once, so a query
+takes O(log width) vectorised steps over the rows). These queries take
+the offset of the first glass in each row (`rows`) to use that
+structure, or scan every glass without it.
+"""
+
+import heapq
+
+import numpy
+
+from .topology import _get_ranges
+
+
+def count_at_least(quantities, threshold, rows=None):
+    """
+    Count the glasses that hold at least the given amount of liquid.
+
+    Args:
+        quantities (numpy.ndarray): Liquid in each glass (millilitres)
+        threshold (float or numpy.ndarray): Amount of liquid
+            (millilitres), or one amount per glass (without `rows`)
+        rows (numpy.ndarray, optional): Offset of the first glass in
+            each row (and the number of glasses), if the liquid in each
+            row is unimodal. Otherwise, every glass is checked.
+
+    Returns:
+        int: Number of glasses.
+    """
+    if rows is None:
+        return int(numpy.count_nonzero(quantities >= threshold))
+
+    starts, ends, firsts = _get_runs(quantities, threshold, rows)
+    return int(numpy.sum(ends - starts - 2 * (firsts - starts)))
+
+
+def get_at_least(quantities, threshold, rows=None):
+    """
+    Get the glasses that hold at least the given amount of liquid.
+
+    Args:
+        quantities (numpy.ndarray): Liquid in each glass (millilitres)
+        threshold (float or numpy.ndarray): Amount of liquid
+            (millilitres), or one amount per glass (without `rows`)
+        rows (numpy.ndarray, optional): Offset of the first glass in
+            each row, if the liquid in each row is unimodal (see
+            `count_at_least`)
+
+    Returns:
+        numpy.ndarray: Numbers of the glasses (in schedule order)
+    """
+    if rows is None:
+        return numpy.flatnonzero(quantities >= threshold)
+
+    starts, ends, firsts = _get_runs(quantities, threshold, rows)
+    return _get_ranges(firsts, ends - (firsts - starts))
+
+
+def get_fullest(quantities, count, rows=None):
+    """
+    Get the glasses that hold the most liquid.
+
+    Glasses that hold the same amount of liquid are taken in schedule
+    order, so the result is the same with or without `rows`.
+
+    With `rows`, the amount held by the last glass taken is found by
+    merging the rows from their centres outwards (so only about
+    `count` glasses are visited), then the rows are searched for the
+    glasses that hold more than that, and as many of the glasses that
+    hold exactly that as are needed.
+
+    Args:
+        quantities (numpy.ndarray): Liquid in each glass (millilitres)
+        count (int): Number of glasses.
+        rows (numpy.ndarray, optional): Offset of the first glass in
+            each row, if the liquid in each row is unimodal (see
+            `count_at_least`)
+
+    Returns:
+        numpy.ndarray: Numbers of the glasses, from the fullest to the
+            emptiest.
+    """
+    count = min(count, len(quantities))
+    if count <= 0:
+        return numpy.zeros(0, dtype=int)
+
+    if rows is None:
+        indices = numpy.arange(len(quantities))
+        return numpy.lexsort((indices, -quantities))[:count]
+
+    value = _get_nth_largest(quantities, count, rows)
+    starts, ends, firsts = _get_runs(quantities, value, rows)
+    above = _get_runs(quantities, value, rows, strict=True)
+    fuller = _get_ranges(above[2], above[1] - (above[2] - above[0]))
+
+    # The rest are the glasses holding exactly `value`, on either side
+    # of the glasses holding more (or the centre, if there are none),
+    # taken in schedule order.
+    middles = (starts + ends + 1) // 2
+    inners = middles.copy()
+    inners[numpy.isin(starts, above[0])] = above[2]
+    lower = numpy.stack([firsts, numpy.maximum(ends - (inners - starts), middles)])
+    upper = numpy.stack([inners, ends - (firsts - starts)])
+    equal = _get_ranges(lower.T.ravel(), upper.T.ravel())
+
+    indices = numpy.concatenate([fuller, equal[: count - len(fuller)]])
+    return indices[numpy.lexsort((indices, -quantities[indices]))]
+
+
+def _get_runs(quantities, threshold, rows, strict=False):
+    """
+    Find the run of glasses in each row that hold at least (or more
+    than) the given amount of liquid.
+
+    Each row is searched for the first glass in its left half that
+    holds enough liquid. All the rows are searched at once.
+
+    Args:
+        quantities (numpy.ndarray): Liquid in each glass (millilitres)
+        threshold (float): Amount of liquid (millilitres)
+        rows (numpy.ndarray): Offset of the first glass in each row.
+        strict (bool): If true, find the glasses that hold more than
+            the threshold.
+
+    Returns:
+        tuple: (starts, ends, firsts) of the rows with any such
+            glasses, where each row is glasses `start` to `end`
+            (exclusive) and its run is glasses `first` to
+            `end - (first - start)` (exclusive)
+    """
+    starts, ends = rows[:-1], rows[1:]
+    middles = (starts + ends + 1) // 2
+    low, high = starts.copy(), middles.copy()
+    while True:
+        active = low < high
+        if not active.any():
+            break
+
+        middle = (low + high) // 2
+        values = quantities.take(middle, mode="clip")
+        below = values <= threshold if strict else values < threshold
+        low = numpy.where(active & below, middle + 1, low)
+        high = numpy.where(active & ~below, middle, high)
+
+    found = low < middles
+    return starts[found], ends[found], low[found]
+
+
+def _get_nth_largest(quantities, count, rows):
+    """
+    Get the amount of liquid held by the n-th fullest glass.
+
+    Args:
+        quantities (numpy.ndarray): Liquid in each glass (millilitres)
+        count (int): Position of the glass (from 1)
+        rows (numpy.ndarray): Offset of the first glass in each row.
+
+    Returns:
+        float: Liquid (millilitres)
+    """
+    # Each entry is the next glass in the left half of a row (from the
+    # centre outwards), which stands for its mirror image as well.
+    starts, ends = rows[:-1], rows[1:]
+    centres = (starts + ends + 1) // 2 - 1
+    heap = list(
+        zip(
+            (-quantities[centres]).tolist(),
+            centres.tolist(),
+            starts.tolist(),
+            ends.tolist(),
+        )
+    )
+    heapq.heapify(heap)
+    seen = 0
+    while True:
+        value, index, start, end = heapq.heappop(heap)
+        seen += 1 if index == end - 1 - (index - start) else 2
+        if seen >= count:
+            return -value
+
+        if index > start:
+            heapq.heappush(heap, (-quantities[index - 1], index - 1, start, end))
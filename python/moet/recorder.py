@@ -0,0 +1,343 @@
+"""
+Recorder
+
+This module contains functions and classes used to record the
+quantity of liquid in each glass of a tower over the course of a
+pour. Recordings are stored as a (samples x glasses) array, which can
+be saved to (and loaded from) numpy's `.npy` and `.npz` formats.
+"""
+
+import os
+
+import numpy
+
+
+def record(tower, volumes=None, times=None, rate=None, path=None, chunk_size=4096):
+    """
+    Record the quantity of liquid in each glass during a pour.
+
+    Samples are either taken after pouring the given volumes of
+    liquid, or at the given times during a pour at a constant rate.
+    In both cases the tower is poured once, jumping from one event
+    (a glass becoming full) to the next and interpolating the samples
+    that fall in between, rather than filling the tower once for each
+    sample.
+
+    If a `.npy` path is given, the quantities are streamed to a
+    memory-mapped file in chunks (with the metadata in a `.meta.npz`
+    file next to it) so that large recordings don't have to fit in
+    memory. If a `.npz` path is given, the recording is saved to a
+    single compressed file once it is complete.
+
+    Args:
+        tower (Tower): The tower to pour liquid over.
+        volumes (list of float, optional): Volumes to sample at
+            (millilitres)
+        times (list of float, optional): Times to sample at (seconds)
+        rate (int or float, optional): Pour rate (millilitres per
+            second). Required when sampling at times.
+        path (str, optional): File to record to (.npy or .npz)
+        chunk_size (int): Number of samples to buffer before writing.
+
+    Returns:
+        Recording: The recording.
+    """
+    if (volumes is None) == (times is None):
+        raise ValueError("Expected either volumes or times to sample at")
+
+    if times is not None and rate is None:
+        raise ValueError("A pour rate is required to sample at times")
+
+    if volumes is not None:
+        kind, samples, rate = "volume", volumes, 1.0
+    else:
+        kind, samples = "time", times
+
+    samples = numpy.asarray(samples, dtype=float)
+    if samples.ndim != 1:
+        raise ValueError("Expected a flat sequence of samples")
+
+    if len(samples) and samples.min() < 0:
+        raise ValueError("Invalid samples. Expected values of 0 or above")
+
+    shape = (len(samples), tower.count)
+    memmap = path is not None and _get_extension(path) == ".npy"
+    if memmap:
+        quantities = numpy.lib.format.open_memmap(
+            path, mode="w+", dtype=float, shape=shape
+        )
+    else:
+        quantities = numpy.empty(shape, dtype=float)
+
+    overflow = numpy.empty(len(samples), dtype=float)
+    _sample(tower, rate, samples, quantities, overflow, chunk_size)
+
+    recording = Recording(
+        kind=kind,
+        samples=samples,
+        quantities=quantities,
+        overflow=overflow,
+        uids=tower._get_uids(),
+        positions=tower.topology.positions,
+        capacities=tower._get_capacities(),
+        rate=rate if kind == "time" else None,
+    )
+
+    if path is not None:
+        recording.save(path)
+
+    return recording
+
+
+def load_recording(path, mmap=True):
+    """
+    Load a recording.
+
+    Args:
+        path (str): Recording file (.npy or .npz)
+        mmap (bool): If true, memory-map the quantities of a `.npy`
+            recording rather than reading them into memory.
+
+    Returns:
+        Recording: The recording.
+    """
+    extension = _get_extension(path)
+    if extension == ".npy":
+        quantities = numpy.load(path, mmap_mode="r" if mmap else None)
+        data = numpy.load(_get_meta_path(path))
+    elif extension == ".npz":
+        data = numpy.load(path)
+        quantities = data["quantities"]
+    else:
+        raise ValueError(f"Unsupported file type. Got {path}, expected .npy or .npz")
+
+    rate = float(data["rate"])
+    return Recording(
+        kind=str(data["kind"]),
+        samples=data["samples"],
+        quantities=quantities,
+        overflow=data["overflow"],
+        uids=data["uids"].tolist(),
+        positions=[tuple(position) for position in data["positions"].tolist()],
+        capacities=data["capacities"],
+        rate=None if numpy.isnan(rate) else rate,
+    )
+
+
+class Recording:
+    """
+    Recording
+
+    This class represents the quantity of liquid in each glass of a
+    tower, sampled over the course of a pour.
+    """
+
+    def __init__(
+        self, kind, samples, quantities, overflow, uids, positions, capacities, rate
+    ):
+        """
+        Initialize recording.
+
+        Args:
+            kind (str): What the samples measure ("volume" or "time")
+            samples (numpy.ndarray): Volumes (millilitres) or times
+                (seconds) the quantities were sampled at.
+            quantities (numpy.ndarray): Liquid in each glass for each
+                sample (samples x glasses, millilitres)
+            overflow (numpy.ndarray): Overflow for each sample
+                (millilitres)
+            uids (list of str): Glass IDs (one per column)
+            positions (list of tuple): Glass positions (one per column)
+            capacities (list of float): Glass capacities (millilitres)
+            rate (float or None): Pour rate (millilitres per second)
+        """
+        self.kind = kind
+        self.samples = numpy.asarray(samples, dtype=float)
+        self.quantities = quantities
+        self.overflow = numpy.asarray(overflow, dtype=float)
+        self.uids = list(uids)
+        self.positions = list(positions)
+        self.capacities = numpy.asarray(capacities, dtype=float)
+        self.rate = rate
+
+    def __len__(self):
+        """
+        Get the number of samples.
+
+        Returns:
+            int: Number of samples.
+        """
+        return len(self.samples)
+
+    @property
+    def rows(self):
+        """
+        Get the number of rows in the recorded tower.
+
+        int: Number of rows.
+        """
+        return max((position[0] for position in self.positions), default=-1) + 1
+
+    def get_trajectory(self, uid):
+        """
+        Get the quantity of liquid in a glass for each sample.
+
+        Args:
+            uid (str): Glass ID.
+
+        Returns:
+            numpy.ndarray: Quantity for each sample (millilitres)
+        """
+        try:
+            column = self.uids.index(uid)
+        except ValueError:
+            raise ValueError(f"The glass {uid} is not in the recording.")
+
+        return self.quantities[:, column]
+
+    def save(self, path):
+        """
+        Save the recording.
+
+        Saving to a `.npy` file writes the quantities to that file and
+        the metadata to a `.meta.npz` file next to it. Saving to a
+        `.npz` file writes everything to a single compressed file.
+
+        Args:
+            path (str): Recording file (.npy or .npz)
+        """
+        meta = {
+            "kind": numpy.array(self.kind),
+            "samples": self.samples,
+            "overflow": self.overflow,
+            "uids": numpy.array(self.uids, dtype=str),
+            "positions": numpy.array(self.positions, dtype=int),
+            "capacities": self.capacities,
+            "rate": numpy.array(numpy.nan if self.rate is None else self.rate),
+        }
+
+        extension = _get_extension(path)
+        if extension == ".npy":
+            if not _is_memmap_of(self.quantities, path):
+                numpy.save(path, self.quantities)
+            else:
+                self.quantities.flush()
+
+            numpy.savez(_get_meta_path(path), **meta)
+        elif extension == ".npz":
+            numpy.savez_compressed(path, quantities=self.quantities, **meta)
+        else:
+            raise ValueError(
+                f"Unsupported file type. Got {path}, expected .npy or .npz"
+            )
+
+
+def iter_samples(tower, rate, times):
+    """
+    Iterate over the state of a tower during a pour.
+
+    The tower is poured at the given rate, jumping from one event (a
+    glass becoming full) to the next. The state at each of the given
+    times is interpolated from the event before it. The times are
+    consumed lazily, so they can be produced on the fly (e.g. from a
+    clock), but they must be in ascending order.
+
+    Args:
+        tower (Tower): The tower to pour liquid over.
+        rate (float): Pour rate (millilitres per second)
+        times (iterable of float): Ascending times to sample at (seconds)
+
+    Yields:
+        tuple: (time, quantities, overflow) where `quantities` is an
+            array of the liquid in each glass (millilitres)
+    """
+    capacities = tower._get_capacities()
+    events = tower._iter_events(tower._get_pours(rate))
+    start, end = 0.0, -numpy.inf
+    previous = -numpy.inf
+    for time in times:
+        if time < previous:
+            raise ValueError("Expected times in ascending order")
+
+        previous = time
+        while time > end:
+            start, end, base, inflows, base_overflow, overflow_rate, _ = next(events)
+
+        elapsed = time - start
+        quantities = numpy.minimum(base + inflows * elapsed, capacities)
+        yield time, quantities, base_overflow + overflow_rate * elapsed
+
+
+def _sample(tower, rate, samples, quantities, overflow, chunk_size):
+    """
+    Sample the quantity of liquid in each glass during a pour.
+
+    The samples are visited in ascending order while the tower is
+    poured at the given rate. Rows are gathered in a buffer and
+    written to `quantities` one chunk at a time.
+
+    Args:
+        tower (Tower): The tower to pour liquid over.
+        rate (float): Pour rate (millilitres per second)
+        samples (numpy.ndarray): Times to sample at (seconds)
+        quantities (numpy.ndarray): Output array (samples x glasses)
+        overflow (numpy.ndarray): Output overflow array (samples)
+        chunk_size (int): Number of samples to buffer before writing.
+    """
+    order = numpy.argsort(samples, kind="stable")
+    buffer = numpy.empty((max(1, min(chunk_size, len(samples))), tower.count))
+    written = 0
+    states = iter_samples(tower, rate, samples[order])
+    for count, (sample, (_, state, spilt)) in enumerate(zip(order, states)):
+        buffer[count - written] = state
+        overflow[sample] = spilt
+        if count + 1 - written == len(buffer):
+            quantities[order[written : count + 1]] = buffer
+            written = count + 1
+
+    if written < len(order):
+        quantities[order[written:]] = buffer[: len(order) - written]
+
+
+def _get_extension(path):
+    """
+    Get the extension of the given file path.
+
+    Args:
+        path (str): File path.
+
+    Returns:
+        str: Lowercase file extension (e.g. ".npy")
+    """
+    return os.path.splitext(os.fspath(path))[1].lower()
+
+
+def _get_meta_path(path):
+    """
+    Get the path of the metadata file for a `.npy` recording.
+
+    Args:
+        path (str): Recording file (.npy)
+
+    Returns:
+        str: Metadata file (.meta.npz)
+    """
+    return os.path.splitext(os.fspath(path))[0] + ".meta.npz"
+
+
+def _is_memmap_of(array, path):
+    """
+    Check if the given array is memory-mapped to the given file.
+
+    Args:
+        array (numpy.ndarray): Some array.
+        path (str): File path.
+
+    Returns:
+        bool: True if the array is backed by the file.
+    """
+    filename = getattr(array, "filename", None)
+    if filename is None:
+        return False
+
+    return os.path.abspath(filename) == os.path.abspath(os.fspath(path))
@@ -0,0 +1,567 @@
+"""
+Server
+
+This module contains a small HTTP/JSON server used to fill towers on
+request (see `moet serve`). It runs on asyncio and only listens on
+localhost. The following endpoints are available:
+
+    GET /health: Check that the server is running.
+    POST /fill: Fill a tower and get the liquid in each glass.
+    POST /breakdown: Fill a tower and stream the liquid in (and flowing
+        through) each glass as newline delimited JSON (NDJSON), one
+        glass per line, followed by the overflow.
+
+Both POST endpoints take a JSON query describing the tower and pour:
+
+    {
+        "rows": 4,                 # Number of rows (or layers)
+        "layout": "triangular",    # Layout (see `moet.tower.LAYOUTS`)
+        "capacity": 250,           # Capacity per tower, row or glass
+        "liquid": 3750,            # Liquid, or a mapping of glass ID
+                                   # to liquid (millilitres)
+        "engine": "auto",          # Fill engine (see `moet.engines`)
+        "timeout": 1.0             # Time limit (seconds, optional)
+    }
+
+Requests are cheap to serve repeatedly: the topology of each layout
+is cached and shared by every request for the same geometry (see
+`moet.tower.get_layout`), identical queries that arrive while one is
+being computed share a single computation, and large towers are
+filled in a pool of worker processes so the event loop never blocks.
+Whether a tower is large is worked out from its geometry, so the
+server process only builds (and caches) the topologies of the towers
+it fills itself. Towers are limited to `MAX_GLASSES` glasses, as
+building a topology can't be cancelled.
+"""
+
+import asyncio
+import concurrent.futures
+import http
+import json
+import multiprocessing
+
+from .glass import CAPACITY
+from . import utils
+
+
+HOST = "127.0.0.1"
+
+
+PORT = 8000
+
+
+# Towers with at least this many glasses are filled in a worker process.
+POOL_THRESHOLD = 100000
+
+
+# Largest tower (number of glasses) a query may ask for.
+MAX_GLASSES = 1000000
+
+
+# Number of glasses sent in each chunk of a streamed breakdown.
+CHUNK_SIZE = 1000
+
+
+# Largest request body accepted (bytes).
+MAX_BODY_SIZE = 1 << 20
+
+
+def serve(port=PORT, workers=None, threshold=POOL_THRESHOLD):
+    """
+    Run a server until it is interrupted.
+
+    Args:
+        port (int): Port to listen on (on localhost)
+        workers (int, optional): Number of worker processes (defaults
+            to the number of CPUs)
+        threshold (int): Number of glasses from which towers are filled
+            in a worker process.
+    """
+
+    async def run():
+        server = Server(workers=workers, threshold=threshold)
+        try:
+            listener = await server.start(port)
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            server.close()
+
+    asyncio.run(run())
+
+
+def get_query(data):
+    """
+    Get a query from the body of a request.
+
+    Args:
+        data (bytes): JSON body.
+
+    Returns:
+        dict: The query, with defaults for any missing options.
+    """
+    from .tower import LAYOUTS
+
+    try:
+        query = json.loads(data or b"{}")
+    except ValueError as error:
+        raise ValueError(f"Invalid JSON. {error}")
+
+    if not isinstance(query, dict):
+        raise ValueError("Invalid query. Expected a JSON object")
+
+    unknown = set(query) - {"rows", "layout", "capacity", "liquid", "engine", "timeout"}
+    if unknown:
+        raise ValueError(f"Invalid query. Got unknown options {sorted(unknown)}")
+
+    query = {
+        "rows": query.get("rows", 4),
+        "layout": query.get("layout", "triangular"),
+        "capacity": query.get("capacity", CAPACITY),
+        "liquid": query.get("liquid", 0),
+        "engine": query.get("engine", "auto"),
+        "timeout": query.get("timeout"),
+    }
+    if not isinstance(query["rows"], int) or query["rows"] < 1:
+        raise ValueError(f"Invalid rows. Got {query['rows']}, expected 1 or more")
+
+    liquid = query["liquid"]
+    if isinstance(liquid, dict):
+        amounts = liquid.values()
+    else:
+        amounts = [liquid]
+
+    if not all(_is_number(amount) for amount in amounts):
+        msg = (
+            f"Invalid liquid. Got {liquid!r}, expected a number or an object of "
+            "glass IDs to numbers"
+        )
+        raise ValueError(msg)
+
+    capacity = query["capacity"]
+    values = capacity if isinstance(capacity, list) else [capacity]
+    if not all(_is_number(value) for value in values):
+        msg = f"Invalid capacity. Got {capacity!r}, expected a number or a list"
+        raise ValueError(msg)
+
+    if not isinstance(query["engine"], str):
+        raise ValueError(f"Invalid engine. Got {query['engine']!r}, expected a name")
+
+    timeout = query["timeout"]
+    if timeout is not None and not (_is_number(timeout) and timeout >= 0):
+        msg = f"Invalid timeout. Got {timeout}, expected value of 0 or above"
+        raise ValueError(msg)
+
+    if query["layout"] not in LAYOUTS:
+        msg = f"Invalid layout. Got {query['layout']}, expected one of {list(LAYOUTS)}"
+        raise ValueError(msg)
+
+    if get_count(query["layout"], query["rows"]) > MAX_GLASSES:
+        msg = (
+            f"Invalid rows. Got {query['rows']}, which is more than "
+            f"{MAX_GLASSES} glasses for the {query['layout']} layout"
+        )
+        raise ValueError(msg)
+
+    return query
+
+
+def get_count(layout, rows):
+    """
+    Get the number of glasses in a preset layout, without building it.
+
+    Args:
+        layout (str): Name of the preset (see `moet.tower.LAYOUTS`)
+        rows (int): Size of the layout (e.g. number of rows)
+
+    Returns:
+        int: Number of glasses.
+    """
+    if layout == "pyramid":
+        return rows * (rows + 1) * (2 * rows + 1) // 6
+
+    return utils.get_triangular_value(rows)
+
+
+def get_positions(layout, rows, start, end):
+    """
+    Get the positions of a range of glasses in a preset layout, without
+    building it.
+
+    Args:
+        layout (str): Name of the preset (see `moet.tower.LAYOUTS`)
+        rows (int): Size of the layout (e.g. number of rows)
+        start (int): Number of the first glass.
+        end (int): Number of the glass after the last glass.
+
+    Returns:
+        list of list: Position of each glass.
+    """
+    import numpy
+
+    indices = numpy.arange(start, end)
+    if layout != "pyramid":
+        return numpy.stack(utils.get_positions(indices), axis=1).tolist()
+
+    # Layer k starts after the k x k, (k - 1) x (k - 1), ... layers above.
+    layers = numpy.arange(rows + 1)
+    starts = layers * (layers + 1) * (2 * layers + 1) // 6
+    levels = numpy.searchsorted(starts, indices, side="right") - 1
+    offsets = indices - starts[levels]
+    sizes = levels + 1
+    return numpy.stack([levels, offsets // sizes, offsets % sizes], axis=1).tolist()
+
+
+def fill(query):
+    """
+    Fill a tower for the given query.
+
+    This is run in a worker process for large towers, so it only takes
+    and returns plain (picklable) data.
+
+    Args:
+        query (dict): The query (see `get_query`)
+
+    Returns:
+        dict: The liquid in each glass ("quantities"), the liquid that
+            flowed into and out of each glass ("inflow" and "outflow"),
+            the overflow and the number of rows that were filled (all
+            of them, unless the timeout was reached)
+    """
+    from .control import Control
+    from .tower import Tower, get_capacities, get_layout
+
+    topology = get_layout(query["layout"], query["rows"])
+    capacities = get_capacities(query["capacity"], topology.levels, topology.positions)
+    tower = Tower.from_topology(topology, capacities=capacities)
+    tower.engine = query["engine"]
+
+    control = None
+    if query["timeout"] is not None:
+        every = max(1, topology.level_count // 100)
+        control = Control(timeout=query["timeout"], every=every)
+
+    overflow = tower.fill(query["liquid"], flows=True, control=control)
+    inflow, outflow = tower._flows
+    return {
+        "quantities": tower._get_quantities(),
+        "inflow": inflow,
+        "outflow": outflow,
+        "overflow": overflow,
+        "rows": topology.level_count if control is None else control.rows,
+        "total": topology.level_count,
+    }
+
+
+class Server:
+    """
+    Server
+
+    This class represents a server that fills towers on request.
+    Identical queries that are in progress at the same time are
+    computed once.
+    """
+
+    def __init__(self, workers=None, threshold=POOL_THRESHOLD):
+        """
+        Initialize server.
+
+        Args:
+            workers (int, optional): Number of worker processes
+                (defaults to the number of CPUs)
+            threshold (int): Number of glasses from which towers are
+                filled in a worker process.
+        """
+        self.workers = workers
+        self.threshold = threshold
+        self.computations = 0
+        self._pool = None
+        self._pending = {}
+
+    async def start(self, port=PORT):
+        """
+        Start listening for requests.
+
+        Args:
+            port (int): Port to listen on (0 for any free port)
+
+        Returns:
+            asyncio.Server: The listening server.
+        """
+        return await asyncio.start_server(self.handle, HOST, port)
+
+    def close(self):
+        """
+        Stop the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    async def fill(self, query):
+        """
+        Fill a tower for the given query.
+
+        If the same query is already being computed, its result is
+        shared rather than computed again.
+
+        Args:
+            query (dict): The query (see `get_query`)
+
+        Returns:
+            dict: The result (see `fill`)
+        """
+        key = json.dumps(query, sort_keys=True)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._compute(query))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+
+        return await asyncio.shield(pending)
+
+    async def _compute(self, query):
+        """
+        Fill a tower, in a worker process if it is large.
+
+        Args:
+            query (dict): The query (see `get_query`)
+
+        Returns:
+            dict: The result (see `fill`)
+        """
+        self.computations += 1
+        if get_count(query["layout"], query["rows"]) < self.threshold:
+            return fill(query)
+
+        if self._pool is None:
+            # Worker processes are spawned rather than forked, as forking
+            # a process with running threads (e.g. the event loop's
+            # executor) can deadlock.
+            context = multiprocessing.get_context("spawn")
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                self.workers, mp_context=context
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, fill, query)
+
+    async def handle(self, reader, writer):
+        """
+        Handle a connection (one request per connection).
+
+        Args:
+            reader (asyncio.StreamReader): Reads the request.
+            writer (asyncio.StreamWriter): Writes the response.
+        """
+        try:
+            method, path, body = await _read_request(reader)
+            if (method, path) == ("GET", "/health"):
+                health = {"status": "ok", "version": utils.get_version()}
+                _write_json(writer, 200, health)
+            elif path not in ["/fill", "/breakdown"]:
+                _write_json(writer, 404, {"error": f"Not found: {path}"})
+            elif method != "POST":
+                _write_json(writer, 405, {"error": f"Method not allowed: {method}"})
+            else:
+                query = get_query(body)
+                result = await self.fill(query)
+                if path == "/fill":
+                    _write_json(writer, 200, _get_summary(result))
+                else:
+                    await _write_breakdown(writer, query, result)
+        except ValueError as error:
+            _write_json(writer, 400, {"error": str(error)})
+        except _RequestError as error:
+            _write_json(writer, error.status, {"error": str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as error:
+            # Anything else is a bug, but the client still gets an answer.
+            _write_json(writer, 500, {"error": f"Internal error: {error!r}"})
+
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def _is_number(value):
+    """
+    Check whether a JSON value is a number.
+
+    Args:
+        value (object): JSON value.
+
+    Returns:
+        bool: True if the value is a number (but not a boolean)
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _RequestError(Exception):
+    """
+    Raised when a request can't be read.
+    """
+
+    def __init__(self, status, message):
+        """
+        Initialize error.
+
+        Args:
+            status (int): HTTP status code.
+            message (str): Error message.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+async def _read_request(reader):
+    """
+    Read an HTTP request.
+
+    Args:
+        reader (asyncio.StreamReader): Reads the request.
+
+    Returns:
+        tuple: (method, path, body)
+    """
+    line = await reader.readline()
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise _RequestError(400, "Invalid request line")
+
+    method, path, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in [b"\r\n", b"\n", b""]:
+            break
+
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise _RequestError(400, "Invalid Content-Length")
+
+    if length > MAX_BODY_SIZE:
+        raise _RequestError(413, f"Request body is larger than {MAX_BODY_SIZE} bytes")
+
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method, path.split("?")[0], body
+
+
+def _get_summary(result):
+    """
+    Get the JSON response for a fill.
+
+    Args:
+        result (dict): The result (see `fill`)
+
+    Returns:
+        dict: The liquid in each glass, the overflow and the number of
+            rows that were filled.
+    """
+    return {
+        "quantities": result["quantities"].tolist(),
+        "overflow": result["overflow"],
+        "rows": result["rows"],
+        "complete": result["rows"] == result["total"],
+    }
+
+
+def _write_head(writer, status, headers):
+    """
+    Write the status line and headers of a response.
+
+    Args:
+        writer (asyncio.StreamWriter): Writes the response.
+        status (int): HTTP status code.
+        headers (dict): Response headers.
+    """
+    lines = [f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append("Connection: close")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+
+def _write_json(writer, status, data):
+    """
+    Write a JSON response.
+
+    Args:
+        writer (asyncio.StreamWriter): Writes the response.
+        status (int): HTTP status code.
+        data (dict): Response data.
+    """
+    body = json.dumps(data).encode("utf-8")
+    headers = {"Content-Type": "application/json", "Content-Length": len(body)}
+    _write_head(writer, status, headers)
+    writer.write(body)
+
+
+async def _write_breakdown(writer, query, result):
+    """
+    Stream the breakdown of each glass as chunked NDJSON.
+
+    Each chunk holds up to `CHUNK_SIZE` glasses, and the writer is
+    drained after each chunk so a slow client doesn't buffer the whole
+    breakdown in memory.
+
+    Args:
+        writer (asyncio.StreamWriter): Writes the response.
+        query (dict): The query (see `get_query`)
+        result (dict): The result (see `fill`)
+    """
+    headers = {"Content-Type": "application/x-ndjson", "Transfer-Encoding": "chunked"}
+    _write_head(writer, 200, headers)
+
+    quantities = result["quantities"]
+    inflow = result["inflow"]
+    outflow = result["outflow"]
+    for start in range(0, len(quantities), CHUNK_SIZE):
+        end = min(start + CHUNK_SIZE, len(quantities))
+        lines = []
+        positions = get_positions(query["layout"], query["rows"], start, end)
+        for index, position, quantity, glass_inflow, glass_outflow in zip(
+            range(start, end),
+            positions,
+            quantities[start:end].tolist(),
+            inflow[start:end].tolist(),
+            outflow[start:end].tolist(),
+        ):
+            glass = {
+                "uid": utils.get_id(index),
+                "position": position,
+                "quantity": quantity,
+                "inflow": glass_inflow,
+                "outflow": glass_outflow,
+            }
+            lines.append(json.dumps(glass))
+
+        _write_chunk(writer, "\n".join(lines) + "\n")
+        await writer.drain()
+
+    summary = {
+        "overflow": result["overflow"],
+        "rows": result["rows"],
+        "complete": result["rows"] == result["total"],
+    }
+    _write_chunk(writer, json.dumps(summary) + "\n")
+    writer.write(b"0\r\n\r\n")
+
+
+def _write_chunk(writer, text):
+    """
+    Write a chunk of a chunked response.
+
+    Args:
+        writer (asyncio.StreamWriter): Writes the response.
+        text (str): Text of the chunk.
+    """
+    data = text.encode("utf-8")
+    writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
@@ -0,0 +1,195 @@
+"""
+Stats
+
+This module contains functions and classes used to summarise the
+state of a tower one row at a time (e.g. the liquid in each row, or
+the number of full glasses in each row). Row statistics are computed
+directly from the arrays of capacities and quantities, so they never
+create glasses, and can be streamed for towers that are never stored
+at all (see `iter_row_stats`).
+"""
+
+import numpy
+
+from .glass import CAPACITY
+from . import storage
+from . import utils
+
+
+class RowStats:
+    """
+    Statistics for each row of a tower.
+
+    Each attribute is an array with one value per row.
+
+    Attributes:
+        counts (numpy.ndarray): Number of glasses in each row.
+        capacities (numpy.ndarray): Total capacity of each row
+            (millilitres)
+        totals (numpy.ndarray): Total liquid in each row (millilitres)
+        full (numpy.ndarray): Number of full glasses in each row.
+        wet (numpy.ndarray): Number of glasses with any liquid in
+            each row.
+    """
+
+    def __init__(self, counts, capacities, totals, full, wet):
+        """
+        Initialize row statistics.
+
+        Args:
+            counts (numpy.ndarray): Number of glasses in each row.
+            capacities (numpy.ndarray): Total capacity of each row.
+            totals (numpy.ndarray): Total liquid in each row.
+            full (numpy.ndarray): Number of full glasses in each row.
+            wet (numpy.ndarray): Number of glasses with any liquid in
+                each row.
+        """
+        self.counts = counts
+        self.capacities = capacities
+        self.totals = totals
+        self.full = full
+        self.wet = wet
+
+    def __len__(self):
+        """
+        Get the number of rows.
+
+        Returns:
+            int: Number of rows.
+        """
+        return len(self.counts)
+
+    def __repr__(self):
+        """
+        Get the string representation of the row statistics.
+
+        Returns:
+            str: String representation.
+        """
+        return f"RowStats(rows={len(self)}, total={self.total})"
+
+    @classmethod
+    def concatenate(cls, stats):
+        """
+        Join the statistics of consecutive blocks of rows.
+
+        Args:
+            stats (list of RowStats): Statistics for each block, from
+                the top of the tower.
+
+        Returns:
+            RowStats: Statistics for all the rows.
+        """
+        stats = list(stats)
+        if not stats:
+            return get_row_stats([], [], [0])
+
+        return cls(
+            counts=numpy.concatenate([block.counts for block in stats]),
+            capacities=numpy.concatenate([block.capacities for block in stats]),
+            totals=numpy.concatenate([block.totals for block in stats]),
+            full=numpy.concatenate([block.full for block in stats]),
+            wet=numpy.concatenate([block.wet for block in stats]),
+        )
+
+    @property
+    def total(self):
+        """
+        Get the total liquid in the tower.
+
+        Returns:
+            float: Total liquid (millilitres)
+        """
+        return float(self.totals.sum())
+
+    @property
+    def first_unfilled_row(self):
+        """
+        Get the top most row that has a glass which isn't full.
+
+        Returns:
+            int: The row, or None if every glass is full.
+        """
+        (rows,) = numpy.nonzero(self.full < self.counts)
+        return int(rows[0]) if len(rows) else None
+
+    @property
+    def deepest_wet_row(self):
+        """
+        Get the bottom most row that has liquid in any of its glasses.
+
+        Returns:
+            int: The row, or None if the tower is dry.
+        """
+        (rows,) = numpy.nonzero(self.wet)
+        return int(rows[-1]) if len(rows) else None
+
+
+def get_row_stats(capacities, quantities, pointers):
+    """
+    Get statistics for each row of a tower.
+
+    Args:
+        capacities (numpy.ndarray): Capacity of each glass, row by row.
+        quantities (numpy.ndarray): Liquid in each glass, row by row.
+        pointers (numpy.ndarray): Position of the first glass of each
+            row, followed by the number of glasses (e.g.
+            `Topology.level_ptr`)
+
+    Returns:
+        RowStats: Statistics for each row.
+    """
+    capacities = numpy.asarray(capacities, dtype=float)
+    quantities = numpy.asarray(quantities, dtype=float)
+    pointers = numpy.asarray(pointers, dtype=numpy.intp)
+    starts = pointers[:-1]
+    if not len(starts):
+        counts = numpy.zeros(0, dtype=int)
+        return RowStats(counts, numpy.zeros(0), numpy.zeros(0), counts, counts)
+
+    # Every row has at least one glass, so `reduceat` never sees an
+    # empty segment.
+    return RowStats(
+        counts=numpy.diff(pointers),
+        capacities=numpy.add.reduceat(capacities, starts),
+        totals=numpy.add.reduceat(quantities, starts),
+        full=numpy.add.reduceat((quantities >= capacities).astype(int), starts),
+        wet=numpy.add.reduceat((quantities > 0).astype(int), starts),
+    )
+
+
+def iter_row_stats(rows, liquid, capacity=CAPACITY, block_size=storage.BLOCK_SIZE):
+    """
+    Pour liquid over a triangular tower that is never stored.
+
+    The tower is filled one block of rows at a time (see
+    `moet.storage.fill_rows`) and only the statistics of each block
+    are kept, so memory use is bounded by the block size however many
+    rows the tower has.
+
+    Args:
+        rows (int): Number of rows in the tower.
+        liquid (int or float or dict): Liquid (millilitres) poured into
+            the top most glass, or a mapping of position (row, column)
+            to liquid.
+        capacity (float or list or callable): Capacity profile
+            (millilitres, see `moet.tower.get_capacities`)
+        block_size (int): Maximum number of glasses in each block.
+
+    Yields:
+        RowStats: Statistics for each block of rows, from the top.
+    """
+    if rows < 1:
+        raise ValueError(f"Invalid number of rows. Got {rows}, expected 1 or more")
+
+    pours = storage.get_row_pours(liquid, rows)
+    get_block_capacities = storage.get_row_capacities(capacity, rows)
+    blocks = storage.fill_rows(rows, pours, get_block_capacities, block_size)
+    for start, end, capacities, quantities, _ in blocks:
+        if quantities is None:
+            capacities = get_block_capacities(start, end)
+            quantities = numpy.zeros(len(capacities))
+
+        first = utils.get_triangular_value(start)
+        pointers = utils.get_triangular_value(numpy.arange(start, end + 1)) - first
+        yield get_row_stats(capacities, quantities, pointers)
@@ -0,0 +1,498 @@
+"""
+Storage
+
+This module contains functions and classes used to keep the state of
+a tower in memory-mapped files, for towers that are too large to fit
+in memory. The capacity and quantity of each glass are stored in
+`.npy` files in triangular order (row by row, from the top):
+
+    tower/
+        capacities.npy
+        quantities.npy
+        meta.npz
+
+The operating system pages the files in and out as they are used, so
+a tower can be much larger than the available memory. Towers are
+filled one block of rows at a time, and saved towers reopen instantly.
+"""
+
+import collections.abc
+import os
+
+import numpy
+
+from .glass import CAPACITY
+from . import utils
+
+
+# Version of the files written by this module.
+FORMAT_VERSION = 1
+
+
+# Default number of glasses filled in each block of rows.
+BLOCK_SIZE = 1 << 20
+
+
+def create_mapped_tower(rows, path, capacity=CAPACITY, block_size=BLOCK_SIZE):
+    """
+    Create a triangular tower backed by memory-mapped files.
+
+    The capacities are written one block of rows at a time, so a full
+    array of capacities is never held in memory (unless one is given).
+
+    Args:
+        rows (int): Number of rows in the tower.
+        path (str): Directory to store the tower in (created if it
+            doesn't exist)
+        capacity (float or list or callable): Capacity of the glasses
+            (millilitres). See `moet.tower.get_capacities`.
+        block_size (int): Maximum number of glasses in each block.
+
+    Returns:
+        MappedTower: The tower.
+    """
+    if rows < 1:
+        raise ValueError(f"Invalid number of rows. Got {rows}, expected 1 or more")
+
+    count = utils.get_triangular_value(rows)
+    get_block_capacities = get_row_capacities(capacity, rows)
+    os.makedirs(path, exist_ok=True)
+    capacities = _open_array(path, "capacities", mode="w+", shape=(count,))
+    quantities = _open_array(path, "quantities", mode="w+", shape=(count,))
+    for start, end in get_blocks(rows, block_size):
+        first = utils.get_triangular_value(start)
+        last = utils.get_triangular_value(end)
+        capacities[first:last] = get_block_capacities(start, end)
+
+    quantities[:] = 0.0
+
+    tower = MappedTower(path, rows, capacities, quantities)
+    tower.flush()
+    return tower
+
+
+def open_tower(path, mode="r+"):
+    """
+    Open a tower that was stored in memory-mapped files.
+
+    Nothing is read from the files until it is used, so this takes
+    the same time for any size of tower.
+
+    Args:
+        path (str): Directory the tower is stored in.
+        mode (str): "r+" to open the tower for reading and writing, or
+            "r" to open it read only.
+
+    Returns:
+        MappedTower: The tower.
+    """
+    with numpy.load(os.path.join(path, "meta.npz")) as meta:
+        version = int(meta["version"])
+        rows = int(meta["rows"])
+        overflow = float(meta["overflow"])
+
+    if version > FORMAT_VERSION:
+        msg = f"Unsupported tower format. Got {version}, expected {FORMAT_VERSION}"
+        raise ValueError(msg)
+
+    capacities = _open_array(path, "capacities", mode=mode)
+    quantities = _open_array(path, "quantities", mode=mode)
+    count = utils.get_triangular_value(rows)
+    if capacities.shape != (count,) or quantities.shape != (count,):
+        raise ValueError(f"Invalid tower. Expected {count} glasses in {path}")
+
+    return MappedTower(path, rows, capacities, quantities, overflow=overflow)
+
+
+class MappedTower:
+    """
+    Mapped Tower
+
+    This class represents a triangular tower of glasses whose state is
+    stored in memory-mapped files. Glasses are identified by their
+    position (row, column) and their state is held in arrays (in
+    triangular order) rather than `Glass` objects.
+    """
+
+    def __init__(self, path, rows, capacities, quantities, overflow=0.0):
+        """
+        Initialize mapped tower.
+
+        Args:
+            path (str): Directory the tower is stored in.
+            rows (int): Number of rows in the tower.
+            capacities (numpy.memmap): Capacity of each glass
+                (millilitres)
+            quantities (numpy.memmap): Liquid in each glass
+                (millilitres)
+            overflow (float): Liquid that spilled out of the tower
+                (millilitres)
+        """
+        self.path = path
+        self.rows = rows
+        self.capacities = capacities
+        self.quantities = quantities
+        self.overflow = overflow
+
+    @property
+    def count(self):
+        """
+        Get glass count.
+
+        int: Number of glasses in the tower.
+        """
+        return len(self.capacities)
+
+    def get_row_count(self):
+        """
+        Get the number of rows in the tower.
+
+        Returns:
+            int: Number of rows in the tower.
+        """
+        return self.rows
+
+    def get_row(self, row):
+        """
+        Get the liquid in each glass in the given row.
+
+        Args:
+            row (int): Row number (from the top)
+
+        Returns:
+            numpy.memmap: Liquid in each glass (millilitres)
+        """
+        if not 0 <= row < self.rows:
+            raise ValueError(f"The row {row} is not in the tower.")
+
+        start = utils.get_triangular_value(row)
+        return self.quantities[start : start + row + 1]
+
+    def get_rows(self):
+        """
+        Get the liquid in each glass, one row at a time.
+
+        Yields:
+            numpy.memmap: Liquid in each glass in the row (millilitres)
+        """
+        for row in range(self.rows):
+            yield self.get_row(row)
+
+    def drain(self):
+        """
+        Drain all the liquid from the glasses in the tower.
+        """
+        self.quantities[:] = 0.0
+        self.overflow = 0.0
+        self.flush()
+
+    def fill(self, liquid_in_millilitres, block_size=BLOCK_SIZE, control=None):
+        """
+        Pour the given amount of liquid (millilitres) over the tower.
+
+        Liquid is poured into the top most glass, unless a mapping of
+        positions (row, column) to amounts of liquid is given, in which
+        case each amount is poured into its glass at the same time.
+
+        The tower is filled one block of rows at a time. The capacities
+        of a block are read in one go, filled one row at a time (only
+        the overflow from the previous row is kept) and the quantities
+        are written back in one go, so memory use is bounded by the
+        block size rather than the size of the tower. Once the liquid
+        runs out, the rest of the tower is simply emptied.
+
+        The results are identical to filling the same tower in memory.
+
+        Args:
+            liquid_in_millilitres (int or float or dict): Liquid
+                (millilitres), or a mapping of position to liquid
+                (millilitres)
+            block_size (int): Maximum number of glasses in each block
+                (a block always holds at least one row)
+            control (Control, optional): Used to cancel the fill and
+                report its progress, which is checked after each block
+                (see `moet.Control`). If cancelled, the glasses below
+                the completed blocks are left empty.
+
+        Returns:
+            float: The remaining overflow.
+        """
+        pours = get_row_pours(liquid_in_millilitres, self.rows)
+        outflow = numpy.zeros(0)
+        if control is not None:
+            control.start(self.rows)
+
+        blocks = fill_rows(self.rows, pours, self._read_capacities, block_size)
+        for start, end, _, quantities, outflow in blocks:
+            first = utils.get_triangular_value(start)
+            last = utils.get_triangular_value(end)
+            self.quantities[first:last] = 0.0 if quantities is None else quantities
+            if control is not None and not control.update(end):
+                self.quantities[last:] = 0.0
+                outflow = numpy.zeros(0)
+                break
+
+        # The overflow from the bottom row spills out of the tower (and
+        # is added up the same way as `Topology.get_overflow`).
+        self.overflow = float(outflow.sum())
+        self.flush()
+        return self.overflow
+
+    def row_stats(self, block_size=BLOCK_SIZE):
+        """
+        Get statistics for each row of the tower.
+
+        The files are read one block of rows at a time.
+
+        Args:
+            block_size (int): Maximum number of glasses in each block.
+
+        Returns:
+            RowStats: Statistics for each row.
+        """
+        from .stats import RowStats, get_row_stats
+
+        stats = []
+        for start, end in get_blocks(self.rows, block_size):
+            first = utils.get_triangular_value(start)
+            last = utils.get_triangular_value(end)
+            pointers = utils.get_triangular_value(numpy.arange(start, end + 1)) - first
+            capacities = numpy.array(self.capacities[first:last])
+            quantities = numpy.array(self.quantities[first:last])
+            stats.append(get_row_stats(capacities, quantities, pointers))
+
+        return RowStats.concatenate(stats)
+
+    def flush(self):
+        """
+        Write any changes to the files.
+        """
+        self.capacities.flush()
+        self.quantities.flush()
+        if self.quantities.mode != "r":
+            numpy.savez(
+                os.path.join(self.path, "meta.npz"),
+                version=FORMAT_VERSION,
+                rows=self.rows,
+                overflow=self.overflow,
+            )
+
+    def _read_capacities(self, start, end):
+        """
+        Read the capacities of a block of rows.
+
+        Args:
+            start (int): First row of the block.
+            end (int): Row after the last row of the block.
+
+        Returns:
+            numpy.ndarray: Capacity of each glass in the block.
+        """
+        first = utils.get_triangular_value(start)
+        last = utils.get_triangular_value(end)
+        return numpy.array(self.capacities[first:last])
+
+
+def get_row_pours(liquid, rows):
+    """
+    Get the liquid poured directly into each row of a triangular tower.
+
+    Args:
+        liquid (int or float or dict): Liquid poured into the top most
+            glass, or a mapping of position (row, column) to liquid.
+        rows (int): Number of rows in the tower.
+
+    Returns:
+        dict: Mapping of row to the liquid poured into each glass in
+            the row.
+    """
+    if not isinstance(liquid, collections.abc.Mapping):
+        liquid = {(0, 0): liquid}
+
+    pours = {}
+    for position, amount in liquid.items():
+        row, column = position
+        if not (0 <= row < rows and 0 <= column <= row):
+            raise ValueError(f"The glass {position} is not in the tower.")
+
+        if amount < 0:
+            msg = (
+                f"Invalid quantity of liquid for glass {position}. Got "
+                f"{amount}, expected value of 0 or above"
+            )
+            raise ValueError(msg)
+
+        pours.setdefault(row, numpy.zeros(row + 1))[column] += amount
+
+    return pours
+
+
+def get_row_capacities(capacity, rows):
+    """
+    Get a function that returns the capacities of a block of rows.
+
+    This is used to expand a capacity profile (see
+    `moet.tower.get_capacities`) one block of rows at a time.
+
+    Args:
+        capacity (float or list or callable): Capacity profile
+            (millilitres)
+        rows (int): Number of rows in the tower.
+
+    Returns:
+        callable: Function of the rows (start, end) of a block that
+            returns the capacity of each glass in the block.
+    """
+    from .tower import get_capacities
+
+    count = utils.get_triangular_value(rows)
+    if not callable(capacity) and numpy.ndim(capacity):
+        capacity = numpy.asarray(capacity, dtype=float)
+        if capacity.shape not in [(rows,), (count,)]:
+            msg = (
+                f"Invalid capacity. Got {len(capacity)} values, expected one per "
+                f"row ({rows}) or one per glass ({count})"
+            )
+            raise ValueError(msg)
+
+    def get_block_capacities(start, end):
+        first = utils.get_triangular_value(start)
+        last = utils.get_triangular_value(end)
+        levels, columns = utils.get_positions(numpy.arange(first, last))
+        profile = capacity
+        if numpy.ndim(capacity) and len(capacity) == count:
+            profile = capacity[first:last]
+        elif numpy.ndim(capacity):
+            profile = capacity[levels]
+
+        positions = None
+        if callable(capacity):
+            positions = zip(levels.tolist(), columns.tolist())
+
+        return get_capacities(profile, levels, positions)
+
+    return get_block_capacities
+
+
+def fill_rows(rows, pours, get_block_capacities, block_size=BLOCK_SIZE):
+    """
+    Pour liquid over a triangular tower, one block of rows at a time.
+
+    Each block is filled one row at a time, keeping only the overflow
+    from the previous row, so memory use is bounded by the block size
+    rather than the size of the tower. Once the liquid runs out, the
+    remaining blocks are skipped (their capacities are not read).
+
+    Args:
+        rows (int): Number of rows in the tower.
+        pours (dict): Mapping of row to the liquid poured into each
+            glass in the row (see `get_row_pours`)
+        get_block_capacities (callable): Function of the rows (start,
+            end) of a block that returns the capacity of each glass in
+            the block.
+        block_size (int): Maximum number of glasses in each block.
+
+    Yields:
+        tuple: (start, end, capacities, quantities, outflow) for each
+            block, where `capacities` and `quantities` are the capacity
+            of and liquid in each glass in the block (both None if the
+            block is dry) and `outflow` is the overflow from the last
+            row of the block.
+    """
+    last_pour = max(pours, default=-1)
+    outflow = numpy.zeros(0)
+    for start, end in get_blocks(rows, block_size):
+        if not outflow.any() and start > last_pour:
+            yield start, end, None, None, numpy.zeros(end)
+            continue
+
+        first = utils.get_triangular_value(start)
+        capacities = get_block_capacities(start, end)
+        quantities = numpy.empty(len(capacities))
+        for row in range(start, end):
+            inflow = _get_inflow(outflow)
+            if row in pours:
+                inflow = inflow + pours[row] if row else pours[row]
+
+            offset = utils.get_triangular_value(row) - first
+            level = quantities[offset : offset + row + 1]
+            numpy.minimum(inflow, capacities[offset : offset + row + 1], out=level)
+            outflow = inflow - level
+
+        yield start, end, capacities, quantities, outflow
+
+
+def _get_inflow(outflow):
+    """
+    Get the liquid flowing into a row from the overflow of the row above.
+
+    Each glass passes half its overflow to each of the two glasses
+    below it. The halves are added in the same order as `Topology.fill`
+    (left parent first).
+
+    Args:
+        outflow (numpy.ndarray): Overflow from each glass in the row
+            above (millilitres)
+
+    Returns:
+        numpy.ndarray: Liquid flowing into each glass (millilitres)
+    """
+    if not len(outflow):
+        return numpy.zeros(1)
+
+    half = outflow * 0.5
+    inflow = numpy.empty(len(outflow) + 1)
+    inflow[0] = half[0]
+    inflow[-1] = half[-1]
+    numpy.add(half[:-1], half[1:], out=inflow[1:-1])
+    return inflow
+
+
+def get_blocks(rows, block_size):
+    """
+    Split the rows of a triangular tower into blocks.
+
+    Args:
+        rows (int): Number of rows.
+        block_size (int): Maximum number of glasses in each block (a
+            block always has at least one row)
+
+    Yields:
+        tuple: (start, end) rows of each block.
+    """
+    if block_size < 1:
+        msg = f"Invalid block size. Got {block_size}, expected 1 or more"
+        raise ValueError(msg)
+
+    start = 0
+    while start < rows:
+        end = start + 1
+        size = end
+        while end < rows and size + end + 1 <= block_size:
+            end += 1
+            size += end
+
+        yield start, end
+        start = end
+
+
+def _open_array(path, name, mode, shape=None):
+    """
+    Open one of the arrays of a tower.
+
+    Args:
+        path (str): Directory the tower is stored in.
+        name (str): Name of the array.
+        mode (str): File mode ("r", "r+" or "w+")
+        shape (tuple, optional): Shape of a new array.
+
+    Returns:
+        numpy.memmap: The array.
+    """
+    filename = os.path.join(path, f"{name}.npy")
+    if mode == "w+":
+        return numpy.lib.format.open_memmap(
+            filename, mode=mode, dtype=float, shape=shape
+        )
+
+    return numpy.load(filename, mmap_mode=mode)
@@ -0,0 +1,552 @@
+"""
+Topology
+
+This module contains functions and classes related to the layout of
+a tower of glasses. A topology describes which glasses receive the
+overflow from which other glasses (and how much of it) as a directed
+acyclic graph (DAG). It is compiled once into a flat schedule of
+arrays, which is used to fill the tower level by level.
+"""
+
+import numpy
+
+from .control import iter_chunks
+
+
+def create_topology(edges, count=None, weights=None, positions=None):
+    """
+    Create a topology from a list of edges.
+
+    Each edge (parent, child) means that liquid overflowing from the
+    parent glass flows into the child glass. Glasses are numbered from
+    0 to `count - 1`. By default the overflow of a glass is split
+    evenly between its children. Any part of the overflow that is not
+    passed on to a child spills out of the tower.
+
+    Example:
+
+        # A glass (0) overflowing into two glasses (1 and 2), where
+        # glass (1) gets three quarters of the overflow.
+        topology = create_topology([(0, 1), (0, 2)], weights=[0.75, 0.25])
+
+    Args:
+        edges (list of tuple): Edges (parent, child)
+        count (int, optional): Number of glasses. Defaults to the
+            highest glass number in the edges plus one.
+        weights (list of float, optional): Fraction of the parent's
+            overflow passed along each edge.
+        positions (list of tuple, optional): The position of each
+            glass. Defaults to (level, index in level).
+
+    Returns:
+        Topology: The compiled topology.
+    """
+    edges = numpy.asarray(edges, dtype=numpy.int64).reshape(-1, 2)
+    parents, children = edges[:, 0], edges[:, 1]
+    if count is None:
+        count = int(edges.max()) + 1 if len(edges) else 0
+
+    if len(edges) and (edges.min() < 0 or edges.max() >= count):
+        raise ValueError(f"Invalid edges. Expected glass numbers below {count}")
+
+    if numpy.any(parents == children):
+        raise ValueError("Invalid edges. A glass can't overflow into itself")
+
+    if weights is None:
+        outdegree = numpy.bincount(parents, minlength=count)
+        weights = 1.0 / outdegree[parents]
+    else:
+        weights = numpy.asarray(weights, dtype=float)
+        if weights.shape != parents.shape:
+            raise ValueError("Invalid weights. Expected one weight per edge")
+
+    levels = _get_levels(count, parents, children)
+    order = numpy.argsort(levels, kind="stable")
+    rank = numpy.empty(count, dtype=numpy.int64)
+    rank[order] = numpy.arange(count)
+
+    if positions is None:
+        positions = _get_default_positions(levels[order])
+    else:
+        if len(positions) != count:
+            raise ValueError("Invalid positions. Expected one position per glass")
+
+        positions = [tuple(positions[index]) for index in order]
+
+    return Topology(
+        parents=rank[parents],
+        children=rank[children],
+        weights=weights,
+        levels=levels[order],
+        positions=positions,
+        order=order,
+    )
+
+
+def create_triangular_topology(rows):
+    r"""
+    Create the topology of a triangular tower.
+
+    Each glass overflows evenly into the two glasses below it.
+
+    Example:
+                           (Y)
+                           / \
+                         (Y) (Y)
+                         / \ / \
+                       (Y) (Y) (Y)
+
+    Args:
+        rows (int): Number of rows in the tower.
+
+    Returns:
+        Topology: The compiled topology.
+    """
+    if rows < 0:
+        raise ValueError(f"Invalid number of rows. Got {rows}, expected 0 or above")
+
+    row = numpy.repeat(numpy.arange(rows), numpy.arange(1, rows + 1))
+    start = row * (row + 1) // 2
+    column = numpy.arange(len(row)) - start
+
+    above = row < rows - 1
+    parents = numpy.repeat(numpy.flatnonzero(above), 2)
+    below = start[parents] + row[parents] + 1 + column[parents]
+    children = below + numpy.tile([0, 1], len(parents) // 2)
+
+    topology = Topology(
+        parents=parents,
+        children=children,
+        weights=numpy.full(len(parents), 0.5),
+        levels=row,
+        positions=list(zip(row.tolist(), column.tolist())),
+    )
+    topology.preset = ("triangular", rows)
+    return topology
+
+
+def create_pyramid_topology(layers):
+    """
+    Create the topology of a square pyramid.
+
+    Layer `k` of the pyramid is a (k + 1) x (k + 1) grid of glasses,
+    and each glass sits on (and overflows evenly into) four glasses
+    in the layer below it. Positions are (layer, i, j).
+
+    Args:
+        layers (int): Number of layers in the pyramid.
+
+    Returns:
+        Topology: The compiled topology.
+    """
+    if layers < 0:
+        raise ValueError(f"Invalid number of layers. Got {layers}, expected 0 or above")
+
+    positions = [
+        (layer, i, j)
+        for layer in range(layers)
+        for i in range(layer + 1)
+        for j in range(layer + 1)
+    ]
+    index = {position: number for number, position in enumerate(positions)}
+
+    edges = []
+    for layer, i, j in positions:
+        if layer == layers - 1:
+            continue
+
+        for di, dj in ((0, 0), (0, 1), (1, 0), (1, 1)):
+            edges.append((index[layer, i, j], index[layer + 1, i + di, j + dj]))
+
+    topology = create_topology(edges, count=len(positions), positions=positions)
+    topology.preset = ("pyramid", layers)
+    return topology
+
+
+class Topology:
+    """
+    Topology
+
+    This class represents the compiled layout of a tower of glasses.
+    Glasses are numbered in schedule order, which is sorted by level
+    (the longest path from a glass that has no parents), so every
+    glass comes after its parents. The edges are stored twice, in
+    compressed sparse row (CSR) form, grouped by child (to gather the
+    liquid flowing into each glass) and by parent (to look up
+    children).
+
+    Topologies created from a preset layout remember the preset (and
+    size) they were created with in `preset`, e.g. ("triangular", 4),
+    so they can be described without their arrays.
+    """
+
+    def __init__(self, parents, children, weights, levels, positions, order=None):
+        """
+        Initialize topology.
+
+        Args:
+            parents (numpy.ndarray): Parent of each edge.
+            children (numpy.ndarray): Child of each edge.
+            weights (numpy.ndarray): Fraction of the parent's overflow
+                passed along each edge.
+            levels (numpy.ndarray): Level of each glass (ascending).
+            positions (list of tuple): The position of each glass.
+            order (numpy.ndarray, optional): Original number of each
+                glass (if they were renumbered when compiled).
+        """
+        parents = numpy.asarray(parents, dtype=numpy.int64)
+        children = numpy.asarray(children, dtype=numpy.int64)
+        weights = numpy.asarray(weights, dtype=float)
+        levels = numpy.asarray(levels, dtype=numpy.int64)
+        count = len(levels)
+
+        if numpy.any(weights < 0):
+            raise ValueError("Invalid weights. Expected values of 0 or above")
+
+        spill = 1.0 - numpy.bincount(parents, weights=weights, minlength=count)
+        if numpy.any(spill < -1e-9):
+            msg = "Invalid weights. The weights for a glass can't add up to more than 1"
+            raise ValueError(msg)
+
+        self.count = count
+        self.preset = None
+        self.levels = levels
+        self.positions = positions
+        self.order = numpy.arange(count) if order is None else order
+        self.spill = numpy.clip(spill, 0.0, 1.0)
+
+        level_count = int(levels[-1]) + 1 if count else 0
+        self.level_ptr = numpy.searchsorted(levels, numpy.arange(level_count + 1))
+
+        # Edges are numbered in the order of `child_index` (grouped by
+        # parent). `weight_order` maps the edges grouped by child back
+        # to those numbers, so that weights can be given per edge.
+        by_parent = numpy.lexsort((children, parents))
+        self.child_ptr = _get_pointers(parents[by_parent], count)
+        self.child_index = children[by_parent]
+        self.child_weight = weights[by_parent]
+
+        by_child = numpy.lexsort((parents[by_parent], children[by_parent]))
+        self.parent_ptr = _get_pointers(self.child_index[by_child], count)
+        self.parent_index = parents[by_parent][by_child]
+        self.parent_weight = self.child_weight[by_child]
+        self.weight_order = by_child
+
+    def __len__(self):
+        """
+        Get the number of glasses.
+
+        Returns:
+            int: Number of glasses.
+        """
+        return self.count
+
+    @property
+    def level_count(self):
+        """
+        Get the number of levels (i.e. rows)
+
+        int: Number of levels.
+        """
+        return len(self.level_ptr) - 1
+
+    @property
+    def edge_count(self):
+        """
+        Get the number of edges.
+
+        int: Number of edges.
+        """
+        return len(self.parent_index)
+
+    @property
+    def edges(self):
+        """
+        Get the edges, grouped by parent.
+
+        This is the order in which weights are given per edge (e.g. to
+        `with_weights`).
+
+        numpy.ndarray: Edges (parent, child)
+        """
+        parents = numpy.repeat(numpy.arange(self.count), numpy.diff(self.child_ptr))
+        return numpy.stack([parents, self.child_index], axis=1)
+
+    def with_weights(self, weights):
+        """
+        Get the same layout with different weights.
+
+        Args:
+            weights (numpy.ndarray): Fraction of the parent's overflow
+                passed along each edge (in the order of `edges`)
+
+        Returns:
+            Topology: The new topology.
+        """
+        weights = numpy.asarray(weights, dtype=float)
+        if weights.shape != (self.edge_count,):
+            raise ValueError("Invalid weights. Expected one weight per edge")
+
+        edges = self.edges
+        return Topology(
+            parents=edges[:, 0],
+            children=edges[:, 1],
+            weights=weights,
+            levels=self.levels,
+            positions=self.positions,
+            order=self.order,
+        )
+
+    def get_levels(self):
+        """
+        Get the glasses in each level.
+
+        Yields:
+            range: The glasses in each level.
+        """
+        for level in range(self.level_count):
+            yield range(self.level_ptr[level], self.level_ptr[level + 1])
+
+    def get_parents(self, index):
+        """
+        Get the parents of the given glass.
+
+        Args:
+            index (int): Glass number.
+
+        Returns:
+            numpy.ndarray: Parent glass numbers.
+        """
+        start, end = self.parent_ptr[index], self.parent_ptr[index + 1]
+        return self.parent_index[start:end]
+
+    def get_children(self, index):
+        """
+        Get the children of the given glass.
+
+        Args:
+            index (int): Glass number.
+
+        Returns:
+            numpy.ndarray: Child glass numbers.
+        """
+        start, end = self.child_ptr[index], self.child_ptr[index + 1]
+        return self.child_index[start:end]
+
+    def get_parent_weights(self, weights=None):
+        """
+        Get the weights of the edges grouped by child.
+
+        Args:
+            weights (numpy.ndarray, optional): Fraction of the parent's
+                overflow passed along each edge (in the order of
+                `edges`), with an optional leading batch axis. Defaults
+                to the weights of the topology.
+
+        Returns:
+            tuple: (weights, spill) where `weights` are in the order of
+                `parent_index` and `spill` is the fraction of each
+                glass's overflow that spills out of the tower.
+        """
+        if weights is None:
+            return self.parent_weight, self.spill
+
+        weights = numpy.asarray(weights, dtype=float)
+        edges = self.edges
+        sums = numpy.zeros(weights.shape[:-1] + (self.count,))
+        numpy.add.at(sums, (..., edges[:, 0]), weights)
+        spill = numpy.clip(1.0 - sums, 0.0, 1.0)
+        return weights[..., self.weight_order], spill
+
+    def get_overflow(self, outflow, spill=None):
+        """
+        Add up the liquid that spills out of the tower.
+
+        Only the glasses that spill anything (e.g. the bottom row of a
+        preset layout) are added up, in schedule order. So the overflow
+        doesn't depend on how many glasses above them spill nothing,
+        and a tower that only keeps the overflow of its bottom row
+        (see `moet.storage`) gets exactly the same sum.
+
+        Args:
+            outflow (numpy.ndarray): Overflow from each glass
+                (millilitres), with an optional leading batch axis.
+            spill (numpy.ndarray, optional): Fraction of each glass's
+                overflow that spills out of the tower (see
+                `get_parent_weights`). Defaults to the spill of the
+                topology.
+
+        Returns:
+            float or numpy.ndarray: Overflow (millilitres), one per
+                row of the batch.
+        """
+        spill = self.spill if spill is None else spill
+        spilling = numpy.flatnonzero(spill.reshape(-1, self.count).any(axis=0))
+        overflow = (outflow[..., spilling] * spill[..., spilling]).sum(axis=-1)
+        return overflow if overflow.ndim else float(overflow)
+
+    def fill(self, capacities, pours, weights=None, flows=False, control=None):
+        """
+        Pour liquid over the glasses.
+
+        The glasses are filled one level at a time. For each level,
+        the overflow of the parents is gathered (and weighted) for
+        every glass in the level at once, then added to the liquid
+        poured directly into them. The overflow is added up in the
+        same order as the loop kernels in `moet.kernels`, so every
+        engine gives bit-identical results.
+
+        Any of the arguments may have a leading batch axis (e.g. one
+        row per trial), in which case every row is filled in the same
+        pass and the results have the same leading axis.
+
+        Args:
+            capacities (numpy.ndarray): Capacity of each glass
+                (millilitres)
+            pours (numpy.ndarray): Liquid poured directly into each
+                glass (millilitres)
+            weights (numpy.ndarray, optional): Fraction of the parent's
+                overflow passed along each edge (in the order of
+                `edges`). Defaults to the weights of the topology.
+            flows (bool): If true, also return the liquid that flowed
+                into and out of each glass.
+            control (Control, optional): Used to cancel the fill and
+                report its progress (one row per level). If cancelled,
+                the glasses below the completed levels are left empty.
+
+        Returns:
+            tuple: (quantities, overflow) where `quantities` is the
+                liquid in each glass and `overflow` is the liquid that
+                spilled out of the tower (millilitres). If `flows` is
+                true, the liquid that flowed into and out of each glass
+                (millilitres) follow.
+        """
+        capacities = numpy.asarray(capacities, dtype=float)
+        pours = numpy.asarray(pours, dtype=float)
+        weights, spill = self.get_parent_weights(weights)
+        shape = numpy.broadcast(capacities, pours, spill).shape
+
+        inflow = numpy.array(numpy.broadcast_to(pours, shape))
+        quantities = numpy.zeros(shape)
+        outflow = numpy.zeros(shape)
+        for first, last in iter_chunks(self.level_count, control):
+            for level in range(first, last):
+                start, end = self.level_ptr[level], self.level_ptr[level + 1]
+                if level:
+                    # Add up the parents' overflow one parent at a time
+                    # (first parents, then second parents, and so on).
+                    pointers = self.parent_ptr[start : end + 1]
+                    degrees = numpy.diff(pointers)
+                    edges = pointers[:-1]
+                    total = outflow[..., self.parent_index[edges]] * weights[..., edges]
+                    for slot in range(1, degrees.max()):
+                        glasses = numpy.flatnonzero(degrees > slot)
+                        edges = pointers[glasses] + slot
+                        total[..., glasses] += (
+                            outflow[..., self.parent_index[edges]] * weights[..., edges]
+                        )
+
+                    inflow[..., start:end] = total + inflow[..., start:end]
+
+                numpy.minimum(
+                    inflow[..., start:end],
+                    capacities[..., start:end],
+                    out=quantities[..., start:end],
+                )
+                numpy.subtract(
+                    inflow[..., start:end],
+                    quantities[..., start:end],
+                    out=outflow[..., start:end],
+                )
+
+        if control is not None and not control.complete:
+            inflow[..., self.level_ptr[control.rows] :] = 0.0
+
+        overflow = self.get_overflow(outflow, spill)
+        if flows:
+            return quantities, overflow, inflow, outflow
+
+        return quantities, overflow
+
+
+def _get_levels(count, parents, children):
+    """
+    Get the level of each glass.
+
+    The level of a glass is the length of the longest path to it from
+    a glass with no parents. The levels are found one frontier at a
+    time (i.e. Kahn's algorithm, vectorised over each level).
+
+    Args:
+        count (int): Number of glasses.
+        parents (numpy.ndarray): Parent of each edge.
+        children (numpy.ndarray): Child of each edge.
+
+    Returns:
+        numpy.ndarray: Level of each glass.
+    """
+    indegree = numpy.bincount(children, minlength=count)
+    by_parent = numpy.argsort(parents, kind="stable")
+    pointers = _get_pointers(parents[by_parent], count)
+    targets = children[by_parent]
+
+    levels = numpy.full(count, -1, dtype=numpy.int64)
+    frontier = numpy.flatnonzero(indegree == 0)
+    level = 0
+    while len(frontier):
+        levels[frontier] = level
+        reached = targets[_get_ranges(pointers[frontier], pointers[frontier + 1])]
+        indegree -= numpy.bincount(reached, minlength=count)
+        reached = numpy.unique(reached)
+        frontier = reached[indegree[reached] == 0]
+        level += 1
+
+    if numpy.any(levels < 0):
+        raise ValueError("Invalid edges. The glasses can't overflow in a cycle")
+
+    return levels
+
+
+def _get_default_positions(levels):
+    """
+    Get the default position of each glass.
+
+    Args:
+        levels (numpy.ndarray): Level of each glass (ascending).
+
+    Returns:
+        list of tuple: Position (level, index in level) of each glass.
+    """
+    starts = numpy.searchsorted(levels, levels)
+    columns = numpy.arange(len(levels)) - starts
+    return list(zip(levels.tolist(), columns.tolist()))
+
+
+def _get_ranges(starts, ends):
+    """
+    Concatenate the given ranges.
+
+    Args:
+        starts (numpy.ndarray): Start of each range.
+        ends (numpy.ndarray): End of each range.
+
+    Returns:
+        numpy.ndarray: The numbers in each range, one range after another.
+    """
+    lengths = ends - starts
+    offsets = numpy.repeat(starts - (numpy.cumsum(lengths) - lengths), lengths)
+    return offsets + numpy.arange(lengths.sum())
+
+
+def _get_pointers(keys, count):
+    """
+    Get the CSR pointers for the given (sorted) keys.
+
+    Args:
+        keys (numpy.ndarray): Sorted row of each entry.
+        count (int): Number of rows.
+
+    Returns:
+        numpy.ndarray: Start of each row (plus the end of the last).
+    """
+    return numpy.searchsorted(keys, numpy.arange(count + 1))
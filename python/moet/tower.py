@@ -5,15 +5,97 @@ This module contains functions and classes related to a tower
 of glasses.
 """
 
+import collections.abc
+import functools
+import heapq
+import itertools
 import math
 
-import networkx
-
-from .glass import create_glass
+from .glass import CAPACITY, create_glasses, set_state
 from . import utils
 
 
-def create_tower(rows=4):
+Timestamps = collections.namedtuple("Timestamps", ["wet", "full"])
+Timestamps.__doc__ = """
+Fill timestamps for a glass (seconds since the pour started).
+
+Attributes:
+    wet (float or None): When liquid first reached the glass.
+    full (float or None): When the glass became full.
+"""
+
+
+Breakpoints = collections.namedtuple("Breakpoints", ["wet", "full"])
+Breakpoints.__doc__ = """
+Fill breakpoints for a glass (millilitres poured over the tower).
+
+Attributes:
+    wet (float or None): How much liquid is poured before it reaches the glass.
+    full (float or None): How much liquid is poured before the glass is full.
+"""
+
+
+Flow = collections.namedtuple("Flow", ["inflow", "outflow"])
+Flow.__doc__ = """
+Liquid that flowed through a glass during a fill (millilitres).
+
+Attributes:
+    inflow (float): Liquid that flowed into the glass (from its parents
+        or poured directly into it).
+    outflow (float): Liquid that overflowed from the glass.
+"""
+
+
+Equilibrium = collections.namedtuple("Equilibrium", ["inflow", "outflow", "full"])
+Equilibrium.__doc__ = """
+Steady flow through a glass (millilitres per second).
+
+Attributes:
+    inflow (float): Liquid flowing into the glass (from its parents or
+        poured directly into it).
+    outflow (float): Liquid overflowing from the glass.
+    full (bool): True if the glass stays full (i.e. liquid flows in
+        faster than it drains)
+"""
+
+
+LAYOUTS = {
+    "triangular": "create_triangular_topology",
+    "pyramid": "create_pyramid_topology",
+}
+
+
+STORAGE = ["memory", "mmap"]
+
+
+# Methods of a tower that are timed while it has a profile (see
+# `Tower.profile`)
+PROFILED = [
+    "_create_glasses",
+    "fill",
+    "fill_many",
+    "fill_prefixes",
+    "_fill",
+    "_recompute",
+    "ensemble",
+    "simulate",
+    "get_breakpoints",
+    "row_stats",
+    "get_rows",
+    "get_glass",
+    "get_parents",
+    "get_children",
+]
+
+
+def create_tower(
+    rows=4,
+    layout="triangular",
+    capacity=CAPACITY,
+    storage="memory",
+    path=None,
+    profile=None,
+):
     r"""
     Create a tower of glasses.
 
@@ -29,31 +111,360 @@ def create_tower(rows=4):
                        / \ / \ / \
                      (Y) (Y) (Y) (Y)
 
+    The layout of the tower can be one of the presets in `LAYOUTS`
+    (e.g. "pyramid", where each glass sits on four others) or any
+    topology created with `moet.create_topology`.
+
+    The capacity of the glasses can be the same for every glass, or
+    given per row, per glass, or by a function. For example:
+
+        # Glasses get smaller towards the bottom of the tower.
+        tower = create_tower(rows=3, capacity=[250, 200, 150])
+
+        # Glasses on the edges of the tower are larger.
+        tower = create_tower(capacity=lambda row, column: ...)
+
+    Towers that are too large to fit in memory can be stored in
+    memory-mapped files instead (see `moet.storage`), in which case
+    the tower must be triangular and a directory must be given to
+    store it in. Stored towers can be reopened with `moet.open_tower`.
+
     Args:
         rows (int): Number of rows in the tower of glasses.
+        layout (str or Topology): Layout of the tower.
+        capacity (float or list or callable): Capacity of the glasses
+            (millilitres). See `get_capacities`.
+        storage (str): Where to keep the state of the tower ("memory"
+            or "mmap")
+        path (str, optional): Directory to store the tower in (for
+            "mmap" storage)
+        profile (Profile, optional): Used to time the construction of
+            the tower, and everything done with it afterwards (see
+            `Tower.profile`). Only towers stored in memory can be
+            profiled.
+
+    Returns:
+        Tower or MappedTower: The tower.
     """
-    tower = Tower()
-    count = utils.get_triangular_value(rows)
-    for index in range(count):
-        glass = create_glass(utils.get_id(index))
-        tower.add_glass(glass)
+    if profile is None:
+        return _create_tower(rows, layout, capacity, storage, path)
+
+    if storage != "memory":
+        raise ValueError("Only towers stored in memory can be profiled")
 
+    with profile.time("create_tower"):
+        tower = _create_tower(rows, layout, capacity, storage, path)
+
+    tower.profile = profile
     return tower
 
 
+def _create_tower(rows, layout, capacity, storage, path):
+    """
+    Create a tower of glasses (see `create_tower`)
+
+    Returns:
+        Tower or MappedTower: The tower.
+    """
+    from . import topology
+
+    if storage not in STORAGE:
+        msg = f"Invalid storage. Got {storage}, expected one of {STORAGE}"
+        raise ValueError(msg)
+
+    if storage == "mmap":
+        from .storage import create_mapped_tower
+
+        if layout != "triangular":
+            raise ValueError("Memory-mapped towers must be triangular")
+
+        if path is None:
+            raise ValueError("A path is required to store a memory-mapped tower")
+
+        return create_mapped_tower(rows, path, capacity=capacity)
+
+    if isinstance(layout, str):
+        try:
+            factory = getattr(topology, LAYOUTS[layout])
+        except KeyError:
+            msg = f"Invalid layout. Got {layout}, expected one of {list(LAYOUTS)}"
+            raise ValueError(msg)
+
+        layout = factory(rows)
+
+    capacities = get_capacities(capacity, layout.levels, layout.positions)
+    return Tower.from_topology(layout, capacities=capacities)
+
+
+@functools.lru_cache(maxsize=16)
+def get_layout(layout, rows):
+    """
+    Get the topology of a preset layout.
+
+    Topologies are never modified, so towers with the same preset and
+    size can share the same topology (e.g. towers loaded from files,
+    or created by a server for each request). The most recently used
+    topologies are kept.
+
+    Args:
+        layout (str): Name of the preset (see `LAYOUTS`)
+        rows (int): Size of the layout (e.g. number of rows)
+
+    Returns:
+        Topology: The topology.
+    """
+    from . import topology
+
+    try:
+        factory = getattr(topology, LAYOUTS[layout])
+    except KeyError:
+        msg = f"Invalid layout. Got {layout}, expected one of {list(LAYOUTS)}"
+        raise ValueError(msg)
+
+    return factory(rows)
+
+
+def get_capacities(capacity, levels, positions):
+    """
+    Get the capacity of each glass from a capacity profile.
+
+    The profile can be any of the following:
+
+        number: The capacity of every glass.
+        sequence (one value per row): The capacity of the glasses
+            in each row (or level).
+        sequence (one value per glass): The capacity of each glass.
+        callable: A function of the position of a glass, e.g.
+            (row, column), that returns its capacity.
+
+    The capacities are checked all at once, rather than one glass at
+    a time.
+
+    Args:
+        capacity (float or list or callable): Capacity profile
+            (millilitres)
+        levels (numpy.ndarray): Row (or level) of each glass.
+        positions (list of tuple): Position of each glass (only used
+            if the profile is a function)
+
+    Returns:
+        numpy.ndarray: Capacity of each glass (millilitres)
+    """
+    import numpy
+
+    count = len(levels)
+    if callable(capacity):
+        values = (capacity(*position) for position in positions)
+        capacities = numpy.fromiter(values, dtype=float, count=count)
+    elif numpy.ndim(capacity) == 0:
+        capacities = numpy.full(count, capacity, dtype=float)
+    else:
+        capacities = numpy.array(capacity, dtype=float)
+        row_count = int(levels[-1]) + 1 if count else 0
+        if capacities.ndim == 1 and len(capacities) == count:
+            pass
+        elif capacities.ndim == 1 and len(capacities) == row_count:
+            capacities = capacities[levels]
+        else:
+            msg = (
+                f"Invalid capacity. Got {capacities.shape[0]} values, expected one "
+                f"per row ({row_count}) or one per glass ({count})"
+            )
+            raise ValueError(msg)
+
+    check_capacities(capacities)
+    return capacities
+
+
+def check_capacities(capacities):
+    """
+    Check that the given capacities are valid.
+
+    Args:
+        capacities (numpy.ndarray): Capacity of each glass (millilitres)
+    """
+    import numpy
+
+    invalid = numpy.flatnonzero(~(capacities >= 0))
+    if len(invalid):
+        value = capacities[invalid[0]]
+        msg = (
+            f"Invalid value for capacity. Got {value} for glass {invalid[0]} "
+            f"({len(invalid)} invalid), expected value of 0 or above"
+        )
+        raise ValueError(msg)
+
+
 class Tower:
     """
     Tower
 
     This class represents a tower of glasses which can be filled
     with champagne (or any other form liquid).
+
+    Towers created from a layout (see `from_topology`) keep the
+    capacity and quantity of each glass in arrays, and only create
+    `Glass` objects when they are first needed (e.g. by `glasses`).
+    Until then, filling, copying and saving the tower only touches the
+    arrays.
     """
 
     def __init__(self):
         """Initialize tower"""
-        self._graph = networkx.DiGraph()
+        self._glasses = []
+        self._index = {}
+        self._parents = {}
+        self._children = {}
+        self._graph = None
+        self._topology = None
+        self._engine = "auto"
+        self._uids = None
+        self._capacities = None
+        self._quantities = None
+        self._flows = None
+        self._pours = None
+        self._dirty = set()
+        self._unimodal = False
+        self._profile = None
+        self.verifier = None
         self.overflow = 0.0
 
+    @classmethod
+    def from_topology(cls, topology, capacities=None, quantities=None):
+        """
+        Create a tower with the given layout.
+
+        The glasses are numbered in schedule order (so every glass
+        comes after its parents) and are only created when needed.
+
+        Args:
+            topology (Topology): Layout of the tower.
+            capacities (numpy.ndarray, optional): Capacity of each
+                glass (millilitres)
+            quantities (numpy.ndarray, optional): Liquid in each glass
+                (millilitres). Defaults to empty glasses.
+
+        Returns:
+            Tower: New tower.
+        """
+        import numpy
+
+        count = len(topology)
+        if capacities is None:
+            capacities = numpy.full(count, CAPACITY)
+
+        if quantities is None:
+            quantities = numpy.zeros(count)
+
+        capacities = numpy.array(capacities, dtype=float)
+        quantities = numpy.array(quantities, dtype=float)
+        if capacities.shape != (count,) or quantities.shape != (count,):
+            raise ValueError(f"Invalid state. Expected one value per glass ({count})")
+
+        check_capacities(capacities)
+        if numpy.any((quantities < 0) | (quantities > capacities)):
+            raise ValueError("Invalid quantities. Expected values from 0 to capacity")
+
+        tower = cls()
+        tower._topology = topology
+        tower._capacities = capacities
+        tower._quantities = quantities
+        return tower
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a tower that was saved with `save`.
+
+        Args:
+            path (str): File to load from.
+
+        Returns:
+            Tower: The tower.
+        """
+        from .binary import load
+
+        return load(path)
+
+    def save(self, path):
+        """
+        Save the tower to a file.
+
+        The tower is saved in a compact binary format (see
+        `moet.binary`): a small header describing the layout, followed
+        by the capacity and quantity of each glass.
+
+        Args:
+            path (str): File to save to.
+        """
+        from .binary import save
+
+        save(self, path)
+
+    def copy(self):
+        """
+        Get a copy of the tower.
+
+        The copy shares the (immutable) layout of the tower and copies
+        the capacity and quantity arrays, so no glasses are created.
+
+        Returns:
+            Tower: The copy.
+        """
+        capacities = self._get_capacities()
+        quantities = self._get_quantities()
+        tower = type(self).from_topology(
+            self.topology, capacities=capacities, quantities=quantities
+        )
+        tower._uids = self._uids if self._quantities is not None else self._get_uids()
+        tower._engine = self._engine
+        tower._pours = self._pours
+
+        # The glasses (unlike the arrays) can be changed from outside the
+        # tower, so the liquid in their rows is checked again.
+        if self._quantities is not None:
+            tower._unimodal = self._unimodal
+        else:
+            tower._unimodal = _has_unimodal_rows(self.topology, capacities, quantities)
+        tower.overflow = self.overflow
+        return tower
+
+    def __reduce__(self):
+        """
+        Get the tower for pickling.
+
+        Towers are pickled in the same binary format as `save`, rather
+        than as one object per glass.
+
+        Returns:
+            tuple: Function and arguments that recreate the tower.
+        """
+        from .binary import dumps, loads
+
+        return loads, (dumps(self),)
+
+    @property
+    def overflow(self):
+        """
+        Get the liquid that spilled out of the tower in the last fill.
+
+        float: Overflow (millilitres)
+        """
+        if self._dirty:
+            self._recompute()
+
+        return self._overflow
+
+    @overflow.setter
+    def overflow(self, value):
+        """
+        Set the liquid that spilled out of the tower.
+
+        Args:
+            value (float): Overflow (millilitres)
+        """
+        self._overflow = value
+
     @property
     def count(self):
         """
@@ -61,7 +472,10 @@ class Tower:
 
         int: Number of glasses in the tower.
         """
-        return len(self.glasses)
+        if self._quantities is not None:
+            return len(self._quantities)
+
+        return len(self._glasses)
 
     @property
     def glasses(self):
@@ -70,7 +484,172 @@ class Tower:
 
         list of Glass: Glasses
         """
-        return list(self._graph.nodes)
+        self._create_glasses()
+        return list(self._glasses)
+
+    def _create_glasses(self):
+        """
+        Create the glasses of a tower that was created from a layout.
+
+        Once the glasses are created, they hold the state of the tower.
+        """
+        if self._quantities is None:
+            return
+
+        if self._profile is not None:
+            self._profile.count("glasses_created", self.count)
+
+        # The capacities and quantities were checked when the tower was
+        # created (or filled), so they are set without validation.
+        topology = self.topology
+        glasses = create_glasses(self.count, uids=self._uids)
+        for glass in glasses:
+            glass._tower = self
+
+        set_state(
+            glasses,
+            positions=topology.positions,
+            capacities=self._capacities.tolist(),
+            quantities=self._quantities.tolist(),
+        )
+        self._index = dict(zip(glasses, range(len(glasses))))
+        self._glasses = glasses
+        self._parents = _get_adjacency(
+            glasses, topology.parent_ptr, topology.parent_index
+        )
+        self._children = _get_adjacency(
+            glasses, topology.child_ptr, topology.child_index
+        )
+        self._uids = None
+        self._capacities = None
+        self._quantities = None
+
+    @property
+    def graph(self):
+        """
+        Get the tower as a directed graph.
+
+        The graph is built on first access (and after glasses are
+        added) so that networkx is only imported by the callers who
+        need it.
+
+        networkx.DiGraph: Graph with an edge from each glass to the
+            glasses that receive its overflow.
+        """
+        if self._graph is None:
+            import networkx
+
+            self._create_glasses()
+            graph = networkx.DiGraph()
+            graph.add_nodes_from(self._glasses)
+            for glass in self._glasses:
+                for child in self._children[glass]:
+                    graph.add_edge(glass, child)
+
+            self._graph = graph
+
+        return self._graph
+
+    @property
+    def topology(self):
+        """
+        Get the compiled layout of the tower.
+
+        Towers that are built one glass at a time are compiled on first
+        access (and again after more glasses are added).
+
+        Topology: Layout of the tower.
+        """
+        if self._topology is None:
+            from .topology import create_topology
+
+            edges = [
+                (self._index[glass], self._index[child])
+                for glass in self._glasses
+                for child in self._children[glass]
+            ]
+            positions = [glass.position for glass in self._glasses]
+            self._topology = create_topology(
+                edges, count=len(self._glasses), positions=positions
+            )
+
+        return self._topology
+
+    @property
+    def profile(self):
+        """
+        Get the profile that records what is done with the tower.
+
+        While a tower has a profile, the methods in `PROFILED` are
+        timed, and the glasses it fills and creates are counted (see
+        `moet.Profile`). Profiles aren't copied along with the tower.
+
+        Profile or None: The profile (defaults to None, which turns
+            profiling off)
+        """
+        return self._profile
+
+    @profile.setter
+    def profile(self, profile):
+        """
+        Set the profile that records what is done with the tower.
+
+        Args:
+            profile (Profile or None): The profile.
+        """
+        from .profiling import instrument
+
+        # The instrumented methods shadow the methods of the class, so
+        # a tower without a profile calls them directly.
+        for name in PROFILED:
+            self.__dict__.pop(name, None)
+
+        self._profile = profile
+        if profile is not None:
+            for name in PROFILED:
+                setattr(self, name, instrument(profile, name, getattr(self, name)))
+
+    @property
+    def engine(self):
+        """
+        Get the name of the engine used to fill the tower.
+
+        The engine is one of the engines registered in
+        `moet.engines.ENGINES` (e.g. "numpy", "python" or "numba"), or
+        "auto" (default) to pick the fastest available engine for each
+        pour. Every engine gives the same results.
+
+        str: Name of the engine.
+        """
+        return self._engine
+
+    @engine.setter
+    def engine(self, name):
+        """
+        Set the engine used to fill the tower.
+
+        Args:
+            name (str): Name of the engine.
+        """
+        from .engines import get_engine
+
+        get_engine(name)
+        self._engine = name
+
+    def get_engine(self, size=None):
+        """
+        Get the engine used to fill the tower.
+
+        Args:
+            size (int, optional): Number of glasses filled at once
+                (defaults to the number of glasses in the tower)
+
+        Returns:
+            Engine: The engine.
+        """
+        from .engines import get_engine
+
+        return get_engine(self._engine, size=self.count if size is None else size)
 
     def get_glass(self, uid):
         """
@@ -90,11 +669,26 @@ class Tower:
         """
         Add new glass to the tower.
 
+        Glasses are added row by row, so only triangular towers can
+        have glasses added to them.
+
         Args:
             glass (Glass): New glass.
+
+        Raises:
+            ValueError: If the tower isn't triangular.
         """
+        self._create_glasses()
         glass.position = self.get_next_position()
-        self._graph.add_node(glass)
+        glass._tower = self
+        self._index[glass] = len(self._glasses)
+        self._glasses.append(glass)
+        self._parents[glass] = []
+        self._children[glass] = []
+        self._graph = None
+        self._topology = None
+        self._flows = None
+        self._pours = None
         self._set_overflow_dependencies(glass)
 
     def get_row_count(self):
@@ -102,10 +696,12 @@ class Tower:
         Get the number of rows in the tower.
 
         Returns:
-            int: Number of rows in the tower.
+            int: Number of rows (or levels) in the tower.
         """
-        root = utils.get_triangular_root(self.count)
-        return int(math.floor(root))
+        if not self.count:
+            return 0
+
+        return self.topology.level_count
 
     def get_rows(self):
         """
@@ -114,13 +710,182 @@ class Tower:
         Yields:
             list: The rows in the tower.
         """
-        row = []
-        for index, glass in enumerate(self._graph.nodes):
-            row.append(glass)
-            root = utils.get_triangular_root(index + 1)
-            if root.is_integer():
-                yield row
-                row = []
+        self._create_glasses()
+        rows = itertools.groupby(self._glasses, key=lambda glass: glass.position[0])
+        for _, row in rows:
+            yield list(row)
+
+    def row_stats(self):
+        """
+        Get statistics for each row of the tower.
+
+        The statistics (e.g. total liquid and number of full glasses in
+        each row) are computed from the capacities and quantities of
+        the glasses in a single vectorised pass, without creating the
+        glasses of towers that don't have them yet.
+
+        Example:
+
+            stats = tower.row_stats()
+            stats.totals              # liquid in each row
+            stats.first_unfilled_row  # top most row that isn't full
+
+        Returns:
+            RowStats: Statistics for each row.
+        """
+        from .stats import get_row_stats
+
+        return get_row_stats(
+            self._get_capacities(), self._get_quantities(), self.topology.level_ptr
+        )
+
+    def count_full(self, fraction=1.0):
+        """
+        Count the glasses that are at least the given fraction full.
+
+        After liquid is poured into the top most glass of a triangular
+        tower of glasses of the same size, the glasses are counted with
+        a binary search of each row (see `moet.queries`), rather than
+        by checking every glass.
+
+        Args:
+            fraction (float): Fraction of the capacity of each glass
+                (0 to 1)
+
+        Returns:
+            int: Number of glasses.
+        """
+        from .queries import count_at_least
+
+        return count_at_least(*self._get_query(fraction))
+
+    def get_full(self, fraction=1.0):
+        """
+        Get the glasses that are at least the given fraction full.
+
+        For example, the glasses that are at least 80% full:
+
+            uids = tower.get_full(0.8)
+
+        Glasses are found the same way as `count_full`, without
+        creating the glasses of towers that don't have them yet.
+
+        Args:
+            fraction (float): Fraction of the capacity of each glass
+                (0 to 1)
+
+        Returns:
+            list of str: Glass IDs (in schedule order)
+        """
+        from .queries import get_at_least
+
+        indices = get_at_least(*self._get_query(fraction))
+        return [self._get_uid(index) for index in indices.tolist()]
+
+    def get_fullest(self, count):
+        """
+        Get the glasses that hold the most liquid.
+
+        Glasses that hold the same amount of liquid are taken in
+        schedule order. For example, the 50 fullest glasses:
+
+            uids = tower.get_fullest(50)
+
+        Args:
+            count (int): Number of glasses.
+
+        Returns:
+            list of str: Glass IDs, from the fullest to the emptiest.
+        """
+        from .queries import get_fullest
+
+        if count < 0:
+            raise ValueError(f"Invalid count. Got {count}, expected 0 or above")
+
+        quantities, _, rows = self._get_query(1.0)
+        indices = get_fullest(quantities, count, rows)
+        return [self._get_uid(index) for index in indices.tolist()]
+
+    def _get_query(self, fraction):
+        """
+        Get the arguments of a query (see `moet.queries`)
+
+        Args:
+            fraction (float): Fraction of the capacity of each glass
+                (0 to 1)
+
+        Returns:
+            tuple: (quantities, threshold, rows) where `threshold` is
+                the liquid (one value, or one value per glass) and
+                `rows` is the offset of the first glass in each row if
+                the liquid in each row is unimodal (otherwise None)
+        """
+        if not 0 <= fraction <= 1:
+            msg = f"Invalid fraction. Got {fraction}, expected value from 0 to 1"
+            raise ValueError(msg)
+
+        quantities = self._get_quantities()
+        capacities = self._get_capacities()
+        if self._unimodal and self._quantities is not None:
+            return quantities, capacities[0] * fraction, self.topology.level_ptr
+
+        return quantities, capacities * fraction, None
+
+    def memory_usage(self, deep=True):
+        """
+        Get the memory used by the tower (bytes), broken down by what
+        it is used for.
+
+        The breakdown is:
+
+            topology: The layout of the tower (see `topology`), which
+                may be shared with other towers.
+            state: The capacity and quantity of each glass (arrays, or
+                `Glass` objects once they're created), and the flows
+                recorded by the last fill.
+            indexes: The IDs of the glasses and the lookups from each
+                glass to its number, parents and children.
+            caches: Anything kept to speed up later calls (e.g. the
+                networkx graph, once it's been used)
+
+        Example:
+
+            usage = tower.memory_usage()
+            usage["total"] / tower.count  # bytes per glass
+
+        Args:
+            deep (bool): If true, include the memory used by the
+                objects held by the tower (e.g. each glass and its ID),
+                rather than just the containers that refer to them.
+                Arrays are always counted in full.
+
+        Returns:
+            dict: Memory used by the topology, state, indexes and
+                caches, and in total (bytes)
+        """
+        # Glasses refer back to the tower, which isn't counted.
+        seen = {id(self)}
+
+        def get_size(*values):
+            values = [value for value in values if value is not None]
+            return sum(utils.get_size(value, deep=deep, seen=seen) for value in values)
+
+        topology = self._topology
+        arrays = vars(topology).values() if topology is not None else []
+        usage = {
+            "topology": get_size(topology, *arrays),
+            "state": get_size(
+                self._capacities,
+                self._quantities,
+                self._glasses,
+                self._flows,
+                self._pours,
+            ),
+            "indexes": get_size(self._uids, self._index, self._parents, self._children),
+            "caches": get_size(self._graph),
+        }
+        usage["total"] = sum(usage.values())
+        return usage
 
     def get_next_position(self):
         """
@@ -128,21 +893,19 @@ class Tower:
 
         Returns:
              tuple: Next available position (i, j).
+
+        Raises:
+            ValueError: If the tower isn't triangular (glasses can only
+                be added to triangular towers)
         """
-        # Use triangular number sequence to determine the next
-        # available row.
-        glasses = list(self._graph.nodes)
-        row_count = self.get_row_count()
-        root = utils.get_triangular_root(self.count)
-        if root.is_integer():
-            row = row_count
-            column = 0
-        else:
-            _, previous_column = glasses[-1].position
-            row = row_count
-            column = previous_column + 1
+        self._create_glasses()
+        positions = [glass.position for glass in self._glasses]
+        if positions != [utils.get_position(index) for index in range(self.count)]:
+            raise ValueError("Glasses can only be added to triangular towers")
 
-        return row, column
+        # Glasses are added row by row, so the next position is the
+        # position of the next index in the triangle.
+        return utils.get_position(self.count)
 
     def _set_overflow_dependencies(self, glass):
         """
@@ -184,7 +947,8 @@ class Tower:
 
         parents = previous_row[start:end]
         for parent in parents:
-            self._graph.add_edge(parent, glass)
+            self._parents[glass].append(parent)
+            self._children[parent].append(glass)
 
     def get_parents(self, glass):
         """
@@ -196,10 +960,11 @@ class Tower:
         Returns:
              list of Glass: Parent glasses.
         """
+        self._create_glasses()
         try:
-            return self._graph.predecessors(glass)
-        except networkx.NetworkXError as error:
-            raise ValueError(str(error))
+            return list(self._parents[glass])
+        except (KeyError, TypeError):
+            raise ValueError(f"The glass {glass} is not in the tower.")
 
     def get_children(self, glass):
         """
@@ -211,34 +976,597 @@ class Tower:
         Returns:
              list of Glass: Parent glasses.
         """
+        self._create_glasses()
         try:
-            return self._graph.successors(glass)
-        except networkx.NetworkXError as error:
-            raise ValueError(str(error))
+            return list(self._children[glass])
+        except (KeyError, TypeError):
+            raise ValueError(f"The glass {glass} is not in the tower.")
 
     def drain(self):
         """
         Drain all the liquid from the glasses in the tower.
         """
         self.overflow = 0.0
-        for glass in self.glasses:
-            glass.millilitres = 0.0
+        self._flows = None
+        self._pours = None
+        self._dirty.clear()
+        self._unimodal = False
+        if self._quantities is not None:
+            self._quantities = self._quantities * 0.0
+            return
+
+        set_state(self._glasses, quantities=[0.0] * len(self._glasses))
 
-    def fill(self, liquid_in_millilitres):
+    def fill(self, liquid_in_millilitres, flows=False, control=None, verify=False):
         """
         Pour the given amount of liquid (millilitres) over the tower.
 
+        Liquid is poured into the top most glass, unless a mapping of
+        glasses (IDs or positions) to amounts of liquid is given, in
+        which case each amount is poured into its glass at the same
+        time. For example:
+
+            tower.fill({"A": 500, (2, 1): 250})
+
+        The tower is filled in a single pass over its compiled layout
+        (see `topology`), one level at a time. The liquid flowing into
+        each glass is the overflow from its parents plus anything
+        poured directly into it.
+
+        If `flows` is true, the liquid that flowed into and out of each
+        glass is recorded in the same pass (see `get_flows`).
+
+        Changing the capacity of a glass afterwards only refills the
+        glasses below it, the next time the tower (or any glass in it)
+        is read (see `_recompute`). Edits made in between are refilled
+        together. The flows are needed to refill part of the tower, so
+        without them, the first edit refills the whole tower.
+
         Args:
-            liquid_in_millilitres (int or float): Liquid (millilitres)
+            liquid_in_millilitres (int or float or dict): Liquid
+                (millilitres), or a mapping of glass ID or position
+                to liquid (millilitres)
+            flows (bool): If true, record the liquid that flowed
+                through each glass.
+            control (Control, optional): Used to cancel the fill (e.g.
+                after a deadline) and report its progress every so
+                many rows (see `moet.Control`). If cancelled, the glasses
+                below the rows that were completed are left empty.
+            verify (bool): If true, check the result against the
+                reference fill (see `moet.verify`) and raise a
+                `VerificationError` if it doesn't match. Fills can also
+                be checked by the tower's `verifier` (None by default),
+                e.g. to check a fraction of fills in production.
 
         Returns:
             float: The remaining overflow.
         """
-        self.drain()
-        glass = self.glasses[0]
-        self._fill(glass, liquid_in_millilitres)
+        pours = self._get_pours(liquid_in_millilitres)
+        engine = self.get_engine()
+        capacities = self._get_capacities()
+        result = engine.fill(
+            self.topology, capacities, pours, flows=flows, control=control
+        )
+        quantities, overflow = result[:2]
+        verifier = self.verifier
+        if verify:
+            from .verify import Verifier
+
+            verifier = Verifier(strict=True)
+
+        if verifier is not None and (control is None or control.complete):
+            verifier.check(
+                self.topology,
+                capacities,
+                pours,
+                (quantities, overflow),
+                liquid=liquid_in_millilitres,
+                engine=engine.name,
+            )
+
+        self._flows = result[2:] if flows else None
+        self._set_quantities(quantities)
+        self._unimodal = _is_unimodal(self.topology, capacities, pours)
+        self.overflow = overflow
+        if control is None or control.complete:
+            self._pours = _get_sparse(pours)
+        if self._profile is not None:
+            self._profile.count("glasses_filled", _get_filled(self.topology, control))
+
         return self.overflow
 
+    def get_flows(self):
+        """
+        Get the liquid that flowed through each glass in the last fill.
+
+        The liquid that flowed into a glass is either kept (up to its
+        capacity) or overflows to its children, so the inflow of a
+        glass is the load it carried during the fill. For example:
+
+            tower.fill(2000, flows=True)
+            flows = tower.get_flows()
+            print(flows["A"].inflow, flows["A"].outflow)
+
+        Returns:
+            dict: Mapping of glass ID to `Flow` (millilitres)
+
+        Raises:
+            ValueError: If the flows weren't recorded by the last fill.
+        """
+        if self._dirty:
+            self._recompute()
+
+        if self._flows is None:
+            msg = "The flows weren't recorded. Fill the tower with flows=True"
+            raise ValueError(msg)
+
+        inflows, outflows = (flows.tolist() for flows in self._flows)
+        return {
+            uid: Flow(inflow, outflow)
+            for uid, inflow, outflow in zip(self._get_uids(), inflows, outflows)
+        }
+
+    def fill_many(self, volumes, control=None):
+        """
+        Pour several amounts of liquid over copies of the tower.
+
+        Each amount is poured over an empty copy of the tower, and all
+        of them are filled at once, in a single pass over the tower.
+        The glasses in the tower are left untouched.
+
+        Example:
+
+            quantities, overflow = tower.fill_many([250, 500, 1000])
+
+        Args:
+            volumes (list): Amounts of liquid (see `fill`)
+            control (Control, optional): Used to cancel the fill and
+                report its progress (see `fill`)
+
+        Returns:
+            tuple: (quantities, overflow) where `quantities` is the
+                liquid in each glass for each amount (amounts x
+                glasses, millilitres) and `overflow` is the liquid that
+                spilled out of the tower for each amount (millilitres)
+        """
+        import numpy
+
+        pours = numpy.array([self._get_pours(volume) for volume in volumes])
+        pours = pours.reshape(len(pours), self.count)
+        engine = self.get_engine(pours.size)
+        capacities = self._get_capacities()
+        result = engine.fill(self.topology, capacities, pours, control=control)
+        if self._profile is not None:
+            filled = _get_filled(self.topology, control) * len(pours)
+            self._profile.count("glasses_filled", filled)
+
+        return result
+
+    def fill_prefixes(self, liquid_in_millilitres, rows):
+        """
+        Pour liquid over towers made of the top rows of the tower.
+
+        Liquid never flows back up a tower, so a tower with R rows
+        fills exactly like the top R rows of a taller tower, and its
+        overflow is the liquid that flows out of its bottom row. So,
+        the tower is filled once and each of the smaller towers is cut
+        from the result, rather than filled from scratch. The glasses
+        in the tower are left untouched.
+
+        Example:
+
+            towers = tower.fill_prefixes(3750, rows=[4, 10, 50])
+            print(towers[10].overflow)
+
+        Args:
+            liquid_in_millilitres (int or float or dict): Liquid (see
+                `fill`), which may only be poured into glasses that are
+                in every one of the towers.
+            rows (list of int): Number of rows in each tower (up to
+                the number of rows in the tower)
+
+        Returns:
+            dict: Mapping of number of rows to the filled `Tower` (with
+                the flows through each glass recorded)
+        """
+        topology = self.topology
+        if topology.preset is None:
+            msg = "Invalid tower. Expected a tower with a preset layout (see LAYOUTS)"
+            raise ValueError(msg)
+
+        rows = sorted(set(rows))
+        for count in rows:
+            if not 1 <= count <= topology.level_count:
+                msg = (
+                    f"Invalid rows. Got {count}, expected value from 1 to "
+                    f"{topology.level_count}"
+                )
+                raise ValueError(msg)
+
+        pours = self._get_pours(liquid_in_millilitres)
+        if rows and pours[topology.level_ptr[rows[0]] :].any():
+            msg = f"Invalid liquid. Expected liquid in the top {rows[0]} rows only"
+            raise ValueError(msg)
+
+        capacities = self._get_capacities()
+        engine = self.get_engine()
+        quantities, _, inflow, outflow = engine.fill(
+            topology, capacities, pours, flows=True
+        )
+
+        towers = {}
+        for count in rows:
+            layout = get_layout(topology.preset[0], count)
+            size = len(layout)
+            tower = type(self).from_topology(
+                layout, capacities=capacities[:size], quantities=quantities[:size]
+            )
+            tower._engine = self._engine
+            tower._flows = (inflow[:size].copy(), outflow[:size].copy())
+            tower._unimodal = _is_unimodal(layout, capacities[:size], pours[:size])
+            tower._pours = _get_sparse(pours[:size])
+            tower.overflow = layout.get_overflow(outflow[:size])
+            towers[count] = tower
+
+        if self._profile is not None:
+            self._profile.count("glasses_filled", len(topology))
+
+        return towers
+
+    def _get_pours(self, liquid):
+        """
+        Get the liquid poured directly into each glass.
+
+        Args:
+            liquid (int or float or dict): Liquid poured into the top
+                most glass, or a mapping of glass ID or position to
+                liquid.
+
+        Returns:
+            numpy.ndarray: Liquid poured into each glass.
+        """
+        import numpy
+
+        if isinstance(liquid, collections.abc.Mapping):
+            amounts = [(self._get_index(key), amount) for key, amount in liquid.items()]
+        else:
+            amounts = [(0, liquid)]
+
+        pours = numpy.zeros(self.count)
+        for index, amount in amounts:
+            if amount < 0:
+                msg = (
+                    f"Invalid quantity of liquid for glass {self._get_uid(index)}. "
+                    f"Got {amount}, expected value of 0 or above"
+                )
+                raise ValueError(msg)
+
+            pours[index] += amount
+
+        return pours
+
+    def _get_capacities(self):
+        """
+        Get the capacity of each glass.
+
+        Returns:
+            numpy.ndarray: Capacity of each glass (millilitres)
+        """
+        import numpy
+
+        if self._capacities is not None:
+            return self._capacities
+
+        capacities = [glass.capacity for glass in self._glasses]
+        return numpy.array(capacities, dtype=float)
+
+    def _get_quantities(self):
+        """
+        Get the liquid in each glass.
+
+        Returns:
+            numpy.ndarray: Liquid in each glass (millilitres)
+        """
+        import numpy
+
+        if self._quantities is not None:
+            return self._quantities
+
+        if self._dirty:
+            self._recompute()
+
+        quantities = [glass._quantity for glass in self._glasses]
+        return numpy.array(quantities, dtype=float)
+
+    def _set_quantities(self, quantities):
+        """
+        Set the liquid in each glass.
+
+        Args:
+            quantities (numpy.ndarray): Liquid in each glass (millilitres)
+        """
+        self._unimodal = False
+        self._pours = None
+        self._dirty.clear()
+        if self._quantities is not None:
+            self._quantities = quantities
+            return
+
+        set_state(self._glasses, quantities=quantities.tolist())
+
+    def _mark_dirty(self, glass):
+        """
+        Mark a glass whose capacity changed since the last fill.
+
+        Args:
+            glass (Glass): The glass.
+        """
+        # The capacities are no longer known to be the same, so the
+        # rows can't be searched as if they were unimodal.
+        self._unimodal = False
+        if self._pours is not None:
+            self._dirty.add(self._index[glass])
+
+    def _recompute(self):
+        """
+        Refill the glasses below the glasses whose capacity changed
+        since the last fill.
+
+        The glasses are refilled in schedule order, starting from the
+        top most glass that changed, so edits to several glasses are
+        refilled in a single pass. Only the liquid flowing into a
+        glass can change it, so each glass is refilled from the
+        (recorded) overflow of its parents, and its children are only
+        refilled if its own overflow changed. The result is the same as
+        filling the whole tower again.
+        """
+        if not self._dirty:
+            return
+
+        pending = sorted(self._dirty)
+        self._dirty.clear()
+        pours = self._pours
+        if self._flows is None:
+            liquid = {self._get_uid(index): amount for index, amount in pours.items()}
+            self.fill(liquid, flows=True)
+            return
+
+        topology = self.topology
+        parent_ptr = topology.parent_ptr
+        parent_index = topology.parent_index
+        parent_weight = topology.parent_weight
+        child_ptr = topology.child_ptr
+        child_index = topology.child_index
+        inflows, outflows = self._flows
+        queued = set(pending)
+        filled = 0
+        while pending:
+            index = heapq.heappop(pending)
+            filled += 1
+
+            # Same arithmetic (and order) as the fill kernels, so the
+            # result matches a fill of the whole tower.
+            pour = pours.get(index, 0.0)
+            start, end = parent_ptr[index], parent_ptr[index + 1]
+            if end > start:
+                total = outflows[parent_index[start]] * parent_weight[start]
+                for edge in range(start + 1, end):
+                    total += outflows[parent_index[edge]] * parent_weight[edge]
+
+                inflow = total + pour
+            else:
+                inflow = pour
+
+            glass = self._glasses[index]
+            quantity = min(inflow, float(glass._capacity))
+            glass._quantity = float(quantity)
+            outflow = inflow - quantity
+            inflows[index] = inflow
+            if outflow == outflows[index]:
+                continue
+
+            outflows[index] = outflow
+            children = child_index[child_ptr[index] : child_ptr[index + 1]]
+            for child in children.tolist():
+                if child not in queued:
+                    queued.add(child)
+                    heapq.heappush(pending, child)
+
+        self._overflow = topology.get_overflow(outflows)
+        if self._profile is not None:
+            self._profile.count("glasses_filled", filled)
+
+    def _get_uid(self, index):
+        """
+        Get the ID of the given glass.
+
+        Args:
+            index (int): Glass number.
+
+        Returns:
+            str: Glass ID.
+        """
+        if self._quantities is None:
+            return self._glasses[index].uid
+
+        if self._uids is not None:
+            return self._uids[index]
+
+        return utils.get_id(index)
+
+    def _get_uids(self):
+        """
+        Get the ID of each glass.
+
+        Returns:
+            list of str: Glass IDs.
+        """
+        if self._quantities is None:
+            return [glass.uid for glass in self._glasses]
+
+        if self._uids is not None:
+            return list(self._uids)
+
+        return utils.get_ids(self.count)
+
+    def _get_index(self, key):
+        """
+        Get the number of the glass with the given ID or position.
+
+        Args:
+            key (Glass or str or tuple): Glass, glass ID or position.
+
+        Returns:
+            int: Glass number.
+        """
+        if self._quantities is None:
+            glass = key if key in self._index else self._find_glass(key)
+            return self._index[glass]
+
+        keys = self.topology.positions if isinstance(key, tuple) else self._get_uids()
+        try:
+            return keys.index(key)
+        except ValueError:
+            raise ValueError(f"The glass {key} is not in the tower.")
+
+    def get_split(self, glass):
+        """
+        Get the split ratios for the given glass.
+
+        Args:
+            glass (Glass): A glass in the tower.
+
+        Returns:
+            list of float: Fraction of the glass's overflow passed to
+                each of its children (in the order of `get_children`)
+        """
+        self._create_glasses()
+        try:
+            index = self._index[glass]
+        except (KeyError, TypeError):
+            raise ValueError(f"The glass {glass} is not in the tower.")
+
+        topology = self.topology
+        start, end = topology.child_ptr[index], topology.child_ptr[index + 1]
+        return topology.child_weight[start:end].tolist()
+
+    def set_split(self, split):
+        """
+        Set the split ratios of the glasses in the tower.
+
+        By default, the overflow from a glass is split evenly between
+        its children. The split can be set in one of the following
+        ways:
+
+            # Every glass with two children passes 60% of its overflow
+            # to the child on the left (and 40% to the right).
+            tower.set_split(0.6)
+
+            # Set the split for individual glasses (by ID or position)
+            tower.set_split({"A": [0.7, 0.3], (1, 1): [0.5, 0.4]})
+
+            # Set the fraction passed along every edge (in the order
+            # of `topology.edges`)
+            tower.set_split(weights)
+
+        Any part of the overflow that isn't passed to a child spills
+        out of the tower. Adding glasses to the tower resets the split.
+
+        Args:
+            split (float or dict or list of float): Split ratios.
+        """
+        import numpy
+
+        topology = self.topology
+        weights = topology.child_weight.copy()
+        counts = numpy.diff(topology.child_ptr)
+        if isinstance(split, collections.abc.Mapping):
+            for key, ratios in split.items():
+                index = self._get_index(key)
+                start, end = topology.child_ptr[index], topology.child_ptr[index + 1]
+                if len(ratios) != end - start:
+                    msg = (
+                        f"Invalid split for glass {self._get_uid(index)}. Got "
+                        f"{len(ratios)} ratios, expected {end - start}"
+                    )
+                    raise ValueError(msg)
+
+                weights[start:end] = ratios
+        elif numpy.ndim(split) == 0:
+            if not 0 <= split <= 1:
+                msg = f"Invalid split. Got {split}, expected value from 0 to 1"
+                raise ValueError(msg)
+
+            left = topology.child_ptr[:-1][counts == 2]
+            weights[left] = split
+            weights[left + 1] = 1.0 - split
+        else:
+            weights = split
+
+        self._topology = topology.with_weights(weights)
+        self._pours = None
+
+    def ensemble(
+        self, liquid_in_millilitres, trials=1000, spread=0.1, seed=None, control=None
+    ):
+        """
+        Pour liquid over many copies of the tower with uneven splits.
+
+        In each trial, the split ratio of every glass is randomly
+        varied (by up to `spread`, e.g. 0.1 for 10%). All the trials
+        are filled at once, in a single pass over the tower, and the
+        results are summarised per glass. The glasses in the tower are
+        left untouched.
+
+        Example:
+
+            results = tower.ensemble(2500, trials=10000)
+            low, median, high = results.get_quantiles([0.05, 0.5, 0.95])
+
+        Args:
+            liquid_in_millilitres (int or float or dict): Liquid
+                (millilitres), or a mapping of glass ID or position
+                to liquid (millilitres)
+            trials (int): Number of trials.
+            spread (float): How much the split ratios vary (between 0 and 1)
+            seed (int, optional): Seed for the random number generator.
+            control (Control, optional): Used to cancel the trials and
+                report their progress (see `fill`)
+
+        Returns:
+            Ensemble: The results of the trials.
+        """
+        from .ensemble import create_ensemble
+
+        return create_ensemble(
+            self.topology,
+            self._get_capacities(),
+            self._get_pours(liquid_in_millilitres),
+            trials=trials,
+            spread=spread,
+            seed=seed,
+            engine=self.get_engine(trials * self.count),
+            control=control,
+        )
+
+    def _find_glass(self, key):
+        """
+        Find the glass with the given ID or position.
+
+        Args:
+            key (str or tuple): Glass ID or position.
+
+        Returns:
+            Glass: The glass.
+        """
+        self._create_glasses()
+        attribute = "position" if isinstance(key, tuple) else "uid"
+        for glass in self._glasses:
+            if getattr(glass, attribute) == key:
+                return glass
+
+        raise ValueError(f"The glass {key} is not in the tower.")
+
     def _fill(self, glass, liquid_in_millilitres):
         """
         Pour the given amount of liquid (millilitres) into the given glass.
@@ -255,3 +1583,320 @@ class Tower:
                 self._fill(child, div)
         else:
             self.overflow += remainder
+
+    def simulate(self, rate, duration=None):
+        """
+        Pour liquid over the tower at a constant rate.
+
+        Rather than taking small time steps, the simulation jumps from
+        one event to the next, where an event is a glass becoming full
+        (and therefore changing where the liquid flows). Between
+        events every glass fills at a constant rate, so the cost
+        depends on the number of events rather than the duration. Each
+        event costs one vectorised pass over the glasses, plus updating
+        the flow rates of the glasses below the ones that became full.
+
+        Once finished, the glasses (and the overflow) hold the state of
+        the tower at the end of the pour, which is the same state as
+        `fill(rate * duration)`.
+
+        Like `fill`, liquid can be poured into several glasses at once
+        by giving a mapping of glass ID or position to pour rate.
+
+        Args:
+            rate (int or float or dict): Pour rate (millilitres per
+                second), or a mapping of glass ID or position to pour
+                rate.
+            duration (int or float, optional): Length of the pour
+                (seconds). If not given, pour until every glass is full.
+
+        Returns:
+            dict: Mapping of glass ID to `Timestamps` (wet, full). A
+                timestamp is None if it didn't happen during the pour.
+        """
+        rates = self._get_pours(rate)
+        if not rates.sum() > 0:
+            msg = f"Invalid pour rate. Got {rate}, expected value above 0"
+            raise ValueError(msg)
+
+        if duration is not None and duration < 0:
+            msg = f"Invalid duration. Got {duration}, expected value of 0 or above"
+            raise ValueError(msg)
+
+        wet = [None] * self.count
+        full = [None] * self.count
+        quantities, overflow = None, 0.0
+        for event in self._iter_events(rates):
+            start, end, quantities, inflows, overflow, overflow_rate, filled = event
+            if duration is not None and start >= duration:
+                break
+
+            for index in inflows.nonzero()[0].tolist():
+                if wet[index] is None:
+                    wet[index] = start
+
+            if duration is not None and end > duration:
+                elapsed = duration - start
+                quantities = quantities + inflows * elapsed
+                overflow += overflow_rate * elapsed
+                break
+
+            for index in filled.tolist():
+                full[index] = end
+
+        if quantities is not None:
+            self._set_quantities(quantities.clip(0.0, self._get_capacities()))
+            self.overflow = overflow
+
+        return {
+            uid: Timestamps(wet[index], full[index])
+            for index, uid in enumerate(self._get_uids())
+        }
+
+    def steady_state(self, pour_rate, leak_rates):
+        """
+        Get the steady flow of liquid through the tower.
+
+        Liquid is poured over the tower at a constant rate while each
+        glass drains (e.g. leaks, or is drunk from) at its own constant
+        rate. Eventually, every glass that gets more liquid than it
+        drains stays full and passes the difference on, while every
+        other glass drains whatever reaches it. This equilibrium is
+        found in a single pass over the tower, from the top down, where
+        each glass keeps up to its leak rate (rather than its capacity)
+        of the liquid flowing into it, without simulating the pour.
+
+        Like `fill`, liquid can be poured into several glasses at once
+        by giving a mapping of glass ID or position to pour rate.
+
+        Example:
+
+            flows, overflow = tower.steady_state(100, leak_rates=30)
+            flows["B"].full  # True
+            overflow         # Liquid spilling out of the tower
+
+        Args:
+            pour_rate (int or float or dict): Pour rate (millilitres
+                per second), or a mapping of glass ID or position to
+                pour rate.
+            leak_rates (float or list or callable or dict): Rate each
+                glass drains at (millilitres per second). Given in the
+                same way as capacities (see `get_capacities`), or as a
+                mapping of glass ID or position to leak rate (glasses
+                that aren't in the mapping don't drain)
+
+        Returns:
+            tuple: (flows, overflow) where `flows` is a mapping of glass
+                ID to `Equilibrium` (inflow, outflow, full) and
+                `overflow` is the rate liquid spills out of the tower
+                (millilitres per second)
+        """
+        rates = self._get_pours(pour_rate)
+        topology = self.topology
+        if isinstance(leak_rates, collections.abc.Mapping):
+            leaks = self._get_pours(leak_rates)
+        else:
+            leaks = get_capacities(leak_rates, topology.levels, topology.positions)
+
+        engine = self.get_engine()
+        _, overflow, inflows, outflows = engine.fill(topology, leaks, rates, flows=True)
+        full = inflows > leaks
+        state = zip(inflows.tolist(), outflows.tolist(), full.tolist())
+        flows = {
+            uid: Equilibrium(inflow, outflow, is_full)
+            for uid, (inflow, outflow, is_full) in zip(self._get_uids(), state)
+        }
+        return flows, overflow
+
+    def get_breakpoints(self, liquid_in_millilitres=None, control=None):
+        """
+        Get how much liquid must be poured for each glass to become wet and full.
+
+        Liquid is poured into the top most glass, unless a mapping of
+        glasses (IDs or positions) to amounts of liquid is given, in
+        which case the liquid is split between the glasses in the same
+        proportions.
+
+        Example:
+
+            breakpoints = tower.get_breakpoints()
+            breakpoints["E"].full  # 1000.0
+
+        Args:
+            liquid_in_millilitres (dict, optional): Mapping of glass ID
+                or position to liquid (millilitres)
+            control (Control, optional): Used to cancel the search (e.g.
+                after a deadline) and report its progress every so
+                many rows (see `moet.Control`). If cancelled, only the
+                breakpoints of the rows that were completed are final
+                (the others are None if they weren't reached)
+
+        Returns:
+            dict: Mapping of glass ID to `Breakpoints` (wet, full). A
+                breakpoint is None if it never happens.
+        """
+        liquid = 1.0 if liquid_in_millilitres is None else liquid_in_millilitres
+        rates = self._get_pours(liquid)
+        if not rates.sum() > 0:
+            msg = f"Invalid liquid. Got {liquid}, expected value above 0"
+            raise ValueError(msg)
+
+        # Pouring one millilitre per second, the time at which each
+        # glass becomes wet (or full) is the volume poured.
+        engine = self.get_engine()
+        wet, full = engine.get_breakpoints(
+            self.topology, self._get_capacities(), rates / rates.sum(), control=control
+        )
+
+        breakpoints = {}
+        for uid, volumes in zip(self._get_uids(), zip(wet.tolist(), full.tolist())):
+            volumes = [None if math.isinf(volume) else volume for volume in volumes]
+            breakpoints[uid] = Breakpoints(*volumes)
+
+        return breakpoints
+
+    def _iter_events(self, rates):
+        """
+        Iterate over the events of a continuous pour.
+
+        Each item describes the interval between two events. The
+        glasses themselves are left untouched; the state of the pour
+        is tracked in arrays (in the same order as the glasses).
+
+        Args:
+            rates (numpy.ndarray): Rate that liquid is poured into
+                each glass (millilitres per second)
+
+        Yields:
+            tuple: (start, end, quantities, inflows, overflow,
+                overflow_rate, filled) where `quantities` and
+                `overflow` are the state at the start of the interval,
+                `inflows` is the rate each glass is filling up,
+                `overflow_rate` is the rate at which liquid leaves the
+                tower and `filled` holds the glasses that become full
+                at `end` (inf once every glass is full).
+        """
+        from .engines import iter_events
+
+        topology = self.topology
+        engine = self.get_engine()
+        fill = functools.partial(engine.fill, topology)
+        return iter_events(topology, self._get_capacities(), rates, fill=fill)
+
+
+def _get_filled(topology, control=None):
+    """
+    Get the number of glasses filled by a fill (for profiling)
+
+    Args:
+        topology (Topology): Layout of the tower.
+        control (Control, optional): Control of the fill.
+
+    Returns:
+        int: Number of glasses in the levels that were filled.
+    """
+    if control is None:
+        return len(topology)
+
+    return int(topology.level_ptr[control.rows])
+
+
+def _get_sparse(pours):
+    """
+    Get the liquid poured directly into each glass, for the glasses
+    that any liquid was poured into.
+
+    Args:
+        pours (numpy.ndarray): Liquid poured into each glass.
+
+    Returns:
+        dict: Mapping of glass number to liquid (millilitres)
+    """
+    import numpy
+
+    indices = numpy.flatnonzero(pours)
+    return dict(zip(indices.tolist(), pours[indices].tolist()))
+
+
+def _is_unimodal(topology, capacities, pours):
+    """
+    Check whether filling a tower leaves the liquid in each row
+    unimodal (see `moet.queries`)
+
+    That's the case when liquid is only poured into the top most glass
+    of a triangular tower (with the default split) whose glasses are
+    all the same size.
+
+    Args:
+        topology (Topology): Layout of the tower.
+        capacities (numpy.ndarray): Capacity of each glass (millilitres)
+        pours (numpy.ndarray): Liquid poured directly into each glass
+            (millilitres)
+
+    Returns:
+        bool: True if the liquid in each row is unimodal.
+    """
+    if topology.preset is None or topology.preset[0] != "triangular":
+        return False
+
+    if not len(capacities) or capacities.min() != capacities.max():
+        return False
+
+    return not pours[1:].any()
+
+
+def _has_unimodal_rows(topology, capacities, quantities):
+    """
+    Check whether the liquid in each row of a tower is unimodal (see
+    `moet.queries`)
+
+    That's the case when the tower is triangular, its glasses are all
+    the same size and the liquid in each row is symmetric and never
+    decreases from the left end of the row to its centre.
+
+    Args:
+        topology (Topology): Layout of the tower.
+        capacities (numpy.ndarray): Capacity of each glass (millilitres)
+        quantities (numpy.ndarray): Liquid in each glass (millilitres)
+
+    Returns:
+        bool: True if the liquid in each row is unimodal.
+    """
+    import numpy
+
+    if topology.preset is None or topology.preset[0] != "triangular":
+        return False
+
+    if not len(capacities) or capacities.min() != capacities.max():
+        return False
+
+    starts = topology.level_ptr[:-1]
+    rows = numpy.repeat(numpy.arange(len(starts)), numpy.diff(topology.level_ptr))
+    columns = numpy.arange(len(quantities)) - starts[rows]
+    mirrors = starts[rows] + rows - columns
+    if not numpy.array_equal(quantities, quantities[mirrors]):
+        return False
+
+    # Each glass in the left half holds no more than the one after it.
+    left = numpy.flatnonzero(2 * (columns + 1) <= rows)
+    return bool(numpy.all(quantities[left] <= quantities[left + 1]))
+
+
+def _get_adjacency(glasses, pointers, indices):
+    """
+    Get the neighbours of each glass from a CSR adjacency.
+
+    Args:
+        glasses (list of Glass): Glasses (in schedule order)
+        pointers (numpy.ndarray): Start of each glass's neighbours.
+        indices (numpy.ndarray): Neighbour glass numbers.
+
+    Returns:
+        dict: Mapping of glass to list of neighbouring glasses.
+    """
+    pointers = pointers.tolist()
+    neighbours = [glasses[index] for index in indices.tolist()]
+    return {
+        glass: neighbours[pointers[index] : pointers[index + 1]]
+        for index, glass in enumerate(glasses)
+    }
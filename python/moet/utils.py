@@ -4,9 +4,12 @@ Utilities
 This module contains moet utility functions.
 """
 
+import itertools
 import math
 import string
-import pkg_resources
+import sys
+
+from ._version import __version__
 
 
 ALPHABET = string.ascii_uppercase
@@ -32,14 +35,33 @@ def get_id(number):
         return ALPHABET[number]
 
 
+def get_ids(count):
+    """
+    Get the IDs of the first glasses in a tower.
+
+    Args:
+        count (int): Number of IDs.
+
+    Returns:
+        list of str: IDs (see `get_id`)
+    """
+    ids = list(ALPHABET[:count])
+    ids += [str(number) for number in range(len(ALPHABET), count)]
+    return ids
+
+
 def get_version():
     """
     Get the current version of moet.
 
+    The version is a constant generated alongside the package, so
+    this does not need to resolve the installed distribution (which
+    is slow to import and to query).
+
     Returns:
         str: moet version
     """
-    return pkg_resources.get_distribution("moet").version
+    return __version__
 
 
 def get_triangular_value(number):
@@ -70,16 +92,42 @@ def get_triangular_root(number):
 
         n = sqrt(8x + 1) - 1 / 2
 
+    The root of a triangular number is exact (however large the
+    number), see `get_triangular_row` for the exact number of complete
+    rows of any number.
+
     Args:
         number (int): Some number.
 
     Returns:
          float: The triangular root for the given number.
     """
+    row = get_triangular_row(number)
+    if get_triangular_value(row) == number:
+        return float(row)
+
     value = (math.sqrt(8 * number + 1) - 1) / 2
     return value
 
 
+def get_triangular_row(number):
+    """
+    Get the number of complete rows made from the given number of items.
+
+    This is the exact (integer) floor of the triangular root, which
+    is also the row of the item with the given (flat) index. For
+    example, 6 items make 3 complete rows, and item 6 is the first
+    item of row 3.
+
+    Args:
+        number (int): Some number (0 or above)
+
+    Returns:
+        int: Number of complete rows.
+    """
+    return (_isqrt(8 * number + 1) - 1) // 2
+
+
 def is_triangular(number):
     """
     Check if the given number is triangular.
@@ -89,20 +137,109 @@ def is_triangular(number):
 
         1, 3, 6, 10, 15 .. etc.
 
+    A number is triangular if (and only if) 8x + 1 is a perfect
+    square, which is checked exactly with an integer square root.
+
     Args:
         number (int): The number to check.
 
     Returns:
         bool: True if the number is in the sequence, false otherwise.
     """
-    for index in range(number + 1):
-        value = index * (index + 1) // 2
-        if value < number:
-            continue
+    if number < 0:
+        return False
+
+    root = _isqrt(8 * number + 1)
+    return root * root == 8 * number + 1
+
+
+def get_position(index):
+    """
+    Get the position of an item in a triangle from its (flat) index.
+
+    Items are numbered row by row, from the top. For example, item 4
+    is at position (2, 1).
+
+    Args:
+        index (int): Index of the item (0 or above)
+
+    Returns:
+        tuple: Position (row, column) of the item.
+    """
+    if index < 0:
+        raise ValueError(f"Invalid index. Got {index}, expected value of 0 or above")
+
+    row = get_triangular_row(index)
+    return row, index - get_triangular_value(row)
+
+
+def get_index(row, column):
+    """
+    Get the (flat) index of an item in a triangle from its position.
+
+    Args:
+        row (int): Row of the item.
+        column (int): Column of the item.
+
+    Returns:
+        int: Index of the item.
+    """
+    if not (0 <= column <= row):
+        msg = f"Invalid position. Got {(row, column)}, expected 0 <= column <= row"
+        raise ValueError(msg)
+
+    return get_triangular_value(row) + column
+
+
+def get_positions(indices):
+    """
+    Get the positions of many items in a triangle from their indices.
+
+    This is the vectorised version of `get_position`. The rows are
+    estimated with a floating point square root and then corrected, so
+    the result is exact for any index up to 2 ** 62.
+
+    Args:
+        indices (numpy.ndarray): Index of each item.
+
+    Returns:
+        tuple: (rows, columns) arrays of the position of each item.
+    """
+    import numpy
+
+    indices = numpy.asarray(indices, dtype=numpy.int64)
+    if numpy.any(indices < 0):
+        raise ValueError("Invalid indices. Expected values of 0 or above")
+
+    # The estimate is off by at most one row.
+    rows = ((numpy.sqrt(8.0 * indices + 1) - 1) // 2).astype(numpy.int64)
+    columns = indices - get_triangular_value(rows)
+    rows -= columns < 0
+    rows += columns > rows
+    return rows, indices - get_triangular_value(rows)
+
+
+def get_indices(rows, columns):
+    """
+    Get the indices of many items in a triangle from their positions.
+
+    This is the vectorised version of `get_index`.
 
-        return value == number
+    Args:
+        rows (numpy.ndarray): Row of each item.
+        columns (numpy.ndarray): Column of each item.
 
-    return False
+    Returns:
+        numpy.ndarray: Index of each item.
+    """
+    import numpy
+
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    columns = numpy.asarray(columns, dtype=numpy.int64)
+    if numpy.any((columns < 0) | (columns > rows)):
+        raise ValueError("Invalid positions. Expected 0 <= column <= row")
+
+    return get_triangular_value(rows) + columns
 
 
 def to_integer(value):
@@ -116,3 +253,81 @@ def to_integer(value):
         float or int: Value cast as integer if possible.
     """
     return int(value) if value.is_integer() else value
+
+
+def get_size(value, deep=True, seen=None):
+    """
+    Get the memory used by a value (bytes).
+
+    If `deep` is true, this includes the memory used by everything the
+    value refers to (e.g. the items in a list, or the attributes of an
+    object), other than classes, modules and functions. Values that
+    are referred to more than once are only counted once.
+
+    Args:
+        value (object): Some value.
+        deep (bool): If true, include the values it refers to.
+        seen (set, optional): IDs of the values already counted (to
+            count values shared with other values once)
+
+    Returns:
+        int: Memory used (bytes)
+    """
+    import inspect
+
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if not deep:
+        return size
+
+    if isinstance(value, (str, bytes, int, float)):
+        return size
+
+    if isinstance(value, dict):
+        values = itertools.chain.from_iterable(value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        values = value
+    elif inspect.isclass(value) or inspect.ismodule(value) or callable(value):
+        return size
+    else:
+        values = []
+        for cls in type(value).__mro__:
+            slots = getattr(cls, "__slots__", ())
+            slots = [slots] if isinstance(slots, str) else slots
+            values += [getattr(value, name, None) for name in slots]
+
+        if hasattr(value, "__dict__"):
+            values.append(vars(value))
+
+    return size + sum(get_size(item, deep=True, seen=seen) for item in values)
+
+
+def _isqrt(number):
+    """
+    Get the integer square root of the given number.
+
+    This is `math.isqrt`, which isn't available before Python 3.8.
+
+    Args:
+        number (int): Some number (0 or above)
+
+    Returns:
+        int: The largest integer whose square is at most the number.
+    """
+    if hasattr(math, "isqrt"):
+        return math.isqrt(number)
+
+    if number < 0:
+        raise ValueError("isqrt() argument must be nonnegative")
+
+    root = number
+    estimate = (root + 1) // 2
+    while estimate < root:
+        root = estimate
+        estimate = (root + number // root) // 2
+
+    return root
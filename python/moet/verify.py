@@ -0,0 +1,316 @@
+"""
+Verify
+
+This module contains the reference fill, used to check the results of
+the fill engines (see `moet.engines`). The reference fill follows
+`Tower._fill`: liquid is poured into a glass, and whatever the glass
+can't hold is passed on to each of its children in turn (or spills out
+of the tower), one path at a time. It is far too slow for large
+towers, but simple enough to trust.
+
+Fills are checked with a `Verifier`, either every fill of a tower
+(e.g. while testing a new engine) or a fraction of them (e.g. in
+production). For example:
+
+    tower.fill(2000, verify=True)
+
+    tower.verifier = moet.Verifier(rate=0.01)
+    tower.fill(2000)
+    tower.verifier.mismatches
+
+Mismatches describe the tower, the liquid and the engine, so they can
+be reproduced (see `Mismatch.create_tower`).
+"""
+
+import random
+import warnings
+
+import numpy
+
+
+# Most pours (into a glass) the reference fill will make in one fill.
+# The number of pours grows exponentially with the number of rows the
+# liquid reaches, so larger fills are skipped.
+LIMIT = 1000000
+
+
+def reference_fill(topology, capacities, pours, limit=LIMIT):
+    """
+    Fill a tower the same way as `Tower._fill`.
+
+    Args:
+        topology (Topology): Layout of the tower.
+        capacities (numpy.ndarray): Capacity of each glass (millilitres)
+        pours (numpy.ndarray): Liquid poured directly into each glass
+            (millilitres)
+        limit (int): Most pours to make before giving up.
+
+    Returns:
+        tuple: (quantities, overflow) where `quantities` is the liquid
+            in each glass and `overflow` is the liquid that spilled out
+            of the tower (millilitres)
+    """
+    capacities = numpy.asarray(capacities, dtype=float).tolist()
+    child_ptr = topology.child_ptr.tolist()
+    child_index = topology.child_index.tolist()
+    child_weight = topology.child_weight.tolist()
+    spill = topology.spill.tolist()
+    quantities = [0.0] * len(topology)
+    overflow = 0.0
+    count = 0
+
+    for glass in numpy.flatnonzero(pours).tolist():
+        stack = [(glass, float(pours[glass]))]
+        while stack:
+            count += 1
+            if count > limit:
+                raise ValueError(f"The fill needs more than {limit} pours to verify")
+
+            index, liquid = stack.pop()
+            value = quantities[index] + liquid
+            if value <= capacities[index]:
+                quantities[index] = value
+                continue
+
+            quantities[index] = capacities[index]
+            remainder = float(value - capacities[index])
+            overflow += remainder * spill[index]
+
+            # Children are pushed in reverse, so they are filled in
+            # order (depth first), like `Tower._fill`.
+            edges = range(child_ptr[index], child_ptr[index + 1])
+            for edge in reversed(edges):
+                stack.append((child_index[edge], remainder * child_weight[edge]))
+
+    return numpy.array(quantities), overflow
+
+
+class VerificationError(Exception):
+    """
+    Raised when a fill doesn't match the reference fill.
+
+    Attributes:
+        mismatch (Mismatch): The mismatch.
+    """
+
+    def __init__(self, mismatch):
+        """
+        Initialize error.
+
+        Args:
+            mismatch (Mismatch): The mismatch.
+        """
+        super().__init__(str(mismatch))
+        self.mismatch = mismatch
+
+
+class Mismatch:
+    """
+    Mismatch
+
+    This class describes a fill whose results didn't match the
+    reference fill.
+
+    Attributes:
+        topology (Topology): Layout of the tower.
+        capacities (numpy.ndarray): Capacity of each glass.
+        liquid (object): Liquid poured over the tower (as given to
+            `Tower.fill`)
+        engine (str): Name of the engine that filled the tower.
+        quantities (numpy.ndarray): Liquid in each glass.
+        overflow (float): Liquid that spilled out of the tower.
+        expected (numpy.ndarray): Liquid in each glass, according to
+            the reference fill.
+        expected_overflow (float): Liquid that spilled out of the
+            tower, according to the reference fill.
+    """
+
+    def __init__(
+        self,
+        topology,
+        capacities,
+        liquid,
+        engine,
+        quantities,
+        overflow,
+        expected,
+        expected_overflow,
+    ):
+        """
+        Initialize mismatch (see the attributes of the class)
+        """
+        self.topology = topology
+        self.capacities = capacities
+        self.liquid = liquid
+        self.engine = engine
+        self.quantities = quantities
+        self.overflow = overflow
+        self.expected = expected
+        self.expected_overflow = expected_overflow
+
+    def __repr__(self):
+        """
+        Get the string representation of the mismatch.
+
+        Returns:
+            str: String representation.
+        """
+        return f"Mismatch(engine={self.engine!r}, liquid={self.liquid!r})"
+
+    def __str__(self):
+        """
+        Describe the mismatch (and how to reproduce it)
+
+        Returns:
+            str: Description.
+        """
+        topology = self.topology
+        if topology.preset is not None:
+            layout = f"{topology.preset[0]} ({topology.preset[1]} rows)"
+        else:
+            layout = f"custom ({len(topology)} glasses, {topology.edge_count} edges)"
+
+        capacities = numpy.unique(self.capacities)
+        capacity = capacities[0] if len(capacities) == 1 else "varies by glass"
+        lines = [
+            f"The {self.engine} engine doesn't match the reference fill.",
+            f"  Layout: {layout}",
+            f"  Capacity: {capacity}",
+            f"  Liquid: {self.liquid!r}",
+        ]
+        errors = numpy.abs(self.quantities - self.expected)
+        if len(errors) and errors.max() > 0:
+            index = int(errors.argmax())
+            expected, got = float(self.expected[index]), float(self.quantities[index])
+            lines.append(f"  Glass {index}: expected {expected!r}, got {got!r}")
+
+        expected, got = self.expected_overflow, self.overflow
+        lines.append(f"  Overflow: expected {expected!r}, got {got!r}")
+        lines.append("Reproduce with: mismatch.create_tower().fill(mismatch.liquid)")
+        return "\n".join(lines)
+
+    @property
+    def glasses(self):
+        """
+        Get the glasses whose quantities don't match.
+
+        list of int: Numbers of the glasses (in schedule order)
+        """
+        return numpy.flatnonzero(self.quantities != self.expected).tolist()
+
+    def create_tower(self):
+        """
+        Create the tower that was filled (empty), using the same engine.
+
+        Returns:
+            Tower: The tower.
+        """
+        from .tower import Tower
+
+        tower = Tower.from_topology(self.topology, capacities=self.capacities)
+        tower.engine = self.engine
+        return tower
+
+
+class Verifier:
+    """
+    Verifier
+
+    This class checks the results of fills against the reference fill.
+    Only a fraction of fills (`rate`) are checked, chosen at random, and
+    fills that are too large for the reference fill are skipped.
+
+    Attributes:
+        checked (int): Number of fills checked.
+        skipped (int): Number of fills that were too large to check.
+        mismatches (list of Mismatch): Fills that didn't match.
+    """
+
+    def __init__(
+        self, rate=1.0, rtol=1e-9, atol=1e-6, strict=False, seed=None, limit=LIMIT
+    ):
+        """
+        Initialize verifier.
+
+        Args:
+            rate (float): Fraction of fills to check (0 to 1)
+            rtol (float): Relative tolerance (see `numpy.isclose`)
+            atol (float): Absolute tolerance (millilitres)
+            strict (bool): If true, raise a `VerificationError` when a
+                fill doesn't match (or a `ValueError` if it is too
+                large to check). Otherwise, mismatches are recorded
+                and a warning is issued.
+            seed (int, optional): Seed used to choose which fills to
+                check.
+            limit (int): Most pours the reference fill may make (see
+                `reference_fill`)
+        """
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Invalid rate. Got {rate}, expected value from 0 to 1")
+
+        self.rate = rate
+        self.rtol = rtol
+        self.atol = atol
+        self.strict = strict
+        self.limit = limit
+        self.checked = 0
+        self.skipped = 0
+        self.mismatches = []
+        self._random = random.Random(seed)
+
+    def __repr__(self):
+        """
+        Get the string representation of the verifier.
+
+        Returns:
+            str: String representation.
+        """
+        mismatches = len(self.mismatches)
+        return f"Verifier(checked={self.checked}, mismatches={mismatches})"
+
+    def check(self, topology, capacities, pours, result, liquid=None, engine=None):
+        """
+        Check the result of a fill (if it is chosen to be checked)
+
+        Args:
+            topology (Topology): Layout of the tower.
+            capacities (numpy.ndarray): Capacity of each glass.
+            pours (numpy.ndarray): Liquid poured directly into each
+                glass (millilitres)
+            result (tuple): (quantities, overflow) given by the fill.
+            liquid (object, optional): Liquid poured over the tower
+                (as given to `Tower.fill`, used to describe mismatches)
+            engine (str, optional): Name of the engine used.
+
+        Returns:
+            Mismatch or None: The mismatch, if the fill didn't match.
+        """
+        if self.rate < 1 and self._random.random() >= self.rate:
+            return None
+
+        try:
+            expected = reference_fill(topology, capacities, pours, limit=self.limit)
+        except ValueError:
+            if self.strict:
+                raise
+
+            self.skipped += 1
+            return None
+
+        self.checked += 1
+        quantities, overflow = result
+        options = {"rtol": self.rtol, "atol": self.atol}
+        if numpy.allclose(quantities, expected[0], **options) and numpy.isclose(
+            overflow, expected[1], **options
+        ):
+            return None
+
+        mismatch = Mismatch(
+            topology, capacities, liquid, engine, quantities, overflow, *expected
+        )
+        self.mismatches.append(mismatch)
+        if self.strict:
+            raise VerificationError(mismatch)
+
+        warnings.warn(str(mismatch), RuntimeWarning)
+        return mismatch
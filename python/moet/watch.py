@@ -0,0 +1,301 @@
+"""
+Watch
+
+This module contains functions used to animate a continuous pour
+over a tower of glasses in the terminal. The tower is drawn once and
+each following frame only redraws the glasses whose level changed,
+using cursor addressing, so large towers don't flicker.
+"""
+
+import math
+import time
+
+import click
+import numpy
+
+from .recorder import iter_samples
+
+# Characters used to display the level of liquid in a glass, from
+# empty to full.
+LEVELS = " ▁▂▃▄▅▆▇█"
+
+# ANSI escape sequences.
+SAVE_CURSOR = "\x1b7"
+RESTORE_CURSOR = "\x1b8"
+CLEAR_LINE = "\x1b[K"
+
+
+def watch(
+    tower,
+    rate,
+    duration=None,
+    fps=20,
+    speed=1.0,
+    write=None,
+    clock=time.monotonic,
+    sleep=time.sleep,
+):
+    """
+    Animate a continuous pour over the given tower.
+
+    The animation runs in real time (scaled by `speed`) and draws at
+    most `fps` frames per second. Each frame is sent to `write` as a
+    single string.
+
+    Args:
+        tower (Tower): The tower to pour liquid over.
+        rate (int or float): Pour rate (millilitres per second)
+        duration (int or float, optional): Length of the pour
+            (seconds). If not given, pour until every glass is full.
+        fps (int or float): Maximum number of frames per second.
+        speed (int or float): How much faster than real time to pour.
+        write (callable, optional): Called with the text of each frame
+            (default: write to stdout)
+        clock (callable): Returns the current time (seconds)
+        sleep (callable): Sleeps for the given number of seconds.
+
+    Returns:
+        int: The number of frames drawn.
+    """
+    if fps <= 0:
+        raise ValueError(f"Invalid frame rate. Got {fps}, expected value above 0")
+
+    if speed <= 0:
+        raise ValueError(f"Invalid speed. Got {speed}, expected value above 0")
+
+    if write is None:
+        write = _write_stdout
+
+    if duration is None:
+        duration = get_end_time(tower, rate)
+
+    layout = get_layout(tower)
+    capacities = numpy.array([glass.capacity for glass in tower.glasses], dtype=float)
+    times = _get_frame_times(duration, fps, speed, clock, sleep)
+
+    frames = 0
+    previous = None
+    for seconds, quantities, overflow in iter_samples(tower, rate, times):
+        levels = get_levels(quantities, capacities)
+        status = format_status(seconds, rate, overflow)
+        if previous is None:
+            write(render(layout, levels, status))
+        else:
+            write(render_changes(layout, previous, levels, status))
+
+        previous = levels
+        frames += 1
+
+    write("\n")
+    return frames
+
+
+def get_end_time(tower, rate):
+    """
+    Get the time at which the last glass becomes full during a pour.
+
+    The events of the pour are worked out without changing the tower.
+    The last interval (once nothing is filling up) never ends, so the
+    pour ends when the interval before it does.
+
+    Args:
+        tower (Tower): The tower to pour liquid over.
+        rate (int or float): Pour rate (millilitres per second)
+
+    Returns:
+        float: Time (seconds)
+    """
+    rates = tower._get_pours(rate)
+    if not rates.sum() > 0:
+        msg = f"Invalid pour rate. Got {rate}, expected value above 0"
+        raise ValueError(msg)
+
+    last = 0.0
+    for _, end, *_ in tower._iter_events(rates):
+        if end < numpy.inf:
+            last = end
+
+    return last
+
+
+def get_layout(tower):
+    """
+    Get the screen layout for the given tower.
+
+    Args:
+        tower (Tower): The tower.
+
+    Returns:
+        Layout: The lines to draw and the screen position of each glass.
+    """
+    rows = list(tower.get_rows())
+    lines = []
+    cells = []
+    for index, row in enumerate(rows):
+        indent = " " + "  " * (len(rows) - index - 1)
+        line = len(lines)
+        for column in range(len(row)):
+            cells.append((line, len(indent) + 4 * column + 1))
+
+        lines.append(indent + " ".join("( )" for _ in row))
+        if index != len(rows) - 1:
+            lines.append(indent + "/ \\ " * len(row))
+
+    return Layout(lines, cells)
+
+
+class Layout:
+    """
+    Layout
+
+    This class represents where a tower is drawn on the screen.
+    """
+
+    def __init__(self, lines, cells):
+        """
+        Initialize layout.
+
+        Args:
+            lines (list of str): The lines of an empty tower.
+            cells (list of tuple): The (line, column) of each glass,
+                in the same order as the tower's glasses.
+        """
+        self.lines = lines
+        self.cells = cells
+
+    @property
+    def height(self):
+        """
+        Get the number of lines in the tower.
+
+        int: Number of lines.
+        """
+        return len(self.lines)
+
+
+def get_levels(quantities, capacities):
+    """
+    Get the displayed level of liquid in each glass.
+
+    Args:
+        quantities (numpy.ndarray): Liquid in each glass (millilitres)
+        capacities (numpy.ndarray): Capacity of each glass (millilitres)
+
+    Returns:
+        numpy.ndarray: Index into `LEVELS` for each glass.
+    """
+    steps = len(LEVELS) - 1
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        ratios = numpy.where(capacities > 0, quantities / capacities, 1.0)
+
+    levels = numpy.ceil(numpy.clip(ratios, 0.0, 1.0) * steps - 1e-9)
+    return levels.astype(int)
+
+
+def render(layout, levels, status):
+    """
+    Render a complete frame.
+
+    Args:
+        layout (Layout): Where to draw the tower.
+        levels (numpy.ndarray): Level of each glass (see `get_levels`)
+        status (str): Status line.
+
+    Returns:
+        str: Frame text. The cursor is left at the end of the status line.
+    """
+    lines = [list(line) for line in layout.lines]
+    for (line, column), level in zip(layout.cells, levels):
+        lines[line][column] = LEVELS[level]
+
+    text = "\n".join("".join(line) for line in lines)
+    return text + "\n" + status
+
+
+def render_changes(layout, previous, levels, status):
+    """
+    Render the changes between two frames.
+
+    Only the glasses whose level changed are redrawn. The cursor is
+    expected to be at the end of the status line drawn by the
+    previous frame, and it is left at the end of the new one.
+
+    Args:
+        layout (Layout): Where to draw the tower.
+        previous (numpy.ndarray): Level of each glass in the last frame.
+        levels (numpy.ndarray): Level of each glass in this frame.
+        status (str): Status line.
+
+    Returns:
+        str: Escape sequences that update the screen.
+    """
+    parts = [SAVE_CURSOR]
+    for index in numpy.flatnonzero(previous != levels):
+        line, column = layout.cells[index]
+        up = layout.height - line
+        parts.append(f"\x1b[{up}A\x1b[{column + 1}G{LEVELS[levels[index]]}")
+        parts.append(RESTORE_CURSOR)
+
+    parts.append("\r" + status + CLEAR_LINE)
+    return "".join(parts)
+
+
+def format_status(seconds, rate, overflow):
+    """
+    Format the status line shown under the tower.
+
+    Args:
+        seconds (float): Time since the pour started (seconds)
+        rate (float): Pour rate (millilitres per second)
+        overflow (float): Overflow (millilitres)
+
+    Returns:
+        str: Status line.
+    """
+    return f"t={seconds:.2f}s poured={seconds * rate:.0f}ml overflow={overflow:.0f}ml"
+
+
+def _get_frame_times(duration, fps, speed, clock, sleep):
+    """
+    Get the time of each frame of the animation.
+
+    Frames are spaced at least `1 / fps` seconds apart (real time).
+    The time of each frame is the scaled real time since the first
+    one, so slow frames are caught up on rather than piling up.
+
+    Args:
+        duration (float): Length of the pour (seconds)
+        fps (float): Maximum number of frames per second.
+        speed (float): How much faster than real time to pour.
+        clock (callable): Returns the current time (seconds)
+        sleep (callable): Sleeps for the given number of seconds.
+
+    Yields:
+        float: Pour time of each frame (seconds)
+    """
+    interval = 1.0 / fps
+    start = clock()
+    frame = 0
+    while True:
+        seconds = (clock() - start) * speed
+        if seconds >= duration:
+            yield duration
+            return
+
+        yield seconds
+        frame += 1
+        delay = start + frame * interval - clock()
+        if delay > 0:
+            sleep(delay)
+        else:
+            frame = math.ceil((clock() - start) / interval)
+
+
+def _write_stdout(text):
+    """
+    Write the given text to stdout in one go.
+
+    Args:
+        text (str): Text to write.
+    """
+    click.echo(text, nl=False, color=True)
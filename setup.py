@@ -8,9 +8,14 @@ root = os.path.dirname(__file__)
 src = os.path.relpath(os.path.join(root, "python"))
 readme = open(os.path.join(root, "README.md")).read()
 
+# Read the version without importing the package.
+about = {}
+with open(os.path.join(src, "moet", "_version.py")) as version_file:
+    exec(version_file.read(), about)
+
 setup(
     name="moet",
-    version="0.1.0",
+    version=about["__version__"],
     description="Build a tower of glasses. Fill them with champagne!",
     long_description=readme,
     long_description_content_type="text/markdown",
@@ -42,5 +47,9 @@ setup(
     install_requires=[
         "Click>=7.0,<8",
         "networkx>=2.2,<3",
+        "numpy>=1.16",
     ],
+    extras_require={
+        "numba": ["numba>=0.45"],
+    },
 )
@@ -0,0 +1,103 @@
+"""
+Strategies
+
+This module contains hypothesis strategies shared by the tests. They
+generate towers (of any layout) and the liquid poured over them, for
+differential testing of the engines against each other and against
+the reference fill (see `moet.verify`).
+"""
+
+from hypothesis import strategies
+import numpy
+
+import moet
+from moet import engines
+
+
+# Names of the engines that can be used here.
+ENGINES = [name for name, engine in engines.ENGINES.items() if engine.available]
+
+
+@strategies.composite
+def topologies(draw, max_rows=8, max_glasses=20):
+    """
+    Generate triangular, pyramid and custom layouts.
+
+    Custom layouts have random edges (from lower to higher numbered
+    glasses) and weights, which add up to at most 1 for each glass.
+
+    Args:
+        draw (callable): Draws a value from a strategy.
+        max_rows (int): Most rows in a triangular layout.
+        max_glasses (int): Most glasses in a custom layout.
+
+    Returns:
+        Topology: The layout.
+    """
+    kind = draw(strategies.sampled_from(["triangular", "pyramid", "custom"]))
+    if kind == "triangular":
+        rows = draw(strategies.integers(min_value=1, max_value=max_rows))
+        return moet.create_triangular_topology(rows)
+
+    if kind == "pyramid":
+        layers = draw(strategies.integers(min_value=1, max_value=max(1, max_rows // 2)))
+        return moet.create_pyramid_topology(layers)
+
+    count = draw(strategies.integers(min_value=1, max_value=max_glasses))
+    pairs = [(i, j) for j in range(count) for i in range(j)]
+    if not pairs:
+        return moet.create_topology([], count=count)
+
+    edges = draw(strategies.lists(strategies.sampled_from(pairs), unique=True))
+    weights = draw(
+        strategies.lists(
+            strategies.floats(min_value=0, max_value=1),
+            min_size=len(edges),
+            max_size=len(edges),
+        )
+    )
+    weights = numpy.array(weights)
+    parents = numpy.array([parent for parent, _ in edges], dtype=int)
+    totals = numpy.bincount(parents, weights=weights, minlength=count)
+    weights = weights / numpy.maximum(totals, 1.0)[parents] if edges else weights
+    return moet.create_topology(edges, count=count, weights=weights)
+
+
+@strategies.composite
+def fills(draw, max_rows=8, max_volume=20000):
+    """
+    Generate a layout, the capacity of each glass and the liquid poured
+    directly into each glass.
+
+    The liquid is either poured into the first glass, or into several
+    glasses at once.
+
+    Args:
+        draw (callable): Draws a value from a strategy.
+        max_rows (int): Most rows in a triangular layout.
+        max_volume (float): Most liquid poured into a glass.
+
+    Returns:
+        tuple: (topology, capacities, pours)
+    """
+    topology = draw(topologies(max_rows=max_rows))
+    count = len(topology)
+    volumes = strategies.floats(min_value=0, max_value=max_volume)
+    capacities = draw(
+        strategies.one_of(
+            strategies.just([moet.glass.CAPACITY] * count),
+            strategies.lists(
+                strategies.floats(min_value=1, max_value=500),
+                min_size=count,
+                max_size=count,
+            ),
+        )
+    )
+    pours = numpy.zeros(count)
+    if draw(strategies.booleans()):
+        pours[0] = draw(volumes)
+    else:
+        for glass in draw(strategies.lists(strategies.integers(0, count - 1))):
+            pours[glass] += draw(volumes)
+
+    return topology, numpy.array(capacities), pours
@@ -0,0 +1,90 @@
+"""
+Test Bench
+
+This module contains tests for the benchmark runner.
+"""
+
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from moet import bench, cli
+
+BENCHMARKS = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks")
+
+
+SUITE = """
+from moet import bench
+
+
+@bench.benchmark(rows=[1, 2, 3], size=["small", "large"])
+def build(rows, size):
+    if size == "large" and rows > 1:
+        return None
+
+    return lambda: [0.0] * rows
+
+
+def helper():
+    pass
+"""
+
+
+def test_run__with_benchmark_file__returns_each_case(tmp_path):
+    """
+    Test running a file of benchmarks.
+
+    This test demonstrates how to write and run a benchmark.
+    """
+    path = tmp_path / "bench_example.py"
+    path.write_text(SUITE)
+    reports = []
+    results = bench.run(
+        [str(tmp_path)], max_rows=2, repeat=3, report=lambda *args: reports.append(args)
+    )
+
+    cases = [result["params"] for result in results["results"]]
+    assert cases == [
+        {"rows": 1, "size": "small"},
+        {"rows": 1, "size": "large"},
+        {"rows": 2, "size": "small"},
+    ]
+    assert [name for name, _ in reports] == ["example.build"] * 3
+    for result in results["results"]:
+        assert result["repeat"] == 3
+        assert 0 <= result["min"] <= result["median"] <= result["max"]
+        assert result["peak_memory"] >= 0
+
+    assert "numpy" in results["environment"]
+
+
+def test_run__with_invalid_path__raises_value_error(tmp_path):
+    """
+    Test running benchmarks from a path that doesn't exist.
+    """
+    with pytest.raises(ValueError):
+        bench.run([str(tmp_path / "missing")])
+
+
+def test_bench__with_suite__writes_json(tmp_path):
+    """
+    Test running the benchmark suite for small towers.
+
+        $ moet bench benchmarks --max-rows 4 --repeat 1 --output bench.json
+
+    """
+    output = str(tmp_path / "bench.json")
+    runner = CliRunner()
+    args = [BENCHMARKS, "--max-rows", "4", "--repeat", "1", "--output", output]
+    result = runner.invoke(cli.moet, ["bench", *args])
+    assert result.exit_code == 0, result.output
+    assert "tower.fill rows=4 engine=numpy" in result.output
+
+    with open(output) as json_file:
+        results = json.load(json_file)
+
+    names = {result["name"] for result in results["results"]}
+    assert {"tower.create_tower", "tower.get_glass", "cli.pprint"} <= names
+    assert "import.startup" in names
@@ -0,0 +1,99 @@
+"""
+Test Binary
+
+This module contains tests for saving, loading and copying towers.
+"""
+
+import copy
+import pickle
+
+import pytest
+
+import moet
+from moet import binary
+
+
+def get_state(tower):
+    """
+    Get the state of each glass in the given tower.
+
+    Args:
+        tower (Tower): The tower.
+
+    Returns:
+        list of tuple: (uid, position, capacity, quantity) of each glass.
+    """
+    return [
+        (glass.uid, glass.position, glass.capacity, glass.quantity)
+        for glass in tower.glasses
+    ]
+
+
+def test_save_tower__can_be_loaded(tmp_path):
+    """
+    Test saving a tower to a file and loading it again.
+
+    This test demonstrates how to save the state of a tower.
+    """
+    tower = moet.create_tower(rows=4)
+    tower.fill(2000)
+    path = str(tmp_path / "tower.moet")
+    tower.save(path)
+
+    loaded = moet.Tower.load(path)
+    assert get_state(loaded) == get_state(tower)
+    assert loaded.overflow == tower.overflow
+    assert loaded.topology.preset == ("triangular", 4)
+
+
+def test_pickle_tower__with_custom_layout__returns_same_tower():
+    """
+    Test pickling towers that don't have a preset layout.
+
+    This test is used to verify that the layout, split ratios and IDs
+    of the glasses survive the round trip.
+    """
+    tower = moet.Tower()
+    for uid in ["top", "left", "right"]:
+        tower.add_glass(moet.create_glass(uid))
+
+    tower.set_split({"top": [0.75, 0.25]})
+    tower.fill(450)
+
+    loaded = pickle.loads(pickle.dumps(tower))
+    assert get_state(loaded) == get_state(tower)
+    assert loaded.get_split(loaded.get_glass("top")) == [0.75, 0.25]
+
+    pyramid = moet.create_tower(rows=3, layout="pyramid")
+    pyramid.fill(1000)
+    assert get_state(copy.deepcopy(pyramid)) == get_state(pyramid)
+
+
+def test_copy_tower__returns_independent_tower():
+    """
+    Test copying a tower.
+
+    This test is used to verify that filling the copy of a tower
+    leaves the original untouched.
+    """
+    tower = moet.create_tower(rows=3)
+    tower.fill(750)
+    clone = tower.copy()
+    clone.fill(1750)
+
+    assert [glass.quantity for glass in tower.glasses] == [250.0] * 3 + [0.0] * 3
+    assert [glass.quantity for glass in clone.glasses] == [250.0] * 6
+    assert tower.overflow == 0.0
+    assert clone.overflow == 250.0
+
+
+def test_load_tower__with_invalid_data__raises_value_error():
+    """
+    Test loading something that isn't a tower.
+    """
+    data = binary.dumps(moet.create_tower(rows=3))
+    with pytest.raises(ValueError):
+        binary.loads(b"not a tower")
+
+    with pytest.raises(ValueError):
+        binary.loads(data[:-8])
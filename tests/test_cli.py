@@ -1,6 +1,8 @@
 """Test Command Line Interface (CLI)"""
 
 import os
+import subprocess
+import sys
 
 from click.testing import CliRunner
 
@@ -91,3 +93,55 @@ def test_moet__with_fill_3750__returns_expected():
     result = runner.invoke(cli.moet, options)
     assert result.exit_code == 0
     assert result.output == expected
+
+
+def test_moet__with_breakdown__returns_expected():
+    """
+    Test running the following moet command
+
+        $ moet --fill 3.75 --position 4 0 --breakdown --liquid beer
+
+    """
+    expected = _get_test_data("fill-3.75-litres-pos-4-0-breakdown-beer.txt")
+
+    runner = CliRunner()
+    options = ["--fill", "3.75", "--position", "4", "0", "--breakdown"]
+    result = runner.invoke(cli.moet, options + ["--liquid", "beer"])
+    assert result.exit_code == 0
+    assert result.output == expected
+
+
+def test_moet__with_several_rows__prints_each_tower():
+    """
+    Test running the following moet command
+
+        $ moet --fill 1.5 --uid E --rows 2 --rows 4
+
+    """
+    runner = CliRunner()
+    options = ["--fill", "1.5", "--uid", "E"]
+    result = runner.invoke(cli.moet, options + ["--rows", "2", "--rows", "4"])
+    assert result.exit_code == 0
+
+    header = "over the tower:\n\n"
+    output = result.output.split(header)[1]
+    for rows in ["2", "4"]:
+        single = runner.invoke(cli.moet, options + ["--rows", rows])
+        tower = single.output.split(header)[1]
+        assert f"Tower with {rows} rows:\n\n{tower}" in output
+
+
+def test_import_cli__does_not_import_heavy_modules():
+    """
+    Test importing the CLI in a fresh interpreter.
+
+    This test is used to verify that the cold start of the `moet`
+    command does not pay for networkx, numpy or pkg_resources.
+    """
+    heavy = ("networkx", "numpy", "pkg_resources")
+    code = (
+        "import sys, moet.cli; "
+        f"print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.decode().strip() == ""
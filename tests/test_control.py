@@ -0,0 +1,117 @@
+"""
+Test Control
+
+This module contains tests for cancelling long running computations
+and reporting their progress.
+"""
+
+import pytest
+
+import moet
+
+
+@pytest.mark.parametrize("engine", ["numpy", "python"])
+def test_fill_tower__with_progress__reports_every_few_rows(engine):
+    """
+    Test reporting the progress of a fill.
+
+    This test demonstrates how to follow the progress of a fill.
+
+    Args:
+        engine (str): Name of the engine.
+    """
+    reports = []
+    control = moet.Control(progress=lambda *args: reports.append(args), every=3)
+    tower = moet.create_tower(rows=10)
+    tower.engine = engine
+    overflow = tower.fill(20000, control=control)
+
+    assert reports == [(3, 10), (6, 10), (9, 10), (10, 10)]
+    assert control.complete
+    assert overflow == moet.create_tower(rows=10).fill(20000)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "python"])
+def test_fill_tower__when_cancelled__returns_partial_result(engine):
+    """
+    Test cancelling a fill part of the way through.
+
+    This test is used to verify that the rows completed before the
+    fill was cancelled are filled, and the rest are left empty.
+
+    Args:
+        engine (str): Name of the engine.
+    """
+
+    def cancel(rows, total):
+        control.cancel()
+
+    control = moet.Control(progress=cancel, every=2)
+    tower = moet.create_tower(rows=5)
+    tower.engine = engine
+    overflow = tower.fill(2000, flows=True, control=control)
+
+    assert not control.complete
+    assert control.rows == 2
+    assert [glass.quantity for glass in tower.glasses] == [250.0] * 3 + [0.0] * 12
+    assert tower.get_flows()["D"] == (0.0, 0.0)
+    assert overflow == 0.0
+
+
+def test_fill_tower__after_deadline__returns_empty_tower():
+    """
+    Test filling a tower after its deadline has passed.
+    """
+    control = moet.Control(timeout=0)
+    tower = moet.create_tower(rows=4)
+    tower.fill(1000, control=control)
+    assert control.rows == 0
+    assert [glass.quantity for glass in tower.glasses] == [0.0] * 10
+
+    quantities, _ = tower.fill_many([250, 500], control=control)
+    assert not quantities.any()
+
+
+@pytest.mark.parametrize("engine", ["numpy", "python"])
+def test_get_breakpoints__when_cancelled__returns_completed_rows(engine):
+    """
+    Test cancelling the search for breakpoints.
+
+    Args:
+        engine (str): Name of the engine.
+    """
+    tower = moet.create_tower(rows=4)
+    tower.engine = engine
+    expected = tower.get_breakpoints()
+
+    control = moet.Control(every=1)
+    assert tower.get_breakpoints(control=control) == expected
+    assert control.complete
+
+    control = moet.Control(progress=lambda *args: control.cancel(), every=1)
+    breakpoints = tower.get_breakpoints(control=control)
+    assert control.rows == 1
+    assert breakpoints["A"] == expected["A"]
+    assert breakpoints["J"].full is None
+
+
+def test_fill_mapped_tower__when_cancelled__returns_partial_result(tmp_path):
+    """
+    Test cancelling the fill of a memory-mapped tower.
+    """
+    path = str(tmp_path / "tower")
+    tower = moet.create_tower(rows=6, storage="mmap", path=path)
+    control = moet.Control(progress=lambda *args: control.cancel(), every=1)
+    tower.fill(10000, block_size=6, control=control)
+
+    assert control.rows == 3
+    assert list(tower.quantities) == [250.0] * 6 + [0.0] * 15
+    assert tower.overflow == 0.0
+
+
+def test_create_control__with_invalid_rows__raises_value_error():
+    """
+    Test creating a control that checks every 0 rows.
+    """
+    with pytest.raises(ValueError):
+        moet.Control(every=0)
@@ -0,0 +1,180 @@
+"""
+Test Engines
+
+This module contains tests for the engines used to fill a tower.
+"""
+
+from hypothesis import given, settings
+from hypothesis.strategies import floats, integers
+import numpy
+import pytest
+
+import moet
+from moet import engines
+
+
+ENGINES = [
+    "python",
+    pytest.param(
+        "numba",
+        marks=pytest.mark.skipif(
+            not engines.ENGINES["numba"].available, reason="numba is not installed"
+        ),
+    ),
+]
+
+
+def get_layouts():
+    """
+    Get layouts with one, two and four parents per glass.
+
+    Returns:
+        list of Topology: The layouts.
+    """
+    random = numpy.random.RandomState(0)
+    edges = [(i, j) for j in range(30) for i in range(j) if random.rand() < 0.2]
+    weights = numpy.full(len(edges), 0.1)
+    return [
+        moet.create_triangular_topology(8),
+        moet.create_pyramid_topology(5),
+        moet.create_topology(edges, count=30, weights=weights),
+    ]
+
+
+@pytest.mark.parametrize("name", ENGINES)
+@settings(deadline=None)
+@given(floats(min_value=0, max_value=50000), integers(min_value=0, max_value=2))
+def test_fill__with_engine__matches_numpy_exactly(name, volume, layout):
+    """
+    Test pouring liquid over a tower with each engine.
+
+    This test is used to verify that the loop kernels (interpreted or
+    compiled) give bit-identical results to the numpy engine.
+
+    Args:
+        name (str): Name of the engine.
+        volume (float): Liquid (millilitres)
+        layout (int): Layout number.
+    """
+    topology = get_layouts()[layout]
+    random = numpy.random.RandomState(1)
+    capacities = random.uniform(100, 300, len(topology))
+    pours = random.uniform(0, 1, len(topology)) * volume
+
+    expected = engines.get_engine("numpy").fill(topology, capacities, pours)
+    quantities, overflow = engines.get_engine(name).fill(topology, capacities, pours)
+    assert numpy.array_equal(quantities, expected[0])
+    assert overflow == expected[1]
+
+
+@pytest.mark.parametrize("name", ["numpy"] + ENGINES)
+def test_fill__with_flows__returns_liquid_through_each_glass(name):
+    """
+    Test recording the liquid that flowed through each glass.
+
+    This test is used to verify that every engine records the same
+    flows, and that the liquid flowing into each glass is either kept
+    or passed on.
+
+    Args:
+        name (str): Name of the engine.
+    """
+    for topology in get_layouts():
+        random = numpy.random.RandomState(3)
+        capacities = random.uniform(100, 300, len(topology))
+        pours = numpy.zeros(len(topology))
+        pours[0] = 5000.0
+
+        expected = engines.get_engine("numpy").fill(
+            topology, capacities, pours, flows=True
+        )
+        quantities, overflow, inflow, outflow = engines.get_engine(name).fill(
+            topology, capacities, pours, flows=True
+        )
+        assert numpy.array_equal(inflow, expected[2])
+        assert numpy.array_equal(outflow, expected[3])
+        assert numpy.array_equal(quantities, numpy.minimum(inflow, capacities))
+        assert numpy.array_equal(outflow, inflow - quantities)
+
+
+@pytest.mark.parametrize("name", ENGINES)
+def test_fill__with_engine_and_batch__matches_numpy_exactly(name):
+    """
+    Test pouring liquid over a batch of towers with each engine.
+
+    Args:
+        name (str): Name of the engine.
+    """
+    for topology in get_layouts():
+        random = numpy.random.RandomState(2)
+        capacities = numpy.full(len(topology), 250.0)
+        pours = random.uniform(0, 5000, (6, len(topology)))
+        weights = random.uniform(0, 0.25, (6, topology.edge_count))
+
+        engine = engines.get_engine(name)
+        expected = topology.fill(capacities, pours, weights=weights)
+        quantities, overflow = engine.fill(topology, capacities, pours, weights)
+        assert numpy.array_equal(quantities, expected[0])
+        assert numpy.array_equal(overflow, expected[1])
+
+
+@pytest.mark.parametrize("name", ENGINES)
+def test_get_breakpoints__with_engine__matches_numpy_exactly(name):
+    """
+    Test finding when each glass is wet and full with each engine.
+
+    Args:
+        name (str): Name of the engine.
+    """
+    for topology in get_layouts():
+        random = numpy.random.RandomState(3)
+        capacities = random.uniform(100, 300, len(topology))
+        rates = random.uniform(0, 1, len(topology))
+
+        expected = engines.get_engine("numpy").get_breakpoints(
+            topology, capacities, rates
+        )
+        wet, full = engines.get_engine(name).get_breakpoints(
+            topology, capacities, rates
+        )
+        assert numpy.array_equal(wet, expected[0])
+        assert numpy.array_equal(full, expected[1])
+
+
+def test_iter_events__after_each_event__rates_match_full_fill():
+    """
+    Test that the flow rates updated after each event are the same as
+    filling the whole tower again.
+    """
+    for topology in get_layouts():
+        random = numpy.random.RandomState(4)
+        capacities = random.uniform(100, 300, len(topology))
+        rates = random.uniform(0, 1, len(topology))
+
+        full = numpy.zeros(len(topology), dtype=bool)
+        for event in engines.iter_events(topology, capacities, rates):
+            _, _, _, inflows, _, overflow_rate, filled = event
+            limits = numpy.where(full, 0.0, numpy.inf)
+            expected = topology.fill(limits, rates)
+            assert numpy.array_equal(inflows, expected[0])
+            assert overflow_rate == expected[1]
+            full[filled] = True
+
+
+def test_get_engine__auto__picks_numpy_for_small_towers():
+    """
+    Test picking an engine automatically.
+    """
+    assert engines.get_engine("auto", size=10).name == "numpy"
+
+
+def test_get_engine__that_does_not_exist__raises_value_error():
+    """
+    Test getting an engine that isn't registered.
+    """
+    with pytest.raises(ValueError):
+        engines.get_engine("fortran")
+
+    tower = moet.create_tower(rows=3)
+    with pytest.raises(ValueError):
+        tower.engine = "fortran"
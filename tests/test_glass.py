@@ -9,6 +9,7 @@ from hypothesis.strategies import integers
 import pytest
 
 import moet
+from moet.glass import set_state
 
 
 def test_create_glass__returns_expected_value():
@@ -118,3 +119,60 @@ def test_set_glass_millilitres__with_negative_number__raises_value_error():
     glass = moet.create_glass("A")
     with pytest.raises(ValueError):
         glass.quantity = -100
+
+
+def test_create_glasses__returns_expected_values():
+    """
+    Test creating many glasses at once.
+
+    This test demonstrates how to create the glasses of a tower in
+    bulk. They are the same as glasses created one at a time.
+    """
+    glasses = moet.create_glasses(28)
+    assert [glass.uid for glass in glasses[:3]] == ["A", "B", "C"]
+    assert [glass.uid for glass in glasses[-2:]] == ["26", "27"]
+    for glass in glasses:
+        assert glass.position is None
+        assert glass.capacity == moet.create_glass(glass.uid).capacity
+        assert glass.quantity == 0.0
+
+    glasses = moet.create_glasses(2, uids=["X", "Y"])
+    assert [glass.uid for glass in glasses] == ["X", "Y"]
+
+    with pytest.raises(ValueError):
+        moet.create_glasses(3, uids=["X", "Y"])
+
+
+def test_set_state__sets_values_of_each_glass():
+    """
+    Test setting the state of many glasses at once.
+    """
+    glasses = moet.create_glasses(2)
+    set_state(glasses, positions=[(0, 0), (1, 0)], capacities=[100.0, 200.0])
+    set_state(glasses, quantities=[50.0, 200.0])
+    assert [glass.position for glass in glasses] == [(0, 0), (1, 0)]
+    assert [glass.capacity for glass in glasses] == [100.0, 200.0]
+    assert [glass.quantity for glass in glasses] == [50.0, 200.0]
+
+
+def test_glass__has_no_dict():
+    """
+    Test that glasses only have the attributes in their slots.
+    """
+    glass = moet.create_glass("A")
+    assert not hasattr(glass, "__dict__")
+    with pytest.raises(AttributeError):
+        glass.colour = "red"
+
+
+def test_fill_glass__with_negative_liquid__raises_value_error():
+    """
+    Test taking more liquid out of a glass than it holds.
+    """
+    glass = moet.create_glass("A")
+    glass.fill(100)
+    assert glass.fill(-50) == 0.0
+    assert glass.quantity == 50
+
+    with pytest.raises(ValueError):
+        glass.fill(-100)
@@ -0,0 +1,94 @@
+"""
+Test Profiling
+
+This module contains tests for profiling what is done with a tower.
+"""
+
+import pytest
+from click.testing import CliRunner
+
+import moet
+from moet import cli, tower as tower_module
+
+
+def test_create_tower__with_profile__records_calls_and_counters():
+    """
+    Test profiling a tower.
+
+    This test demonstrates how to find out where the time goes when
+    building, filling and looking up glasses in a tower.
+    """
+    profile = moet.Profile()
+    tower = moet.create_tower(rows=4, profile=profile)
+    tower.fill(1000)
+    tower.fill_many([250, 500])
+    tower.get_parents(tower.get_glass("E"))
+    rows = list(tower.get_rows())
+
+    assert len(rows) == 4
+    assert profile.calls["create_tower"] == 1
+    assert profile.calls["fill"] == 1
+    assert profile.calls["get_rows"] == 1
+    assert profile.calls["get_glass"] == 1
+    assert profile.counters == {"glasses_filled": 30, "glasses_created": 10}
+    assert all(seconds >= 0 for seconds in profile.timings.values())
+    assert set(profile.as_dict()) == {"calls", "timings", "counters"}
+    assert "glasses_filled" in profile.format()
+
+
+def test_tower__without_profile__is_not_instrumented():
+    """
+    Test turning profiling on and off.
+
+    This test is used to verify that towers without a profile call
+    their methods directly.
+    """
+    tower = moet.create_tower(rows=4)
+    assert tower.profile is None
+    assert not set(tower_module.PROFILED) & set(vars(tower))
+
+    profile = moet.Profile()
+    tower.profile = profile
+    tower._fill(tower.get_glass("A"), 1000)
+    assert profile.calls["_fill"] == 15
+    assert tower.overflow == 0.0
+
+    tower.profile = None
+    tower.fill(1000)
+    assert "fill" not in profile.calls
+    assert not set(tower_module.PROFILED) & set(vars(tower))
+    assert tower.copy().profile is None
+
+
+def test_fill_tower__with_cancelled_control__counts_filled_glasses():
+    """
+    Test counting the glasses filled by a fill that was cancelled.
+    """
+    profile = moet.Profile()
+    tower = moet.create_tower(rows=6, profile=profile)
+    control = moet.Control(progress=lambda *args: control.cancel(), every=2)
+    tower.fill(10000, control=control)
+    assert profile.counters["glasses_filled"] == 3
+
+
+def test_create_tower__with_profile_and_mmap__raises_value_error(tmp_path):
+    """
+    Test profiling a memory-mapped tower.
+    """
+    with pytest.raises(ValueError):
+        moet.create_tower(storage="mmap", path=str(tmp_path), profile=moet.Profile())
+
+
+def test_moet__with_profile__shows_profile():
+    """
+    Test running the following moet command
+
+        $ moet --breakdown --profile
+
+    """
+    runner = CliRunner()
+    result = runner.invoke(cli.moet, ["--breakdown", "--profile"])
+    assert result.exit_code == 0
+    profile = result.output.split("Profile:")[1]
+    for name in ["create_tower", "fill", "pprint", "format_breakdown"]:
+        assert f"\n{name} " in profile
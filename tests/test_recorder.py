@@ -0,0 +1,102 @@
+"""
+Test Recorder
+
+This module contains tests for recording the liquid in a tower over
+the course of a pour.
+"""
+
+from hypothesis import given, settings
+from hypothesis.strategies import floats, lists
+import numpy
+import pytest
+
+import moet
+
+
+@settings(deadline=None)
+@given(lists(floats(min_value=0, max_value=4000), max_size=20))
+def test_record_volumes__returns_same_quantities_as_fill(volumes):
+    """
+    Test recording the liquid in each glass after pouring some volumes.
+
+    This test is used to verify that each sample matches the state of
+    the tower after filling it with the same volume.
+
+    Args:
+        volumes (list of float): Volumes to sample at (millilitres)
+    """
+    tower = moet.create_tower(rows=4)
+    recording = moet.record(tower, volumes=volumes, chunk_size=3)
+    assert recording.quantities.shape == (len(volumes), tower.count)
+    for index, volume in enumerate(volumes):
+        overflow = tower.fill(volume)
+        expected = [glass.quantity for glass in tower.glasses]
+        assert recording.quantities[index] == pytest.approx(expected, abs=1e-6)
+        assert recording.overflow[index] == pytest.approx(overflow, abs=1e-6)
+
+
+def test_record_times__returns_expected_quantities():
+    """
+    Test recording the liquid in each glass during a pour.
+
+    This test demonstrates how to record a continuous pour at a
+    given rate.
+    """
+    tower = moet.create_tower(rows=3)
+    recording = moet.record(tower, times=[0, 1, 2, 3], rate=250)
+    assert recording.kind == "time"
+    assert recording.rows == 3
+    assert list(recording.get_trajectory("A")) == [0.0, 250.0, 250.0, 250.0]
+    assert list(recording.get_trajectory("B")) == [0.0, 0.0, 125.0, 250.0]
+    assert list(recording.get_trajectory("E")) == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_record__from_layout__does_not_create_glasses():
+    """
+    Test that recording a pour reads the tower's arrays rather than
+    creating its glasses.
+    """
+    profile = moet.Profile()
+    tower = moet.create_tower(rows=3, profile=profile)
+    recording = moet.record(tower, volumes=[0, 750])
+    assert "glasses_created" not in profile.counters
+    assert recording.uids == ["A", "B", "C", "D", "E", "F"]
+    assert recording.positions == [(0, 0), (1, 0), (1, 1), (2, 0), (2, 1), (2, 2)]
+    assert list(recording.capacities) == [250.0] * 6
+
+
+def test_record__without_rate__raises_value_error():
+    """
+    Test recording a pour over time without a pour rate.
+    """
+    tower = moet.create_tower(rows=3)
+    with pytest.raises(ValueError):
+        moet.record(tower, times=[0, 1])
+
+    with pytest.raises(ValueError):
+        moet.record(tower, volumes=[0, 1], times=[0, 1])
+
+
+@pytest.mark.parametrize("name", ["recording.npy", "recording.npz"])
+def test_record__to_file__can_be_loaded(tmp_path, name):
+    """
+    Test recording a pour to a file.
+
+    This test demonstrates how to save a recording (including the
+    geometry of the tower) and load it again later.
+    """
+    path = tmp_path / name
+    tower = moet.create_tower(rows=4)
+    tower.get_glass("J").capacity = 100.0
+    recording = moet.record(tower, volumes=numpy.linspace(0, 4000, 9), path=path)
+
+    loaded = moet.load_recording(path)
+    assert loaded.kind == "volume"
+    assert loaded.rate is None
+    assert loaded.rows == 4
+    assert loaded.uids == recording.uids
+    assert loaded.positions == [glass.position for glass in tower.glasses]
+    assert list(loaded.capacities) == [glass.capacity for glass in tower.glasses]
+    assert numpy.array_equal(loaded.samples, recording.samples)
+    assert numpy.array_equal(loaded.quantities, recording.quantities)
+    assert numpy.array_equal(loaded.overflow, recording.overflow)
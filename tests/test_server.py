@@ -0,0 +1,248 @@
+"""
+Test Server
+
+This module contains tests for the HTTP/JSON server.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import moet
+from moet import server
+
+
+async def request(port, method, path, data=None):
+    """
+    Send a request to the server and read the response.
+
+    Args:
+        port (int): Port the server is listening on.
+        method (str): HTTP method.
+        path (str): Path of the request.
+        data (dict, optional): JSON body.
+
+    Returns:
+        tuple: (status, headers, body) of the response, where a
+            chunked body is joined back together.
+    """
+    reader, writer = await asyncio.open_connection(server.HOST, port)
+    body = json.dumps(data).encode("utf-8") if data is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n"
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    if headers.get("Transfer-Encoding") == "chunked":
+        chunks = []
+        while True:
+            size, _, body = body.partition(b"\r\n")
+            if not int(size, 16):
+                break
+
+            chunks.append(body[: int(size, 16)])
+            body = body[int(size, 16) + 2 :]
+
+        body = b"".join(chunks)
+
+    return status, headers, body
+
+
+def run(coroutine_function, **options):
+    """
+    Run the given coroutine function against a new server.
+
+    Args:
+        coroutine_function (callable): Called with the server and its
+            port.
+        options: Options for the server.
+
+    Returns:
+        object: The result of the coroutine.
+    """
+
+    async def main():
+        instance = server.Server(**options)
+        listener = await instance.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            async with listener:
+                return await coroutine_function(instance, port)
+        finally:
+            instance.close()
+
+    return asyncio.run(main())
+
+
+def test_fill__returns_same_quantities_as_tower():
+    """
+    Test filling a tower through the server.
+
+    This test demonstrates how to fill a tower with a JSON request.
+    """
+
+    async def main(instance, port):
+        return await request(port, "POST", "/fill", {"rows": 4, "liquid": 1500})
+
+    status, headers, body = run(main)
+    tower = moet.create_tower(rows=4)
+    overflow = tower.fill(1500)
+
+    result = json.loads(body)
+    assert status == 200
+    assert headers["Content-Type"] == "application/json"
+    assert result["quantities"] == [glass.quantity for glass in tower.glasses]
+    assert result["overflow"] == overflow
+    assert result["complete"]
+
+
+def test_breakdown__streams_each_glass_as_ndjson(monkeypatch):
+    """
+    Test streaming the breakdown of a tower.
+
+    This test is used to verify that each glass is sent on its own
+    line (over several chunks), followed by the overflow.
+    """
+    monkeypatch.setattr(server, "CHUNK_SIZE", 4)
+
+    async def main(instance, port):
+        query = {"rows": 4, "liquid": 3750, "capacity": [250, 250, 250, 200]}
+        return await request(port, "POST", "/breakdown", query)
+
+    status, headers, body = run(main)
+    lines = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+    assert status == 200
+    assert headers["Content-Type"] == "application/x-ndjson"
+    assert len(lines) == 11
+    assert lines[0] == {
+        "uid": "A",
+        "position": [0, 0],
+        "quantity": 250.0,
+        "inflow": 3750.0,
+        "outflow": 3500.0,
+    }
+    assert lines[9]["uid"] == "J"
+    assert lines[10] == {"overflow": 1450.0, "rows": 4, "complete": True}
+
+
+def test_fill__with_identical_requests__computes_once():
+    """
+    Test sending the same query several times at once.
+
+    This test is used to verify that identical queries in progress at
+    the same time share a single computation.
+    """
+
+    async def main(instance, port):
+        query = {"rows": 30, "liquid": 10000}
+        responses = await asyncio.gather(
+            *[request(port, "POST", "/fill", query) for _ in range(5)],
+            request(port, "POST", "/fill", {"rows": 30, "liquid": 5000}),
+        )
+        return instance.computations, responses
+
+    computations, responses = run(main)
+    assert computations == 2
+    assert len({body for _, _, body in responses[:5]}) == 1
+
+
+def test_fill__with_large_tower__uses_worker_process():
+    """
+    Test filling a tower in a worker process.
+    """
+
+    async def main(instance, port):
+        return await request(port, "POST", "/fill", {"rows": 5, "liquid": 2000})
+
+    _, _, body = run(main, workers=1, threshold=0)
+    tower = moet.create_tower(rows=5)
+    tower.fill(2000)
+    assert json.loads(body)["quantities"] == [glass.quantity for glass in tower.glasses]
+
+
+def test_breakdown__with_large_tower__does_not_build_layout_in_server():
+    """
+    Test streaming the breakdown of a tower filled in a worker process.
+
+    This test is used to verify that the server works out the size and
+    positions of the glasses from the geometry of the tower, rather
+    than building (and caching) its topology.
+    """
+    moet.tower.get_layout.cache_clear()
+
+    async def main(instance, port):
+        query = {"rows": 3, "layout": "pyramid", "liquid": 1000}
+        return await request(port, "POST", "/breakdown", query)
+
+    _, _, body = run(main, workers=1, threshold=0)
+    lines = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    topology = moet.tower.get_layout("pyramid", 3)
+    assert [line["position"] for line in lines[:-1]] == [
+        list(position) for position in topology.positions
+    ]
+    assert moet.tower.get_layout.cache_info().misses == 1
+
+
+@pytest.mark.parametrize(
+    "method, path, data, expected",
+    [
+        ("POST", "/fill", {"rows": 0}, 400),
+        ("POST", "/fill", {"layout": "square"}, 400),
+        ("POST", "/fill", {"liquid": -1}, 400),
+        ("POST", "/fill", {"colour": "red"}, 400),
+        ("POST", "/fill", {"liquid": "abc"}, 400),
+        ("POST", "/fill", {"liquid": [1, 2]}, 400),
+        ("POST", "/fill", {"liquid": {"A": "abc"}}, 400),
+        ("POST", "/fill", {"capacity": {"a": 1}}, 400),
+        ("POST", "/fill", {"capacity": [250, None, 250, 250]}, 400),
+        ("POST", "/fill", {"engine": ["numpy"]}, 400),
+        ("POST", "/breakdown", {"liquid": "abc"}, 400),
+        ("POST", "/fill", {"rows": 1500}, 400),
+        ("POST", "/fill", {"rows": 150, "layout": "pyramid"}, 400),
+        ("GET", "/fill", None, 405),
+        ("GET", "/glasses", None, 404),
+        ("GET", "/health", None, 200),
+    ],
+)
+def test_request__returns_expected_status(method, path, data, expected):
+    """
+    Test the status of invalid (and valid) requests.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Path of the request.
+        data (dict): JSON body.
+        expected (int): Expected status.
+    """
+
+    async def main(instance, port):
+        return await request(port, method, path, data)
+
+    status, headers, body = run(main)
+    assert status == expected
+    assert "error" in json.loads(body) or expected == 200
+
+
+def test_fill__with_unexpected_error__returns_internal_error(monkeypatch):
+    """
+    Test that an unexpected error still gets a JSON response.
+    """
+
+    def fill(query):
+        raise TypeError("unexpected")
+
+    monkeypatch.setattr(server, "fill", fill)
+
+    async def main(instance, port):
+        return await request(port, "POST", "/fill", {"rows": 4})
+
+    status, _, body = run(main)
+    assert status == 500
+    assert "unexpected" in json.loads(body)["error"]
@@ -0,0 +1,99 @@
+"""
+Test Stats
+
+This module contains tests for row statistics.
+"""
+
+from hypothesis import given, settings
+from hypothesis.strategies import floats, integers
+import pytest
+
+import moet
+
+
+def test_row_stats__after_fill__returns_totals_per_row():
+    """
+    Test getting statistics for each row of a tower.
+
+    This test demonstrates how to summarise a tower one row at a time.
+    """
+    tower = moet.create_tower(rows=4)
+    tower.fill(1250)
+    stats = tower.row_stats()
+
+    assert len(stats) == 4
+    assert list(stats.counts) == [1, 2, 3, 4]
+    assert list(stats.totals) == [250.0, 500.0, 500.0, 0.0]
+    assert list(stats.full) == [1, 2, 1, 0]
+    assert list(stats.wet) == [1, 2, 3, 0]
+    assert stats.total == 1250.0
+    assert stats.first_unfilled_row == 2
+    assert stats.deepest_wet_row == 2
+    assert tower._glasses == []
+
+
+def test_row_stats__with_empty_and_full_tower__returns_none():
+    """
+    Test the rows found in a tower that is empty or full.
+    """
+    tower = moet.create_tower(rows=3)
+    stats = tower.row_stats()
+    assert stats.first_unfilled_row == 0
+    assert stats.deepest_wet_row is None
+
+    tower.fill(5000)
+    stats = tower.row_stats()
+    assert stats.first_unfilled_row is None
+    assert stats.deepest_wet_row == 2
+
+
+@settings(deadline=None, max_examples=25)
+@given(
+    integers(min_value=1, max_value=12),
+    floats(min_value=0, max_value=20000),
+    integers(min_value=1, max_value=40),
+)
+def test_iter_row_stats__matches_tower_in_memory(rows, volume, size):
+    """
+    Test streaming the statistics of a tower that is never stored.
+
+    Args:
+        rows (int): Number of rows in the tower.
+        volume (float): Liquid (millilitres)
+        size (int): Number of glasses in each block.
+    """
+    stats = moet.RowStats.concatenate(
+        moet.iter_row_stats(rows, volume, block_size=size)
+    )
+
+    tower = moet.create_tower(rows)
+    tower.fill(volume)
+    expected = tower.row_stats()
+    assert list(stats.totals) == list(expected.totals)
+    assert list(stats.full) == list(expected.full)
+    assert list(stats.wet) == list(expected.wet)
+
+
+def test_row_stats__for_mapped_tower__matches_tower_in_memory(tmp_path):
+    """
+    Test getting statistics for each row of a memory-mapped tower.
+    """
+    path = str(tmp_path / "tower")
+    tower = moet.create_tower(
+        rows=5, capacity=[100, 200, 100, 200, 100], storage="mmap", path=path
+    )
+    tower.fill(2000, block_size=4)
+    stats = tower.row_stats(block_size=4)
+
+    expected = moet.create_tower(rows=5, capacity=[100, 200, 100, 200, 100])
+    expected.fill(2000)
+    assert list(stats.totals) == list(expected.row_stats().totals)
+    assert list(stats.capacities) == [100.0, 400.0, 300.0, 800.0, 500.0]
+
+
+def test_iter_row_stats__with_invalid_rows__raises_value_error():
+    """
+    Test streaming the statistics of a tower without any rows.
+    """
+    with pytest.raises(ValueError):
+        list(moet.iter_row_stats(0, 100))
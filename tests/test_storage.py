@@ -0,0 +1,108 @@
+"""
+Test Storage
+
+This module contains tests for towers stored in memory-mapped files.
+"""
+
+import os
+import tempfile
+
+from hypothesis import given, settings
+from hypothesis.strategies import floats, integers
+import pytest
+
+import moet
+
+
+@settings(deadline=None, max_examples=25)
+@given(
+    integers(min_value=1, max_value=12),
+    floats(min_value=0, max_value=20000),
+    integers(min_value=1, max_value=40),
+)
+def test_fill_mapped_tower__matches_tower_in_memory(rows, volume, size):
+    """
+    Test pouring liquid over a memory-mapped tower.
+
+    This test is used to verify that filling a tower one block of rows
+    at a time gives exactly the same quantities (and overflow) as
+    filling it in memory.
+
+    Args:
+        rows (int): Number of rows in the tower.
+        volume (float): Liquid (millilitres)
+        size (int): Number of glasses in each block.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        tower = moet.create_tower(rows, storage="mmap", path=os.path.join(path, "t"))
+        overflow = tower.fill(volume, block_size=size)
+        quantities = list(tower.quantities)
+        del tower
+
+    expected = moet.create_tower(rows)
+    expected_overflow = expected.fill(volume)
+    assert quantities == [glass.quantity for glass in expected.glasses]
+    assert overflow == expected_overflow
+
+
+def test_fill_mapped_tower__with_odd_volume__matches_overflow_in_memory(tmp_path):
+    """
+    Test pouring a volume whose overflow depends on the order in which
+    the overflow of the bottom row is added up.
+    """
+    tower = moet.create_tower(13, storage="mmap", path=str(tmp_path / "tower"))
+    expected = moet.create_tower(13)
+    assert tower.fill(33422.74484592299) == expected.fill(33422.74484592299)
+
+
+def test_open_tower__returns_saved_state(tmp_path):
+    """
+    Test reopening a memory-mapped tower.
+
+    This test demonstrates how to store a tower in files and reopen it
+    later without filling it again.
+    """
+    path = str(tmp_path / "tower")
+    tower = moet.create_tower(rows=4, storage="mmap", path=path)
+    tower.fill({(0, 0): 2000, (2, 1): 500})
+    del tower
+
+    tower = moet.open_tower(path)
+    assert tower.get_row_count() == 4
+    assert list(tower.get_row(2)) == [250.0, 250.0, 250.0]
+    assert list(tower.get_row(3)) == [31.25, 250.0, 250.0, 31.25]
+    assert tower.overflow == 437.5
+
+
+def test_create_mapped_tower__with_invalid_options__raises_value_error(tmp_path):
+    """
+    Test creating a memory-mapped tower without a path or triangle.
+    """
+    with pytest.raises(ValueError):
+        moet.create_tower(rows=4, storage="mmap")
+
+    with pytest.raises(ValueError):
+        moet.create_tower(rows=4, layout="pyramid", storage="mmap", path=str(tmp_path))
+
+    with pytest.raises(ValueError):
+        moet.create_tower(rows=4, storage="disk")
+
+
+@pytest.mark.parametrize("capacity", [300, [250, 200, 150, 100], lambda r, c: r + c])
+def test_create_mapped_tower__with_capacity__matches_tower_in_memory(
+    tmp_path, capacity
+):
+    """
+    Test creating a memory-mapped tower with different sized glasses.
+
+    Args:
+        capacity (float or list or callable): Capacity profile.
+    """
+    path = str(tmp_path / "tower")
+    tower = moet.create_tower(rows=4, capacity=capacity, storage="mmap", path=path)
+    tower.fill(800, block_size=3)
+
+    expected = moet.create_tower(rows=4, capacity=capacity)
+    expected.fill(800)
+    assert list(tower.capacities) == [glass.capacity for glass in expected.glasses]
+    assert list(tower.quantities) == [glass.quantity for glass in expected.glasses]
@@ -0,0 +1,183 @@
+"""
+Test Topology
+
+This module contains tests for the layout of a tower of glasses.
+"""
+
+from hypothesis import given
+from hypothesis.strategies import floats, integers
+import numpy
+import pytest
+
+import moet
+from moet import topology
+
+
+def test_create_triangular_topology__returns_expected_edges():
+    """
+    Test creating the layout of a triangular tower.
+
+    This test is used to verify the parents and children of each
+    glass in a tower with three rows.
+    """
+    #        (0)
+    #        / \
+    #      (1) (2)
+    #      / \ / \
+    #    (3) (4) (5)
+    layout = topology.create_triangular_topology(3)
+    assert layout.count == 6
+    assert layout.level_count == 3
+    assert layout.positions == [(0, 0), (1, 0), (1, 1), (2, 0), (2, 1), (2, 2)]
+    assert [list(level) for level in layout.get_levels()] == [[0], [1, 2], [3, 4, 5]]
+    assert list(layout.get_children(1)) == [3, 4]
+    assert list(layout.get_parents(4)) == [1, 2]
+    assert list(layout.get_parents(0)) == []
+    assert list(layout.spill) == [0.0, 0.0, 0.0, 1.0, 1.0, 1.0]
+
+
+@given(integers(min_value=1, max_value=8))
+def test_create_triangular_topology__matches_tower_built_glass_by_glass(rows):
+    """
+    Test that the preset layout matches a tower built one glass at a time.
+
+    Args:
+        rows (int): Number of rows in the tower.
+    """
+    tower = moet.Tower()
+    for index in range(rows * (rows + 1) // 2):
+        tower.add_glass(moet.create_glass(moet.utils.get_id(index)))
+
+    expected = tower.topology
+    layout = topology.create_triangular_topology(rows)
+    assert layout.positions == expected.positions
+    assert list(layout.parent_ptr) == list(expected.parent_ptr)
+    assert list(layout.parent_index) == list(expected.parent_index)
+    assert list(layout.parent_weight) == list(expected.parent_weight)
+
+
+def test_create_topology__with_weights__returns_expected_fill():
+    """
+    Test creating a custom layout.
+
+    This test demonstrates how to create a layout where the overflow
+    is split unevenly, and where some of it spills out of the tower.
+    """
+    #        (0)
+    #   0.6 /   \ 0.2      <------- 20% of the overflow from (0) is lost
+    #     (1)   (2)
+    #   1.0 \   /
+    #        (3)
+    edges = [(0, 1), (0, 2), (1, 3), (2, 3)]
+    weights = [0.6, 0.2, 1.0, 0.5]
+    layout = topology.create_topology(edges, weights=weights)
+    tower = moet.create_tower(layout=layout)
+
+    overflow = tower.fill(750)
+    assert [glass.quantity for glass in tower.glasses] == [250.0, 250.0, 100.0, 50.0]
+    assert overflow == pytest.approx(100.0)
+    assert [glass.position for glass in tower.glasses] == [
+        (0, 0),
+        (1, 0),
+        (1, 1),
+        (2, 0),
+    ]
+
+
+def test_get_overflow__of_triangular_layout__adds_up_bottom_row():
+    """
+    Test adding up the liquid that spills out of a tower.
+
+    This test is used to verify that only the glasses that spill
+    anything are added up, so the overflow of a triangular tower is
+    exactly the sum of the overflow from its bottom row.
+    """
+    layout = topology.create_triangular_topology(13)
+    capacities = numpy.full(len(layout), 250.0)
+    pours = numpy.zeros(len(layout))
+    pours[0] = 33422.74484592299
+    _, overflow, _, outflow = layout.fill(capacities, pours, flows=True)
+    bottom = outflow[layout.level_ptr[-2] :]
+    assert overflow == float(bottom.sum())
+    assert overflow == layout.get_overflow(outflow)
+
+
+def test_create_topology__renumbers_glasses_in_schedule_order():
+    """
+    Test creating a layout where glasses are not numbered top down.
+
+    This test is used to verify that the glasses are renumbered so
+    that each glass comes after its parents.
+    """
+    layout = topology.create_topology([(2, 0), (1, 2)], count=3)
+    assert list(layout.order) == [1, 2, 0]
+    assert list(layout.get_children(0)) == [1]
+    assert list(layout.get_children(1)) == [2]
+
+
+def test_create_topology__with_cycle__raises_value_error():
+    """
+    Test creating a layout where the overflow flows in a circle.
+    """
+    with pytest.raises(ValueError):
+        topology.create_topology([(0, 1), (1, 2), (2, 0)])
+
+
+def test_create_topology__with_invalid_weights__raises_value_error():
+    """
+    Test creating a layout that creates liquid out of thin air.
+    """
+    with pytest.raises(ValueError):
+        topology.create_topology([(0, 1), (0, 2)], weights=[0.75, 0.5])
+
+    with pytest.raises(ValueError):
+        topology.create_topology([(0, 1)], weights=[-1.0])
+
+
+@given(floats(min_value=0, max_value=20000))
+def test_fill_pyramid__conserves_liquid(volume):
+    """
+    Test pouring liquid over a square pyramid.
+
+    Args:
+        volume (float): Liquid (millilitres)
+    """
+    tower = moet.create_tower(rows=4, layout="pyramid")
+    overflow = tower.fill(volume)
+    total = sum(glass.quantity for glass in tower.glasses) + overflow
+    assert total == pytest.approx(volume)
+
+
+def test_fill_pyramid__returns_expected_liquid_in_glasses():
+    """
+    Test pouring liquid over a square pyramid.
+
+    This test demonstrates how to create a pyramid, where each glass
+    sits on four glasses in the layer below.
+    """
+    tower = moet.create_tower(rows=3, layout="pyramid")
+    assert [len(row) for row in tower.get_rows()] == [1, 4, 9]
+    assert tower.get_glass("A").position == (0, 0, 0)
+
+    overflow = tower.fill(1750)
+    assert not overflow
+    layer = list(tower.get_rows())[2]
+    assert [glass.quantity for glass in layer] == [
+        31.25,
+        62.5,
+        31.25,
+        62.5,
+        125.0,
+        62.5,
+        31.25,
+        62.5,
+        31.25,
+    ]
+
+
+def test_create_tower__with_invalid_layout__raises_value_error():
+    """
+    Test creating a tower with a layout that doesn't exist.
+    """
+    with pytest.raises(ValueError):
+        moet.create_tower(rows=4, layout="cube")
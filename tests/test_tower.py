@@ -5,7 +5,7 @@ This module contains tests for the moet API.
 """
 
 from hypothesis import given
-from hypothesis.strategies import integers
+from hypothesis.strategies import floats, integers
 import pytest
 
 import moet
@@ -332,3 +332,685 @@ def test_fill_tower__3750_millilitres__returns_expected_liquid_in_glasses():
     assert tower.get_glass("H").quantity == 250.0
     assert tower.get_glass("I").quantity == 250.0
     assert tower.get_glass("J").quantity == 250.0
+
+
+def test_tower_graph__returns_expected_edges():
+    """
+    Test getting the tower as a networkx graph.
+
+    This test is used to verify that the lazily built graph has the
+    same parent/child relationships as the tower itself.
+    """
+    tower = moet.create_tower(3)
+    graph = tower.graph
+    assert list(graph.nodes) == tower.glasses
+    for glass in tower.glasses:
+        assert list(graph.successors(glass)) == tower.get_children(glass)
+        assert list(graph.predecessors(glass)) == tower.get_parents(glass)
+
+
+def test_fill_tower__twice__drains_before_pouring():
+    """
+    Test pouring liquid into a tower that already contains liquid.
+
+    This test is used to verify that each fill starts from an empty
+    tower, rather than adding to the liquid from the previous fill.
+    """
+    tower = moet.create_tower(rows=4)
+    tower.fill(3750)
+    overflow = tower.fill(500)
+    assert not overflow
+    assert tower.get_glass("B").quantity == 125.0
+    assert set(gls.quantity for gls in tower.glasses[3:]) == set([0.0])
+
+
+def test_simulate_tower__until_full__returns_expected_timestamps():
+    """
+    Test pouring liquid over a tower at a constant rate.
+
+    This test demonstrates how to get the times at which each glass
+    starts and finishes filling up.
+    """
+    #        (A)       <------- full after 1 second
+    #        / \
+    #      (B) (C)     <------- wet after 1 second, full after 3
+    #      / \ / \
+    #    (D) (E) (F)   <------- wet after 3 seconds. (E) receives twice
+    #                           as much liquid, so it fills up first.
+    tower = moet.create_tower(rows=3)
+    timestamps = tower.simulate(rate=250)
+    assert timestamps["A"] == (0.0, 1.0)
+    assert timestamps["B"] == (1.0, 3.0)
+    assert timestamps["C"] == (1.0, 3.0)
+    assert timestamps["D"] == (3.0, 7.0)
+    assert timestamps["E"] == (3.0, 5.0)
+    assert timestamps["F"] == (3.0, 7.0)
+    assert tower.overflow == 250.0
+
+
+def test_simulate_tower__with_duration__returns_partial_timestamps():
+    """
+    Test pouring liquid over a tower at a constant rate for a while.
+
+    This test is used to verify that the glasses which are not reached
+    within the duration of the pour have no timestamps.
+    """
+    tower = moet.create_tower(rows=3)
+    timestamps = tower.simulate(rate=250, duration=2)
+    assert timestamps["A"] == (0.0, 1.0)
+    assert timestamps["B"] == (1.0, None)
+    assert timestamps["D"] == (None, None)
+    assert tower.get_glass("B").quantity == 125.0
+
+
+@given(floats(min_value=1, max_value=1000), floats(min_value=0, max_value=30))
+def test_simulate_tower__returns_same_state_as_fill(rate, duration):
+    """
+    Test that a continuous pour ends in the same state as a single pour.
+
+    Args:
+        rate (float): Pour rate (millilitres per second)
+        duration (float): Length of the pour (seconds)
+    """
+    tower = moet.create_tower(rows=4)
+    tower.simulate(rate, duration)
+    quantities = [glass.quantity for glass in tower.glasses]
+    overflow = tower.overflow
+
+    expected_overflow = tower.fill(rate * duration)
+    expected = [glass.quantity for glass in tower.glasses]
+    assert quantities == pytest.approx(expected, abs=1e-6)
+    assert overflow == pytest.approx(expected_overflow, abs=1e-6)
+
+
+def test_simulate_tower__with_invalid_rate__raises_value_error():
+    """
+    Test pouring liquid over a tower without any liquid.
+    """
+    tower = moet.create_tower(rows=3)
+    with pytest.raises(ValueError):
+        tower.simulate(rate=0)
+
+
+def test_fill_tower__into_several_glasses__returns_expected():
+    """
+    Test pouring liquid into several glasses at the same time.
+
+    This test demonstrates how to pour liquid into glasses other than
+    the top most glass, using either the ID or position of the glass.
+    """
+    #        (A)
+    #        / \
+    #      (B) (C)     <------- 500 millilitres poured into (B)
+    #      / \ / \
+    #    (D) (E) (F)   <------- 250 millilitres poured into (F)
+    #    / \ / \ / \
+    #  (G) (H) (I) (J)
+    tower = moet.create_tower(rows=4)
+
+    overflow = tower.fill({"B": 500, (2, 2): 250})
+    assert not overflow
+    assert tower.get_glass("A").quantity == 0.0
+    assert tower.get_glass("B").quantity == 250.0
+    assert tower.get_glass("C").quantity == 0.0
+    assert tower.get_glass("D").quantity == 125.0
+    assert tower.get_glass("E").quantity == 125.0
+    assert tower.get_glass("F").quantity == 250.0
+
+
+@given(integers(min_value=0, max_value=4000), integers(min_value=0, max_value=4000))
+def test_fill_tower__into_several_glasses__conserves_liquid(first, second):
+    """
+    Test pouring liquid into several glasses at the same time.
+
+    This test is used to verify that no liquid is lost or created.
+
+    Args:
+        first (int): Liquid poured into the top most glass.
+        second (int): Liquid poured into glass (E).
+    """
+    tower = moet.create_tower(rows=4)
+    overflow = tower.fill({"A": first, "E": second})
+    total = sum(glass.quantity for glass in tower.glasses) + overflow
+    assert total == pytest.approx(first + second)
+
+
+def test_fill_tower__into_nonexistent_glass__raises_value_error():
+    """
+    Test pouring liquid into a glass that doesn't exist.
+    """
+    tower = moet.create_tower(rows=4)
+    with pytest.raises(ValueError):
+        tower.fill({"Z": 100})
+
+    with pytest.raises(ValueError):
+        tower.fill({(5, 0): 100})
+
+
+def test_simulate_tower__into_several_glasses__returns_expected_timestamps():
+    """
+    Test pouring liquid into several glasses at a constant rate.
+    """
+    tower = moet.create_tower(rows=3)
+    timestamps = tower.simulate(rate={"B": 250, "C": 125})
+    assert timestamps["A"] == (None, None)
+    assert timestamps["B"] == (0.0, 1.0)
+    assert timestamps["C"] == (0.0, 2.0)
+    assert timestamps["E"].wet == 1.0
+    assert timestamps["E"].full == pytest.approx(2.0 + 125.0 / 187.5)
+
+
+def test_set_split__with_ratio__returns_expected_liquid_in_glasses():
+    """
+    Test pouring liquid over a tower where the overflow is split unevenly.
+
+    This test demonstrates how to pass more of the overflow from each
+    glass to the glass below on the left.
+    """
+    tower = moet.create_tower(rows=3)
+    tower.set_split(0.75)
+    assert tower.get_split(tower.get_glass("A")) == [0.75, 0.25]
+
+    overflow = tower.fill(1000)
+    assert not overflow
+    assert tower.get_glass("B").quantity == 250.0
+    assert tower.get_glass("C").quantity == 187.5
+    assert tower.get_glass("D").quantity == 234.375
+    assert tower.get_glass("E").quantity == 78.125
+    assert tower.get_glass("F").quantity == 0.0
+
+
+def test_set_split__for_one_glass__returns_expected_liquid_in_glasses():
+    """
+    Test pouring liquid over a tower where one glass leaks.
+
+    This test demonstrates how to set the split for individual glasses,
+    where some of the overflow spills out of the tower.
+    """
+    tower = moet.create_tower(rows=3)
+    tower.set_split({"A": [0.5, 0.25]})
+    overflow = tower.fill(650)
+    assert overflow == 100.0
+    assert tower.get_glass("B").quantity == 200.0
+    assert tower.get_glass("C").quantity == 100.0
+
+
+def test_set_split__with_invalid_ratios__raises_value_error():
+    """
+    Test setting split ratios that don't match the tower.
+    """
+    tower = moet.create_tower(rows=3)
+    with pytest.raises(ValueError):
+        tower.set_split({"A": [1.0]})
+
+    with pytest.raises(ValueError):
+        tower.set_split(1.5)
+
+    with pytest.raises(ValueError):
+        tower.set_split({"A": [0.75, 0.75]})
+
+
+def test_ensemble__without_spread__matches_fill():
+    """
+    Test pouring liquid over many copies of a tower with even splits.
+    """
+    tower = moet.create_tower(rows=4)
+    results = tower.ensemble(2500, trials=10, spread=0.0)
+    tower.fill(2500)
+    expected = [glass.quantity for glass in tower.glasses]
+    assert len(results) == 10
+    assert list(results.mean) == expected
+    assert list(results.variance) == [0.0] * tower.count
+    assert list(results.overflow) == [312.5] * 10
+
+
+def test_ensemble__with_spread__returns_expected_statistics():
+    """
+    Test pouring liquid over many copies of a tower with uneven splits.
+
+    This test demonstrates how to get statistics for each glass from
+    many randomised trials.
+    """
+    tower = moet.create_tower(rows=4)
+    results = tower.ensemble(1500, trials=2000, spread=0.5, seed=1)
+    low, median, high = results.get_quantiles([0.05, 0.5, 0.95])
+
+    # The top three glasses are always full.
+    assert list(results.mean[:3]) == [250.0] * 3
+    assert list(results.variance[:3]) == [0.0] * 3
+
+    # The glasses on the edges are the same on average, but vary.
+    glass_d, glass_f = results.mean[3], results.mean[5]
+    assert glass_d == pytest.approx(glass_f, rel=0.05)
+    assert low[3] < median[3] < high[3]
+
+    # No liquid is lost.
+    totals = results.quantities.sum(axis=1) + results.overflow
+    assert totals == pytest.approx(1500.0)
+
+
+def test_fill_many__returns_same_quantities_as_fill():
+    """
+    Test pouring several amounts of liquid over copies of a tower.
+    """
+    tower = moet.create_tower(rows=4)
+    volumes = [250, 1500, {"B": 500, (2, 1): 250}]
+    quantities, overflow = tower.fill_many(volumes)
+    for volume, row, row_overflow in zip(volumes, quantities.tolist(), overflow):
+        assert row_overflow == tower.fill(volume)
+        assert row == [glass.quantity for glass in tower.glasses]
+
+
+def test_get_flows__after_fill__returns_liquid_through_each_glass():
+    """
+    Test getting the liquid that flowed through each glass.
+
+    This test demonstrates how to find the load on each glass, not
+    just the liquid it holds.
+    """
+    tower = moet.create_tower(rows=3)
+    tower.fill(1500, flows=True)
+    flows = tower.get_flows()
+
+    assert flows["A"] == (1500.0, 1250.0)
+    assert flows["B"] == (625.0, 375.0)
+    assert flows["E"] == (375.0, 125.0)
+    assert flows["D"] == (187.5, 0.0)
+
+    tower.fill(1500)
+    with pytest.raises(ValueError):
+        tower.get_flows()
+
+
+def test_get_breakpoints__returns_expected_volumes():
+    """
+    Test getting how much liquid must be poured to fill each glass.
+
+    This test demonstrates that the breakpoints are the timestamps of
+    a pour at one millilitre per second.
+    """
+    tower = moet.create_tower(rows=3)
+    breakpoints = tower.get_breakpoints()
+    assert breakpoints["A"] == (0.0, 250.0)
+    assert breakpoints["B"] == (250.0, 750.0)
+    assert breakpoints["E"] == (750.0, 1250.0)
+    assert breakpoints["F"] == (750.0, 1750.0)
+
+    timestamps = tower.simulate(rate=1)
+    assert breakpoints == timestamps
+
+
+@pytest.mark.parametrize("engine", ["numpy", "python"])
+def test_fill_tower__with_engine__returns_expected_liquid_in_glasses(engine):
+    """
+    Test pouring liquid over a tower with a specific engine.
+
+    Args:
+        engine (str): Name of the engine.
+    """
+    tower = moet.create_tower(rows=4)
+    expected_overflow = tower.fill(3000)
+    expected = [glass.quantity for glass in tower.glasses]
+
+    tower.engine = engine
+    assert tower.fill(3000) == expected_overflow
+    assert [glass.quantity for glass in tower.glasses] == expected
+
+
+def test_create_tower__with_capacity_per_row__returns_expected_liquid_in_glasses():
+    """
+    Test creating a tower where the glasses get smaller with each row.
+    """
+    #        (A)         <------- 250ml
+    #        / \
+    #      (B) (C)       <------- 200ml
+    #      / \ / \
+    #    (D) (E) (F)     <------- 150ml
+    tower = moet.create_tower(rows=3, capacity=[250, 200, 150])
+    overflow = tower.fill(1000)
+    assert [glass.capacity for glass in tower.glasses] == [250, 200, 200, 150, 150, 150]
+    assert [glass.quantity for glass in tower.glasses] == [
+        250.0,
+        200.0,
+        200.0,
+        87.5,
+        150.0,
+        87.5,
+    ]
+    assert overflow == 25.0
+
+
+def test_create_tower__with_capacity_function__returns_expected_capacities():
+    """
+    Test creating a tower where the size of each glass depends on its position.
+    """
+
+    def capacity(row, column):
+        return 300 if column in (0, row) else 100
+
+    tower = moet.create_tower(rows=3, capacity=capacity)
+    assert [glass.capacity for glass in tower.glasses] == [300, 300, 300, 300, 100, 300]
+
+    capacities = [glass.capacity for glass in tower.glasses]
+    tower = moet.create_tower(rows=3, capacity=capacities)
+    assert [glass.capacity for glass in tower.glasses] == capacities
+
+
+@pytest.mark.parametrize("capacity", [-1, [250, 250], [250, -250, 250], float("nan")])
+def test_create_tower__with_invalid_capacity__raises_value_error(capacity):
+    """
+    Test creating a tower with glasses that can't hold anything.
+
+    Args:
+        capacity (float or list): Capacity profile.
+    """
+    with pytest.raises(ValueError):
+        moet.create_tower(rows=3, capacity=capacity)
+
+
+def test_memory_usage__returns_memory_used_by_each_part():
+    """
+    Test getting the memory used by a tower.
+
+    This test demonstrates how to find out how much memory a tower
+    uses (and what for) as its glasses and graph are created.
+    """
+    tower = moet.create_tower(rows=20)
+    usage = tower.memory_usage()
+    assert list(usage) == ["topology", "state", "indexes", "caches", "total"]
+    assert usage["state"] >= 2 * 8 * tower.count
+    assert usage["caches"] == 0
+    assert usage["total"] == sum(list(usage.values())[:-1])
+
+    tower.glasses
+    glasses = tower.memory_usage()
+    assert glasses["state"] > usage["state"]
+    assert glasses["indexes"] > usage["indexes"]
+
+    tower.graph
+    graph = tower.memory_usage()
+    assert graph["caches"] > 0
+    assert tower.memory_usage(deep=False)["total"] < graph["total"]
+
+
+def test_steady_state__with_leaking_glasses__returns_expected_flows():
+    """
+    Test the steady flow through a tower of leaking glasses.
+
+    This test demonstrates how to find which glasses stay full while
+    liquid is poured over a tower whose glasses drain.
+    """
+    tower = moet.create_tower(rows=3)
+    flows, overflow = tower.steady_state(100, leak_rates=30)
+    assert flows["A"] == (100.0, 70.0, True)
+    assert flows["B"] == (35.0, 5.0, True)
+    assert flows["E"] == (5.0, 0.0, False)
+    assert [uid for uid, flow in flows.items() if flow.full] == ["A", "B", "C"]
+    assert overflow == 0.0
+
+    flows, overflow = tower.steady_state(100, leak_rates={"A": 10, (1, 1): 45})
+    assert flows["B"].outflow == 45.0
+    assert flows["C"].outflow == 0.0
+    assert flows["E"] == (22.5, 22.5, True)
+    assert overflow == 45.0
+    assert [glass.quantity for glass in tower.glasses] == [0.0] * 6
+
+
+@given(integers(min_value=1, max_value=10), floats(min_value=0, max_value=1000))
+def test_steady_state__without_leaks__passes_everything_on(rows, rate):
+    """
+    Test the steady flow through a tower of glasses that don't drain.
+
+    Args:
+        rows (int): Number of rows.
+        rate (float): Pour rate (millilitres per second)
+    """
+    tower = moet.create_tower(rows=rows)
+    flows, overflow = tower.steady_state(rate, leak_rates=[0] * rows)
+    assert overflow == pytest.approx(rate)
+    assert all(flow.full == (flow.inflow > 0) for flow in flows.values())
+
+
+def test_steady_state__with_negative_leak_rate__raises_value_error():
+    """
+    Test the steady flow through a tower of glasses that fill themselves.
+    """
+    tower = moet.create_tower(rows=3)
+    with pytest.raises(ValueError):
+        tower.steady_state(100, leak_rates=-1)
+
+    with pytest.raises(ValueError):
+        tower.steady_state(100, leak_rates={"B": -1})
+
+
+def test_get_full__after_filling_tower__returns_expected_glasses():
+    """
+    Test finding the glasses that are (at least partly) full.
+
+    This test demonstrates how to find the glasses that are at least
+    some fraction full, and the glasses that hold the most liquid.
+    """
+    tower = moet.create_tower(rows=4)
+    tower.fill(1500)
+    assert tower.get_full() == ["A", "B", "C", "E"]
+    assert tower.get_full(0.5) == ["A", "B", "C", "D", "E", "F"]
+    assert tower.count_full(0.25) == 8
+    assert tower.get_fullest(5) == ["A", "B", "C", "E", "D"]
+    assert tower.get_fullest(100) == tower.get_fullest(tower.count)
+
+    tower = moet.create_tower(rows=3, capacity=[250, 250, 100])
+    tower.fill(900)
+    assert tower.get_full() == ["A", "B", "C"]
+    assert tower.count_full(0.5) == 4
+    assert tower.get_fullest(4) == ["A", "B", "C", "E"]
+
+
+@given(
+    integers(min_value=1, max_value=40),
+    floats(min_value=0, max_value=50000),
+    floats(min_value=0, max_value=1),
+    integers(min_value=0, max_value=100),
+)
+def test_get_full__by_row__matches_every_glass(rows, liquid, fraction, count):
+    """
+    Test that searching each row finds the same glasses as checking
+    every glass.
+
+    Args:
+        rows (int): Number of rows.
+        liquid (float): Liquid poured over the tower (millilitres)
+        fraction (float): Fraction of the capacity of each glass.
+        count (int): Number of glasses.
+    """
+    tower = moet.create_tower(rows=rows)
+    tower.fill(liquid)
+    glasses = tower.copy()
+    glasses.glasses
+    assert tower.get_full(fraction) == glasses.get_full(fraction)
+    assert tower.count_full(fraction) == glasses.count_full(fraction)
+    assert tower.get_fullest(count) == glasses.get_fullest(count)
+
+
+def test_get_full__in_copy_after_setting_quantity__matches_every_glass():
+    """
+    Test finding the full glasses in a copy of a tower whose glasses
+    were changed directly.
+
+    This test is used to verify that the rows of the copy are only
+    searched if the liquid in them is still unimodal.
+    """
+    tower = moet.create_tower(rows=5)
+    tower.fill(3000)
+    tower.get_glass("E").quantity = 0
+    copy = tower.copy()
+    assert copy.count_full() == 8
+    assert copy.get_fullest(5) == ["A", "B", "C", "D", "F"]
+
+    tower = moet.create_tower(rows=5)
+    tower.fill(3000)
+    tower.glasses
+    assert tower.copy().get_fullest(5) == ["A", "B", "C", "D", "E"]
+
+
+def test_get_full__with_invalid_arguments__raises_value_error():
+    """
+    Test finding glasses with a fraction or count that is out of range.
+    """
+    tower = moet.create_tower(rows=3)
+    with pytest.raises(ValueError):
+        tower.get_full(1.5)
+
+    with pytest.raises(ValueError):
+        tower.count_full(-0.1)
+
+    with pytest.raises(ValueError):
+        tower.get_fullest(-1)
+
+
+@given(
+    integers(min_value=1, max_value=20),
+    integers(min_value=1, max_value=20),
+    floats(min_value=0, max_value=100000),
+)
+def test_fill_prefixes__for_each_row_count__matches_filling_each_tower(
+    rows, other, liquid
+):
+    """
+    Test that the towers cut from a taller tower match towers that are
+    filled from scratch.
+
+    Args:
+        rows (int): Number of rows in the tallest tower.
+        other (int): Number of rows in another tower.
+        liquid (float): Liquid poured over the towers (millilitres)
+    """
+    other = min(rows, other)
+    tower = moet.create_tower(rows=rows, capacity=lambda row, column: 100 + row)
+    towers = tower.fill_prefixes(liquid, rows=[rows, other])
+    assert sorted(towers) == sorted({rows, other})
+    for count, prefix in towers.items():
+        expected = moet.create_tower(rows=count, capacity=lambda row, column: 100 + row)
+        overflow = expected.fill(liquid, flows=True)
+        assert prefix.overflow == overflow
+        assert prefix.get_flows() == expected.get_flows()
+        assert prefix.get_full(0.5) == expected.get_full(0.5)
+        assert [glass.quantity for glass in prefix.glasses] == [
+            glass.quantity for glass in expected.glasses
+        ]
+
+    assert [glass.quantity for glass in tower.glasses] == [0.0] * tower.count
+
+
+def test_fill_prefixes__with_invalid_arguments__raises_value_error():
+    """
+    Test cutting towers that aren't in the tower (or that the liquid
+    is poured below).
+    """
+    tower = moet.create_tower(rows=4)
+    with pytest.raises(ValueError):
+        tower.fill_prefixes(1000, rows=[2, 5])
+
+    with pytest.raises(ValueError):
+        tower.fill_prefixes(1000, rows=[0])
+
+    with pytest.raises(ValueError):
+        tower.fill_prefixes({(2, 1): 1000}, rows=[2, 4])
+
+    tower.set_split(0.6)
+    with pytest.raises(ValueError):
+        tower.fill_prefixes(1000, rows=[2, 4])
+
+
+def test_set_capacity__after_fill__refills_glasses_below():
+    """
+    Test changing the capacity of a glass in a filled tower.
+
+    This test demonstrates how the glasses below a glass are refilled
+    (on the next read) when its capacity changes, without refilling
+    the rest of the tower.
+    """
+    profile = moet.Profile()
+    tower = moet.create_tower(rows=4, profile=profile)
+    tower.fill(1500, flows=True)
+    glasses = {glass.uid: glass for glass in tower.glasses}
+    assert glasses["F"].quantity == 187.5
+
+    filled = profile.counters["glasses_filled"]
+    glasses["C"].capacity = 125
+    glasses["F"].capacity = 200
+    assert glasses["C"].quantity == 125
+    assert glasses["F"].quantity == 200
+    assert glasses["J"].quantity == 25.0
+    assert tower.overflow == 0.0
+    assert tower.get_flows()["C"] == (625.0, 500.0)
+
+    # Only C, its children and their children (E, F, H, I and J) were
+    # refilled, in a single pass.
+    assert profile.counters["glasses_filled"] - filled == 6
+    assert profile.calls["_recompute"] == 1
+
+
+def test_set_capacity__after_fill__copy_finds_full_glasses():
+    """
+    Test finding the full glasses in a copy of a tower whose capacity
+    changed after a fill.
+
+    This test is used to verify that the glasses of the copy are not
+    searched as if they were all the same size.
+    """
+    tower = moet.create_tower(rows=5)
+    tower.fill(3000, flows=True)
+    tower.glasses[4].capacity = 50
+    copy = tower.copy()
+    assert copy.count_full() == 9
+    assert copy.count_full() == len(copy.get_full())
+    assert copy.count_full() == tower.count_full()
+
+
+@given(
+    integers(min_value=1, max_value=8),
+    floats(min_value=0, max_value=10000),
+    integers(min_value=0, max_value=35),
+    floats(min_value=0, max_value=500),
+)
+def test_set_capacity__after_fill__matches_filling_again(rows, liquid, index, capacity):
+    """
+    Test that refilling the glasses below a glass whose capacity
+    changed gives the same result as filling the whole tower again.
+
+    Args:
+        rows (int): Number of rows.
+        liquid (float): Liquid poured over the tower (millilitres)
+        index (int): Number of the glass to change.
+        capacity (float): New capacity of the glass (millilitres)
+    """
+    tower = moet.create_tower(rows=rows)
+    tower.fill(liquid)
+    glasses = tower.glasses
+    glasses[index % len(glasses)].capacity = capacity
+    glasses[-1].capacity = capacity / 2
+    quantities = [glass.quantity for glass in glasses]
+    overflow = tower.overflow
+
+    assert tower.fill(liquid) == overflow
+    assert [glass.quantity for glass in glasses] == quantities
+
+
+def test_get_row_count__for_each_layout__returns_number_of_levels():
+    """
+    Test getting the number of rows in towers of each layout.
+    """
+    assert moet.create_tower(rows=3).get_row_count() == 3
+    assert moet.create_tower(rows=3, layout="pyramid").get_row_count() == 3
+    assert moet.Tower().get_row_count() == 0
+
+
+def test_add_glass__to_pyramid__raises_value_error():
+    """
+    Test adding a glass to a tower that isn't triangular.
+    """
+    tower = moet.create_tower(rows=3, layout="pyramid")
+    with pytest.raises(ValueError):
+        tower.add_glass(moet.create_glass("Z"))
+
+    assert tower.count == 14
@@ -5,9 +5,12 @@ This module contains tests for the moet's utility functions.
 """
 
 import string
+import subprocess
+import sys
 
 from hypothesis import given
 from hypothesis.strategies import integers
+import pytest
 
 import moet
 
@@ -110,3 +113,102 @@ def test_is_triangular_check__with_invalid_numbers__returns_false():
     valid_numbers = [2, 4, 5, 7, 8, 9, 11, 12, 13, 14, 16]
     for number in valid_numbers:
         assert not moet.utils.is_triangular(number)
+
+
+def test_get_version__returns_package_version():
+    """
+    Test getting the version of moet.
+
+    This test is used to verify that the version reported by the CLI
+    comes from the generated version constant.
+    """
+    assert moet.utils.get_version() == moet.__version__
+
+
+def test_is_triangular__with_large_numbers__returns_exact_result():
+    """
+    Test `is_triangular` with numbers beyond floating point precision.
+
+    This test is used to verify that the triangular checks are exact,
+    however many glasses a tower has.
+    """
+    rows = 10 ** 12 + 7
+    number = moet.utils.get_triangular_value(rows)
+    assert moet.utils.is_triangular(number)
+    assert not moet.utils.is_triangular(number + 1)
+    assert not moet.utils.is_triangular(number - 1)
+    assert moet.utils.get_triangular_row(number) == rows
+    assert moet.utils.get_triangular_row(number - 1) == rows - 1
+    assert moet.utils.get_triangular_root(number) == rows
+
+
+@given(integers(min_value=0, max_value=2 ** 62))
+def test_get_position__with_index__returns_inverse_of_get_index(index):
+    """
+    Test converting between the index and position of a glass.
+
+    This test demonstrates how to find the position (row, column) of
+    a glass from its index in a triangular tower, and back again.
+
+    Args:
+        index (int): Index of the glass.
+    """
+    row, column = moet.utils.get_position(index)
+    assert 0 <= column <= row
+    assert moet.utils.get_index(row, column) == index
+
+    rows, columns = moet.utils.get_positions([index])
+    assert (int(rows[0]), int(columns[0])) == (row, column)
+    assert int(moet.utils.get_indices(rows, columns)[0]) == index
+
+
+def test_get_positions__returns_positions_in_row_order():
+    """
+    Test converting many indices to positions at once.
+    """
+    rows, columns = moet.utils.get_positions(range(10))
+    assert list(rows) == [0, 1, 1, 2, 2, 2, 3, 3, 3, 3]
+    assert list(columns) == [0, 0, 1, 0, 1, 2, 0, 1, 2, 3]
+
+
+def test_get_index__with_invalid_position__raises_value_error():
+    """
+    Test converting positions that aren't in a triangle.
+    """
+    with pytest.raises(ValueError):
+        moet.utils.get_index(2, 3)
+
+    with pytest.raises(ValueError):
+        moet.utils.get_indices([1, 2], [0, -1])
+
+    with pytest.raises(ValueError):
+        moet.utils.get_position(-1)
+
+
+def test_get_size__with_shared_values__counts_them_once():
+    """
+    Test getting the memory used by values that share their items.
+    """
+    item = "x" * 1000
+    shallow = moet.utils.get_size([item, item], deep=False)
+    deep = moet.utils.get_size([item, item])
+    assert deep - shallow == moet.utils.get_size(item)
+
+    glass = moet.create_glass("A")
+    assert moet.utils.get_size(glass) > moet.utils.get_size(glass, deep=False)
+
+    one = moet.utils.get_size([glass])
+    two = moet.utils.get_size([glass, glass])
+    assert two - one == sys.getsizeof([glass, glass]) - sys.getsizeof([glass])
+
+
+def test_import_moet__does_not_import_inspect():
+    """
+    Test importing moet in a fresh interpreter.
+
+    This test is used to verify that `inspect` is only imported once
+    the memory used by a value is measured (see `get_size`).
+    """
+    code = "import sys, moet; print('inspect' in sys.modules)"
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.decode().strip() == "False"
@@ -0,0 +1,136 @@
+"""
+Test Verify
+
+This module contains tests for checking fills against the reference
+fill.
+"""
+
+from hypothesis import assume, given, settings
+import numpy
+import pytest
+
+import moet
+from moet import engines, verify
+
+import strategies
+
+
+class BrokenEngine:
+    """
+    An engine that loses a little liquid in the first glass.
+    """
+
+    name = "broken"
+    available = True
+
+    def fill(self, topology, capacities, pours, **options):
+        quantities, overflow = engines.ENGINES["numpy"].fill(
+            topology, capacities, pours
+        )
+        quantities[0] *= 0.5
+        return quantities, overflow
+
+
+@pytest.mark.parametrize("name", strategies.ENGINES)
+@settings(deadline=None)
+@given(strategies.fills())
+def test_fill__with_engine__matches_reference(name, fill):
+    """
+    Test filling towers of any layout with each engine.
+
+    This test is used to verify that every engine gives the same
+    results as the reference fill (within rounding errors).
+
+    Args:
+        name (str): Name of the engine.
+        fill (tuple): (topology, capacities, pours)
+    """
+    topology, capacities, pours = fill
+    try:
+        expected, expected_overflow = verify.reference_fill(*fill, limit=100000)
+    except ValueError:
+        assume(False)
+
+    quantities, overflow = engines.get_engine(name).fill(*fill)
+    assert numpy.allclose(quantities, expected, rtol=1e-9, atol=1e-6)
+    assert overflow == pytest.approx(expected_overflow, rel=1e-9, abs=1e-6)
+
+
+def test_reference_fill__matches_recursive_fill():
+    """
+    Test the reference fill against `Tower._fill`.
+    """
+    tower = moet.create_tower(rows=6)
+    tower._fill(tower.get_glass("A"), 4000)
+
+    topology = tower.topology
+    pours = numpy.zeros(len(topology))
+    pours[0] = 4000
+    quantities, overflow = verify.reference_fill(
+        topology, tower._get_capacities(), pours
+    )
+    assert quantities.tolist() == [glass.quantity for glass in tower.glasses]
+    assert overflow == tower.overflow
+
+
+def test_fill__with_verify__raises_verification_error(monkeypatch):
+    """
+    Test verifying a fill that doesn't match the reference fill.
+
+    This test demonstrates how mismatches are reported, with enough
+    information to reproduce them.
+    """
+    monkeypatch.setitem(engines.ENGINES, "broken", BrokenEngine())
+    tower = moet.create_tower(rows=4)
+    tower.engine = "broken"
+    tower.fill(0, verify=True)
+
+    with pytest.raises(moet.VerificationError) as error:
+        tower.fill({"A": 500, (2, 1): 250}, verify=True)
+
+    mismatch = error.value.mismatch
+    message = str(error.value)
+    assert "The broken engine doesn't match the reference fill." in message
+    assert "Layout: triangular (4 rows)" in message
+    assert "Liquid: {'A': 500, (2, 1): 250}" in message
+    assert "Glass 0: expected 250.0, got 125.0" in message
+    assert mismatch.glasses == [0]
+
+    copy = mismatch.create_tower()
+    assert copy.engine == "broken"
+    assert copy.fill(mismatch.liquid) == tower.overflow
+
+
+def test_fill__with_verifier__checks_a_fraction_of_fills(monkeypatch):
+    """
+    Test checking a fraction of fills (e.g. in production)
+
+    This test is used to verify that mismatches are recorded (and
+    warned about) rather than raised, and that fills that are too
+    large to check are skipped.
+    """
+    monkeypatch.setitem(engines.ENGINES, "broken", BrokenEngine())
+    tower = moet.create_tower(rows=4)
+    tower.engine = "broken"
+    tower.verifier = moet.Verifier(rate=0.5, seed=0)
+    with pytest.warns(RuntimeWarning):
+        for volume in range(1, 101):
+            tower.fill(volume)
+
+    assert 30 < tower.verifier.checked < 70
+    assert len(tower.verifier.mismatches) == tower.verifier.checked
+
+    tower = moet.create_tower(rows=30)
+    tower.verifier = moet.Verifier(limit=1000)
+    tower.fill(1000000)
+    assert tower.verifier.skipped == 1
+    with pytest.raises(ValueError):
+        tower.fill(1000000, verify=True)
+
+
+def test_create_verifier__with_invalid_rate__raises_value_error():
+    """
+    Test creating a verifier that checks more than every fill.
+    """
+    with pytest.raises(ValueError):
+        moet.Verifier(rate=1.5)
@@ -0,0 +1,123 @@
+"""
+Test Watch
+
+This module contains tests for animating a pour in the terminal.
+"""
+
+from click.testing import CliRunner
+import numpy
+import pytest
+
+import moet
+from moet import cli
+from moet import watch
+
+
+class FakeClock:
+    """Clock that only moves forward when something sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_get_layout__returns_expected_cells():
+    """
+    Test getting the screen layout of a tower.
+
+    This test is used to verify that the tower is drawn in the same
+    shape as `moet` draws it, with one cell per glass.
+    """
+    tower = moet.create_tower(rows=3)
+    layout = watch.get_layout(tower)
+    assert layout.lines == [
+        "     ( )",
+        "     / \\ ",
+        "   ( ) ( )",
+        "   / \\ / \\ ",
+        " ( ) ( ) ( )",
+    ]
+    assert layout.cells == [(0, 6), (2, 4), (2, 8), (4, 2), (4, 6), (4, 10)]
+
+
+def test_render_changes__only_redraws_changed_glasses():
+    """
+    Test rendering the difference between two frames.
+
+    This test is used to verify that glasses whose displayed level
+    didn't change are not redrawn.
+    """
+    tower = moet.create_tower(rows=3)
+    layout = watch.get_layout(tower)
+    previous = numpy.array([8, 4, 4, 0, 0, 0])
+    levels = numpy.array([8, 5, 5, 0, 0, 0])
+    text = watch.render_changes(layout, previous, levels, "status")
+    assert text.count(watch.RESTORE_CURSOR) == 2
+    assert "\x1b[3A\x1b[5G" + watch.LEVELS[5] in text
+    assert "\x1b[3A\x1b[9G" + watch.LEVELS[5] in text
+    assert text.endswith("\rstatus" + watch.CLEAR_LINE)
+
+
+def test_watch__with_frame_rate__draws_capped_frames():
+    """
+    Test animating a pour.
+
+    This test is used to verify that the number of frames is capped
+    by the frame rate, and that each frame is written in one go.
+    """
+    clock = FakeClock()
+    frames = []
+    tower = moet.create_tower(rows=3)
+    count = watch.watch(
+        tower, rate=250, fps=10, write=frames.append, clock=clock, sleep=clock.sleep
+    )
+
+    # Every glass is full after 7 seconds, at 10 frames per second.
+    assert count == 71
+    assert len(frames) == count + 1
+    assert frames[-2].endswith("t=7.00s poured=1750ml overflow=250ml\x1b[K")
+
+
+def test_watch__without_duration__leaves_tower_unchanged():
+    """
+    Test animating a pour until every glass is full.
+
+    This test is used to verify that the length of the pour is found
+    without pouring liquid over the tower itself.
+    """
+    clock = FakeClock()
+    tower = moet.create_tower(rows=3)
+    assert watch.get_end_time(tower, 250) == 7.0
+
+    watch.watch(tower, rate=250, fps=1, write=[].append, clock=clock, sleep=clock.sleep)
+    assert [glass.quantity for glass in tower.glasses] == [0.0] * 6
+    assert tower.overflow == 0.0
+
+
+def test_watch__with_invalid_frame_rate__raises_value_error():
+    """
+    Test animating a pour without any frames.
+    """
+    tower = moet.create_tower(rows=3)
+    with pytest.raises(ValueError):
+        watch.watch(tower, rate=250, fps=0)
+
+
+def test_moet_watch__returns_expected():
+    """
+    Test running the following moet command
+
+        $ moet watch --rows 3 --duration 1 --speed 1000
+
+    """
+    runner = CliRunner()
+    options = ["watch", "--rows", "3", "--duration", "1", "--speed", "1000"]
+    result = runner.invoke(cli.moet, options)
+    assert result.exit_code == 0
+    assert "Pouring champagne over the tower at 250.0 ml/s:" in result.output
+    assert result.output.endswith("t=1.00s poured=250ml overflow=0ml\x1b[K\n")